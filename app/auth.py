@@ -1,7 +1,14 @@
 from fastapi import HTTPException, Security, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from .config import settings
+from dataclasses import dataclass
+from typing import Dict, Optional
+import hashlib
 import logging
+import math
+from .config import settings
+from .rate_limit import TokenBucket
+from .scheduler import validate_priority
+from . import serving
 
 logger = logging.getLogger(__name__)
 
@@ -9,8 +16,42 @@ logger = logging.getLogger(__name__)
 security = HTTPBearer(auto_error=False)
 
 
-def verify_api_key(credentials: HTTPAuthorizationCredentials = Security(security)) -> bool:
-    """Verify API key from request header"""
+@dataclass(frozen=True)
+class ApiClient:
+    """The client identified by an API key"""
+
+    name: str
+    priority: str
+    # None when the key has no rate limit
+    bucket: Optional[TokenBucket] = None
+
+
+def _build_api_clients() -> Dict[str, ApiClient]:
+    """Clients by SHA-256 of their key, from the key settings"""
+    clients = {}
+    # Each worker process enforces its share of the limit
+    workers = serving.worker_processes()
+    for key in settings.api_key_settings():
+        bucket = None
+        if key.rate_per_second > 0:
+            rate = key.rate_per_second / workers
+            bucket = TokenBucket(rate, (key.burst or math.ceil(key.rate_per_second)) / workers)
+        clients[key.key_sha256.lower()] = ApiClient(key.name, validate_priority(key.priority), bucket)
+    return clients
+
+
+# Built once; workers are started with their count in the environment before importing the app
+_api_clients = _build_api_clients()
+
+
+def reset_api_clients() -> None:
+    """Rebuild the clients after the key settings changed, resetting their rate limits"""
+    global _api_clients
+    _api_clients = _build_api_clients()
+
+
+def verify_api_key(credentials: HTTPAuthorizationCredentials = Security(security)) -> ApiClient:
+    """Verify API key from request header and apply its rate limit"""
     if not credentials:
         raise HTTPException(
             status_code=401,
@@ -20,7 +61,8 @@ def verify_api_key(credentials: HTTPAuthorizationCredentials = Security(security
     
     api_key = credentials.credentials
     
-    if api_key != settings.api_key:
+    client = _api_clients.get(hashlib.sha256(api_key.encode()).hexdigest())
+    if client is None:
         logger.warning(f"Invalid API key attempt: {api_key[:10]}...")
         raise HTTPException(
             status_code=401,
@@ -28,14 +70,24 @@ def verify_api_key(credentials: HTTPAuthorizationCredentials = Security(security
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    return True
+    if client.bucket is not None:
+        wait = client.bucket.take()
+        if wait > 0:
+            logger.warning(f"Rate limit exceeded for API key {client.name}")
+            raise HTTPException(
+                status_code=429,
+                detail="Rate limit exceeded",
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+    
+    return client
 
 
-def get_current_user(verified: bool = Depends(verify_api_key)) -> dict:
-    """Get current user (for future extension)"""
-    # For now, just return a basic user object
-    # This can be extended to include user roles, permissions, etc.
+def get_current_user(client: ApiClient = Depends(verify_api_key)) -> dict:
+    """Get current user: the API key's name and scheduling priority"""
     return {
         "authenticated": True,
-        "api_key_valid": verified
-    } 
\ No newline at end of file
+        "api_key_valid": True,
+        "client": client.name,
+        "priority": client.priority
+    }
@@ -0,0 +1,37 @@
+"""
+Rebuild the scan statistics rollups from existing scan_results rows.
+
+Rollups are maintained incrementally as callbacks arrive; run this once
+after upgrading, or to repair rollups after manual edits to scan_results.
+Buckets older than the oldest stored result (e.g. removed by retention)
+are kept:
+
+    python -m app.backfill_rollups
+"""
+
+import asyncio
+import logging
+import sys
+
+from .database import db_manager
+
+logger = logging.getLogger(__name__)
+
+
+async def backfill() -> bool:
+    """Recompute rollup buckets from scan_results"""
+    try:
+        await db_manager.connect()
+        return await db_manager.rebuild_scan_rollups()
+    finally:
+        await db_manager.close()
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    logger.info(f"Rebuilding scan rollups ({db_manager.name})...")
+    sys.exit(0 if asyncio.run(backfill()) else 1)
+
+
+if __name__ == "__main__":
+    main()
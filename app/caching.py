@@ -0,0 +1,53 @@
+import hashlib
+from typing import Dict
+
+from fastapi import Request
+
+from .config import settings
+
+# Build states that can no longer change
+TERMINAL_STATUSES = {"SUCCESS", "FAILURE", "ABORTED"}
+
+# Suffixes CompressionMiddleware appends to the ETags of encoded responses
+_ENCODING_SUFFIXES = ("-br", "-gzip")
+
+
+def make_etag(*parts) -> str:
+    """Build a strong ETag from the values that identify a representation"""
+    digest = hashlib.blake2b("\x1f".join(map(str, parts)).encode(), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+def _opaque_tag(tag: str) -> str:
+    """Normalize an entity tag for If-None-Match's weak comparison"""
+    tag = tag.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    for suffix in _ENCODING_SUFFIXES:
+        if tag.endswith(f'{suffix}"'):
+            return tag[:-len(suffix) - 1] + '"'
+    return tag
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match header matches etag"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(_opaque_tag(tag) == etag for tag in header.split(","))
+
+
+def cache_headers(etag: str, terminal: bool) -> Dict[str, str]:
+    """ETag and Cache-Control headers for a build-derived response
+
+    Responses for finished builds never change, so shared caches may keep
+    them; anything else must be revalidated with If-None-Match.
+    """
+    if terminal:
+        cache_control = f"public, max-age={settings.cache_terminal_max_age}, immutable"
+    else:
+        cache_control = "no-cache"
+    # Authorization is part of the cache key so shared caches don't serve other clients
+    return {"ETag": etag, "Cache-Control": cache_control, "Vary": "Authorization"}
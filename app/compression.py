@@ -0,0 +1,195 @@
+import zlib
+from typing import Optional
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional, gzip is always available
+    brotli = None
+
+
+# Bodies at least this large are compressed in a worker thread so that
+# compressing a multi-megabyte log doesn't stall the event loop
+THREAD_COMPRESSION_SIZE = 256 * 1024
+
+
+async def _run(func, data: bytes) -> bytes:
+    if len(data) >= THREAD_COMPRESSION_SIZE:
+        return await anyio.to_thread.run_sync(func, data)
+    return func(data)
+
+
+def _accepted_encodings(accept_encoding: str) -> dict:
+    """Parse an Accept-Encoding header into {coding: q-value}"""
+    accepted = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip().lower()] = q
+    return accepted
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick br or gzip from an Accept-Encoding header, preferring br"""
+    accepted = _accepted_encodings(accept_encoding)
+    wildcard = accepted.get("*", 0.0)
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best, best_q = None, 0.0
+    for coding in candidates:
+        q = accepted.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class _GzipCompressor:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+
+class _BrotliCompressor:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.process(data) + self._compressor.finish()
+
+
+class CompressionMiddleware:
+    """Compress responses with brotli or gzip, as negotiated by Accept-Encoding
+
+    Like Starlette's GZipMiddleware, but also offers brotli when the
+    ``brotli`` package is installed, and uses a moderate compression level
+    suited to dynamic responses. Responses smaller than ``minimum_size`` or
+    already encoded are sent unchanged.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            encoding = negotiate_encoding(Headers(scope=scope).get("Accept-Encoding", ""))
+            if encoding is not None:
+                responder = _CompressionResponder(self.app, encoding, self)
+                await responder(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+    def compressor(self, encoding: str):
+        if encoding == "br":
+            return _BrotliCompressor(self.brotli_quality)
+        return _GzipCompressor(self.gzip_level)
+
+
+class _CompressionResponder:
+    def __init__(self, app: ASGIApp, encoding: str, middleware: CompressionMiddleware):
+        self.app = app
+        self.encoding = encoding
+        self.middleware = middleware
+        self.send: Optional[Send] = None
+        self.initial_message: Message = {}
+        self.started = False
+        self.passthrough = False
+        self.compressor = None
+        self.if_none_match = ""
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        self.if_none_match = Headers(scope=scope).get("If-None-Match", "")
+        await self.app(scope, receive, self.send_compressed)
+
+    def _encoded_etag(self, etag: Optional[str]) -> Optional[str]:
+        # The encoded body is a different representation, so it needs its own strong ETag
+        if etag and etag.endswith('"') and not etag.startswith("W/"):
+            return f'{etag[:-1]}-{self.encoding}"'
+        return None
+
+    def _encoded_headers(self) -> MutableHeaders:
+        headers = MutableHeaders(raw=self.initial_message["headers"])
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        etag = self._encoded_etag(headers.get("ETag"))
+        if etag:
+            headers["ETag"] = etag
+        return headers
+
+    def _tag_not_modified(self) -> None:
+        """Give a 304 the ETag and Vary of the encoded response being revalidated, if it was one"""
+        headers = MutableHeaders(raw=self.initial_message["headers"])
+        etag = self._encoded_etag(headers.get("ETag"))
+        tags = [tag.strip().removeprefix("W/") for tag in self.if_none_match.split(",")]
+        if etag and etag in tags:
+            headers["ETag"] = etag
+            headers.add_vary_header("Accept-Encoding")
+
+    async def send_compressed(self, message: Message) -> None:
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            # Hold the start message until the body tells us whether to compress
+            self.initial_message = message
+            self.passthrough = "content-encoding" in Headers(raw=message["headers"])
+            if message["status"] == 304 and not self.passthrough:
+                self._tag_not_modified()
+            return
+
+        if message_type != "http.response.body" or self.passthrough:
+            if not self.started and self.initial_message:
+                self.started = True
+                await self.send(self.initial_message)
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if not self.started:
+            self.started = True
+            if len(body) < self.middleware.minimum_size and not more_body:
+                # Not worth compressing small responses
+                await self.send(self.initial_message)
+                await self.send(message)
+                return
+
+            self.compressor = self.middleware.compressor(self.encoding)
+            headers = self._encoded_headers()
+            if not more_body:
+                body = await _run(self.compressor.finish, body)
+                headers["Content-Length"] = str(len(body))
+            else:
+                del headers["Content-Length"]
+                body = await _run(self.compressor.compress, body)
+            await self.send(self.initial_message)
+            await self.send({"type": "http.response.body", "body": body, "more_body": more_body})
+            return
+
+        if self.compressor is None:
+            # Small single-message response already sent uncompressed
+            await self.send(message)
+            return
+
+        body = await _run(self.compressor.compress if more_body else self.compressor.finish, body)
+        await self.send({"type": "http.response.body", "body": body, "more_body": more_body})
@@ -1,8 +1,38 @@
+import hashlib
 import os
-from typing import Optional
+from typing import List, Optional
+from pydantic import BaseModel
 from pydantic_settings import BaseSettings
 
 
+class JenkinsControllerSettings(BaseModel):
+    """Connection, capacity and routing settings for one Jenkins controller"""
+    
+    name: str
+    url: str
+    username: str = ""
+    password: str = ""
+    token: str = ""
+    # Concurrent builds the controller should take; defaults to its executor count
+    capacity: Optional[int] = None
+    # fnmatch patterns of jobs routed to this controller; empty means any job
+    jobs: List[str] = []
+
+
+class ApiKeySettings(BaseModel):
+    """A named API key with its rate limit and scheduling priority"""
+    
+    name: str
+    # Hex SHA-256 of the key; the key itself is never configured
+    key_sha256: str
+    # critical, interactive or bulk; decides the order of queued Jenkins calls
+    priority: str = "interactive"
+    # Sustained requests per second; 0 means no limit
+    rate_per_second: float = 0.0
+    # Requests allowed in a burst; defaults to one second's worth
+    burst: Optional[int] = None
+
+
 class Settings(BaseSettings):
     """Application settings"""
     
@@ -16,8 +46,26 @@ class Settings(BaseSettings):
     port: int = 8000
     debug: bool = False
     
+    # Worker processes (run.py); 0 starts one per available CPU, 1 runs a single uvicorn process
+    workers: int = 1
+    # Import the app in the gunicorn master before forking workers
+    preload_app: bool = False
+    keepalive_seconds: int = 5
+    backlog: int = 2048
+    # Requests served concurrently per worker before answering 503; 0 means no limit
+    limit_concurrency: int = 0
+    # Restart a worker after this many requests (plus up to the jitter) to bound memory growth; 0 disables
+    max_requests: int = 0
+    max_requests_jitter: int = 0
+    graceful_timeout_seconds: int = 30
+    # Workers silent for longer than this are killed and replaced
+    worker_timeout_seconds: int = 120
+    
     # Security
     api_key: str = "your-secret-api-key-here"
+    # Named API keys as a JSON list of ApiKeySettings; when empty, api_key is
+    # the only key, unlimited and with interactive priority
+    api_keys: List[ApiKeySettings] = []
     
     # Jenkins Configuration
     jenkins_url: str = "http://localhost:8080"
@@ -25,12 +73,85 @@ class Settings(BaseSettings):
     jenkins_password: str = ""
     jenkins_token: str = ""
     
+    # Multiple Jenkins controllers as a JSON list of JenkinsControllerSettings;
+    # when empty, the single controller above is used
+    jenkins_controllers: List[JenkinsControllerSettings] = []
+    # Jenkins calls in flight per worker; more wait in priority order, round robin across API keys
+    jenkins_max_concurrency: int = 16
+    # Of those, slots only triggers and callbacks may use, whatever their key's priority
+    jenkins_reserved_slots: int = 2
+    # How long cached controller queue/executor counts are trusted
+    jenkins_load_cache_seconds: float = 10.0
+    # How often the job catalog used to validate triggers is reloaded; 0 disables it
+    job_catalog_refresh_seconds: float = 300.0
+    
+    # Storage backend: oracle, sqlite or postgres
+    storage_backend: str = "oracle"
+    
+    # Comma separated results keys that get dedicated JSON indexes
+    results_indexed_keys: str = "critical_count,high_count,medium_count,low_count,risk_score"
+    
     # Database Configuration (Oracle)
     oracle_host: str = "localhost"
     oracle_port: int = 1521
     oracle_service: str = "XE"
     oracle_username: str = "system"
     oracle_password: str = "oracle"
+    oracle_pool_min: int = 1
+    oracle_pool_max: int = 10
+    
+    # Database Configuration (SQLite)
+    sqlite_path: str = "data/scan.db"
+    sqlite_batch_size: int = 100
+    sqlite_batch_interval_ms: int = 5
+    
+    # Database Configuration (PostgreSQL)
+    postgres_host: str = "localhost"
+    postgres_port: int = 5432
+    postgres_database: str = "scan"
+    postgres_username: str = "postgres"
+    postgres_password: str = "postgres"
+    postgres_pool_min: int = 1
+    postgres_pool_max: int = 10
+    
+    # Retention: results/logs older than this many days are removed a month
+    # partition at a time; 0 keeps them forever
+    retention_results_days: int = 0
+    retention_logs_days: int = 0
+    # Directory expired logs are archived to (gzipped JSON lines per month) before removal; empty disables
+    retention_archive_dir: str = ""
+    # How often partitions are maintained and retention applied; 0 disables it
+    retention_interval_seconds: float = 3600.0
+    
+    # Findings extracted from report artifacts (SARIF, CycloneDX) after a build's callback
+    findings_enabled: bool = True
+    # Comma separated fnmatch patterns of artifact file names parsed as reports
+    findings_artifact_patterns: str = "*.sarif,*.sarif.json,*cyclonedx*.json,*.cdx.json,bom.json"
+    # Larger artifacts are skipped
+    findings_max_artifact_bytes: int = 100 * 1024 * 1024
+    # Processes parsing reports, so large reports don't block the event loop
+    findings_parser_processes: int = 2
+    # Findings kept per build, most severe first
+    findings_max_per_build: int = 50000
+    
+    # Response compression (brotli when installed, else gzip)
+    compression_minimum_size: int = 1024
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4
+    
+    # Cache-Control max-age for responses about finished builds
+    cache_terminal_max_age: int = 31536000
+    
+    # Directory build logs are captured to incrementally (Jenkins progressiveText)
+    # whenever they are read, so the callback only fetches the rest; empty disables it
+    log_capture_dir: str = ""
+    # Captured logs of builds that never called back are removed after this long
+    log_capture_max_age_hours: float = 48.0
+    
+    # Log search budget per request
+    log_search_timeout_seconds: float = 5.0
+    log_search_max_bytes: int = 256 * 1024 * 1024
+    log_search_max_line_length: int = 10000
     
     # Logging
     log_level: str = "DEBUG"
@@ -38,6 +159,27 @@ class Settings(BaseSettings):
     class Config:
         env_file = ".env"
         case_sensitive = False
+    
+    def jenkins_controller_settings(self) -> List[JenkinsControllerSettings]:
+        """Configured Jenkins controllers, or the single legacy controller"""
+        if self.jenkins_controllers:
+            return self.jenkins_controllers
+        return [JenkinsControllerSettings(
+            name="default",
+            url=self.jenkins_url,
+            username=self.jenkins_username,
+            password=self.jenkins_password,
+            token=self.jenkins_token
+        )]
+    
+    def api_key_settings(self) -> List[ApiKeySettings]:
+        """Configured API keys, or the single legacy key"""
+        if self.api_keys:
+            return self.api_keys
+        return [ApiKeySettings(
+            name="default",
+            key_sha256=hashlib.sha256(self.api_key.encode()).hexdigest()
+        )]
 
 
 # Global settings instance
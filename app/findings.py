@@ -0,0 +1,120 @@
+"""
+Extract structured findings from a build's report artifacts.
+
+After a build's callback, its SARIF and CycloneDX artifacts are downloaded
+from Jenkins and parsed in a process pool, so a large report neither blocks
+the event loop nor competes with request handling for the GIL. The findings
+replace any stored earlier for the build.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from fnmatch import fnmatch
+from typing import Any, Dict, List, Optional, Sequence
+
+from .config import settings
+from .database import db_manager
+from .jenkins_client import jenkins_client
+from .report_parsers import MAX_ARTIFACT_BYTES, SEVERITIES, parse_report_file, truncate_bytes
+from .scheduler import jenkins_scheduler
+
+logger = logging.getLogger(__name__)
+
+# Artifact downloads queue behind request-driven Jenkins calls
+_PRIORITY = "bulk"
+_CLIENT = "findings"
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _executor() -> ProcessPoolExecutor:
+    """The parser process pool, started on first use"""
+    global _pool
+    if _pool is None:
+        # spawn: forking a process running an event loop and driver threads isn't safe
+        _pool = ProcessPoolExecutor(
+            max_workers=max(1, settings.findings_parser_processes),
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pool
+
+
+def shutdown() -> None:
+    """Stop the parser processes"""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def report_artifacts(paths: Sequence[str]) -> List[str]:
+    """Artifacts whose file name matches findings_artifact_patterns"""
+    patterns = [pattern.strip() for pattern in settings.findings_artifact_patterns.split(",") if pattern.strip()]
+    return [path for path in paths
+            if any(fnmatch(os.path.basename(path).lower(), pattern.lower()) for pattern in patterns)]
+
+
+async def _parse_artifact(job_name: str, build_number: int, relative_path: str, path: str,
+                          controller: Optional[str]) -> List[Dict[str, Any]]:
+    """Findings of one artifact, downloaded to path; none if it can't be fetched or parsed"""
+    def download() -> bool:
+        with open(path, "wb") as destination:
+            return jenkins_client.download_artifact(
+                job_name, build_number, relative_path, destination,
+                settings.findings_max_artifact_bytes, controller=controller
+            )
+
+    if not await jenkins_scheduler.run(_PRIORITY, _CLIENT, download):
+        return []
+    try:
+        findings = await asyncio.get_running_loop().run_in_executor(_executor(), parse_report_file, path)
+    except Exception as e:
+        logger.warning(f"Skipping artifact {relative_path} of {job_name}#{build_number}: {e}")
+        return []
+    finally:
+        os.remove(path)
+
+    for finding in findings:
+        finding["artifact"] = truncate_bytes(relative_path, MAX_ARTIFACT_BYTES)
+    return findings
+
+
+async def extract_findings(job_name: str, build_number: int, controller: Optional[str] = None) -> bool:
+    """Download, parse and store the findings of a build, returning False on failure"""
+    artifacts = await jenkins_scheduler.run(
+        _PRIORITY, _CLIENT, jenkins_client.list_artifacts, job_name, build_number, controller=controller
+    )
+    if artifacts is None:
+        return False
+    reports = report_artifacts(artifacts)
+    if not reports:
+        return True
+
+    with tempfile.TemporaryDirectory(prefix="scan-findings-") as directory:
+        parsed = await asyncio.gather(*(
+            _parse_artifact(job_name, build_number, relative_path, os.path.join(directory, f"{n}.json"), controller)
+            for n, relative_path in enumerate(reports)
+        ))
+
+    findings = [finding for artifact_findings in parsed for finding in artifact_findings]
+    if len(findings) > settings.findings_max_per_build:
+        logger.warning(f"{job_name}#{build_number} has {len(findings)} findings, "
+                       f"keeping the {settings.findings_max_per_build} most severe")
+        findings.sort(key=lambda finding: SEVERITIES.index(finding["severity"]))
+        findings = findings[:settings.findings_max_per_build]
+
+    logger.info(f"Extracted {len(findings)} findings from {len(reports)} artifacts of {job_name}#{build_number}")
+    return await db_manager.store_scan_findings(job_name, build_number, findings)
+
+
+async def extract_findings_safely(job_name: str, build_number: int, controller: Optional[str] = None) -> None:
+    """extract_findings for a background task, where exceptions would go unnoticed"""
+    try:
+        if not await extract_findings(job_name, build_number, controller):
+            logger.error(f"Failed to extract findings for {job_name}#{build_number}")
+    except Exception as e:
+        logger.error(f"Error extracting findings for {job_name}#{build_number}: {e}")
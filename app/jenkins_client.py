@@ -1,8 +1,12 @@
 import requests
 import logging
-from typing import Dict, Optional, Any
+import threading
+import time
+from fnmatch import fnmatchcase
+from typing import Dict, Optional, Any, Iterator, List, Collection, BinaryIO, Tuple
+from urllib.parse import quote
 from datetime import datetime
-from .config import settings
+from .config import settings, JenkinsControllerSettings
 
 logger = logging.getLogger(__name__)
 # Ensure this logger can show debug messages
@@ -10,20 +14,22 @@ logger.setLevel(logging.DEBUG)
 
 
 class JenkinsClient:
-    """Jenkins API client for triggering jobs and getting status"""
+    """Jenkins API client for one controller: triggering jobs and getting status"""
     
-    def __init__(self):
-        self.base_url = settings.jenkins_url.rstrip('/')
+    def __init__(self, controller: Optional[JenkinsControllerSettings] = None):
+        controller = controller or settings.jenkins_controller_settings()[0]
+        self.name = controller.name
+        self.base_url = controller.url.rstrip('/')
+        self.token = controller.token
         self.auth = None
-        logger.info(f"Using base URL: {self.base_url}")
-        logger.debug(f"Using username: {settings.jenkins_username} and token: {settings.jenkins_token}")
+        logger.info(f"Using base URL for controller {self.name}: {self.base_url}")
         # Setup authentication if credentials provided
-        if settings.jenkins_username and settings.jenkins_token:
-            logger.debug(f"Using username: {settings.jenkins_username} and token: {settings.jenkins_token}")
-            self.auth = (settings.jenkins_username, settings.jenkins_token)
-        elif settings.jenkins_username and settings.jenkins_password:
-            logger.debug(f"Using username: {settings.jenkins_username} and password: {settings.jenkins_password}")
-            self.auth = (settings.jenkins_username, settings.jenkins_password)
+        if controller.username and controller.token:
+            logger.debug(f"Using username: {controller.username} and token: {controller.token[:8]}...")
+            self.auth = (controller.username, controller.token)
+        elif controller.username and controller.password:
+            logger.debug(f"Using username: {controller.username} and password")
+            self.auth = (controller.username, controller.password)
     
     def trigger_job(self, job_name: str, parameters: Dict[str, str]) -> Optional[Dict[str, Any]]:
         """Trigger a Jenkins job with parameters"""
@@ -35,9 +41,9 @@ class JenkinsClient:
             data = parameters.copy()
             
             # Add token from config
-            data['token'] = settings.jenkins_token
-            logger.info(f"Using data: {data}")
-            logger.debug(f"Using config token: {settings.jenkins_token[:8]}...")
+            data['token'] = self.token
+            logger.info(f"Using parameters: {parameters}")
+            logger.debug(f"Using config token: {self.token[:8]}...")
             
             # Make the request
             response = requests.post(
@@ -57,7 +63,8 @@ class JenkinsClient:
                         "status": "triggered",
                         "job_name": job_name,
                         "build_number": build_number,
-                        "jenkins_url": f"{self.base_url}/job/{job_name}/{build_number}"
+                        "jenkins_url": f"{self.base_url}/job/{job_name}/{build_number}",
+                        "controller": self.name
                     }
                 else:
                     logger.error("Could not extract build number from response")
@@ -153,6 +160,73 @@ class JenkinsClient:
             logger.error(f"Error getting build logs: {e}")
             return None
     
+    def stream_build_log_lines(self, job_name: str, build_number: int) -> Optional[Iterator[str]]:
+        """Stream build log lines without loading the whole log into memory
+
+        Lines are split like ``logs.split('\\n')``. Close the returned
+        iterator if it is not consumed to the end.
+        """
+        try:
+            log_url = f"{self.base_url}/job/{job_name}/{build_number}/consoleText"
+            
+            response = requests.get(
+                log_url,
+                auth=self.auth,
+                timeout=30,
+                stream=True
+            )
+            
+            if response.status_code != 200:
+                logger.error(f"Failed to get build logs: {response.status_code}")
+                response.close()
+                return None
+            
+            return self._iter_response_lines(response)
+                
+        except Exception as e:
+            logger.error(f"Error getting build logs: {e}")
+            return None
+    
+    def fetch_progressive_log(self, job_name: str, build_number: int, start: int,
+                              destination: BinaryIO) -> Optional[Tuple[int, bool]]:
+        """Stream the log from byte offset start into a file
+
+        Returns the offset to continue from and whether the build is still
+        writing to its log, or None on failure.
+        """
+        try:
+            with requests.get(
+                f"{self.base_url}/job/{job_name}/{build_number}/logText/progressiveText",
+                params={"start": start},
+                auth=self.auth,
+                timeout=30,
+                stream=True
+            ) as response:
+                if response.status_code != 200:
+                    logger.error(f"Failed to get progressive log: {response.status_code}")
+                    return None
+                
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    destination.write(chunk)
+                return int(response.headers.get("X-Text-Size", start)), response.headers.get("X-More-Data") == "true"
+            
+        except Exception as e:
+            logger.error(f"Error getting progressive log: {e}")
+            return None
+    
+    def _iter_response_lines(self, response) -> Iterator[str]:
+        """Yield lines of a streamed text response, closing it when done"""
+        try:
+            response.encoding = response.encoding or "utf-8"
+            pending = ""
+            for chunk in response.iter_content(chunk_size=64 * 1024, decode_unicode=True):
+                pending += chunk
+                *lines, pending = pending.split("\n")
+                yield from lines
+            yield pending
+        finally:
+            response.close()
+    
     def _extract_build_number(self, location_header: str) -> Optional[int]:
         """Extract build number from Location header"""
         try:
@@ -165,6 +239,133 @@ class JenkinsClient:
             pass
         return None
     
+    # Only the fields the job catalog needs, so listing hundreds of jobs stays cheap
+    _JOB_TREE = (
+        "name,buildable,"
+        "property[parameterDefinitions[name,type,description,choices,defaultParameterValue[value]]]"
+    )
+    
+    def get_jobs(self) -> Optional[List[Dict[str, Any]]]:
+        """Get all top-level jobs with their parameter definitions"""
+        try:
+            response = requests.get(
+                f"{self.base_url}/api/json",
+                params={"tree": f"jobs[{self._JOB_TREE}]"},
+                auth=self.auth,
+                timeout=30
+            )
+            if response.status_code != 200:
+                logger.error(f"Failed to list jobs on {self.name}: {response.status_code}")
+                return None
+            return response.json().get("jobs", [])
+            
+        except Exception as e:
+            logger.error(f"Error listing jobs on {self.name}: {e}")
+            return None
+    
+    def get_job(self, job_name: str) -> Optional[Dict[str, Any]]:
+        """Get one job with its parameter definitions, or None if it doesn't exist"""
+        try:
+            response = requests.get(
+                f"{self.base_url}/job/{job_name}/api/json",
+                params={"tree": self._JOB_TREE},
+                auth=self.auth,
+                timeout=10
+            )
+            if response.status_code != 200:
+                return None
+            return response.json()
+            
+        except Exception as e:
+            logger.error(f"Error getting job {job_name} on {self.name}: {e}")
+            return None
+    
+    def list_artifacts(self, job_name: str, build_number: int) -> Optional[List[str]]:
+        """Get the relative paths of a build's archived artifacts"""
+        try:
+            response = requests.get(
+                f"{self.base_url}/job/{job_name}/{build_number}/api/json",
+                params={"tree": "artifacts[relativePath]"},
+                auth=self.auth,
+                timeout=30
+            )
+            if response.status_code != 200:
+                logger.error(f"Failed to list artifacts: {response.status_code}")
+                return None
+            return [artifact["relativePath"] for artifact in response.json().get("artifacts", [])]
+            
+        except Exception as e:
+            logger.error(f"Error listing artifacts: {e}")
+            return None
+    
+    def download_artifact(self, job_name: str, build_number: int, relative_path: str,
+                          destination: BinaryIO, max_bytes: int) -> bool:
+        """Stream an artifact into a file, giving up if it is larger than max_bytes"""
+        try:
+            with requests.get(
+                f"{self.base_url}/job/{job_name}/{build_number}/artifact/{quote(relative_path)}",
+                auth=self.auth,
+                timeout=30,
+                stream=True
+            ) as response:
+                if response.status_code != 200:
+                    logger.error(f"Failed to download artifact {relative_path}: {response.status_code}")
+                    return False
+                
+                size = 0
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    size += len(chunk)
+                    if size > max_bytes:
+                        logger.warning(f"Artifact {relative_path} exceeds {max_bytes} bytes, skipped")
+                        return False
+                    destination.write(chunk)
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error downloading artifact {relative_path}: {e}")
+            return False
+    
+    def build_exists(self, job_name: str, build_number: int) -> bool:
+        """Check whether this controller has the given build"""
+        try:
+            response = requests.get(
+                f"{self.base_url}/job/{job_name}/{build_number}/api/json?tree=number",
+                auth=self.auth,
+                timeout=10
+            )
+            return response.status_code == 200
+        except Exception as e:
+            logger.error(f"Error checking build on {self.name}: {e}")
+            return False
+    
+    def get_load(self) -> Optional[Dict[str, int]]:
+        """Get queue length and executor usage of this controller"""
+        try:
+            queue = requests.get(
+                f"{self.base_url}/queue/api/json?tree=items[id]",
+                auth=self.auth,
+                timeout=10
+            )
+            computers = requests.get(
+                f"{self.base_url}/computer/api/json?tree=busyExecutors,totalExecutors",
+                auth=self.auth,
+                timeout=10
+            )
+            if queue.status_code != 200 or computers.status_code != 200:
+                logger.error(f"Failed to get load of {self.name}: {queue.status_code}/{computers.status_code}")
+                return None
+            
+            executors = computers.json()
+            return {
+                "queued": len(queue.json().get("items", [])),
+                "busy_executors": executors.get("busyExecutors", 0),
+                "total_executors": executors.get("totalExecutors", 0)
+            }
+            
+        except Exception as e:
+            logger.error(f"Error getting load of {self.name}: {e}")
+            return None
+    
     def test_connection(self) -> bool:
         """Test Jenkins connection"""
         try:
@@ -179,5 +380,140 @@ class JenkinsClient:
             return False
 
 
-# Global Jenkins client instance
-jenkins_client = JenkinsClient() 
\ No newline at end of file
+class JenkinsControllerRegistry:
+    """Routes Jenkins calls across one or more controllers
+
+    Triggers go to the least loaded controller among those whose ``jobs``
+    patterns match the job (controllers without patterns take any job not
+    claimed by a pattern). Load is the queued plus running builds over the
+    controller's capacity, from queue/executor counts cached for
+    ``jenkins_load_cache_seconds`` and bumped locally on every trigger.
+
+    Build lookups take the owning controller's name; without it the job's
+    only candidate is used, or candidates are probed for the build.
+    """
+    
+    def __init__(self, controllers: List[JenkinsControllerSettings]):
+        self.settings = {controller.name: controller for controller in controllers}
+        self.controllers = {controller.name: JenkinsClient(controller) for controller in controllers}
+        self._load: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, name: str) -> Optional[JenkinsClient]:
+        """Get a controller client by name"""
+        return self.controllers.get(name)
+    
+    def candidates(self, job_name: str) -> List[JenkinsClient]:
+        """Controllers that may run a job, per the routing rules"""
+        matched = [
+            self.controllers[name] for name, controller in self.settings.items()
+            if any(fnmatchcase(job_name, pattern) for pattern in controller.jobs)
+        ]
+        if matched:
+            return matched
+        return [self.controllers[name] for name, controller in self.settings.items() if not controller.jobs]
+    
+    def _load_score(self, client: JenkinsClient) -> Optional[float]:
+        """Fraction of capacity in use, or None if the controller is unreachable"""
+        with self._lock:
+            fetched_at, load, pending = self._load.get(client.name, (0.0, None, 0))
+        
+        if time.monotonic() - fetched_at > settings.jenkins_load_cache_seconds:
+            load, pending = client.get_load(), 0
+            with self._lock:
+                self._load[client.name] = (time.monotonic(), load, pending)
+        
+        if load is None:
+            return None
+        capacity = self.settings[client.name].capacity or load["total_executors"] or 1
+        return (load["queued"] + load["busy_executors"] + pending) / capacity
+    
+    def select_controller(self, job_name: str, controllers: Optional[Collection[str]] = None) -> Optional[JenkinsClient]:
+        """Pick the least loaded controller for a new build of a job, optionally among the named controllers"""
+        candidates = self.candidates(job_name)
+        if controllers is not None:
+            candidates = [client for client in candidates if client.name in controllers]
+        if len(candidates) <= 1:
+            return candidates[0] if candidates else None
+        
+        scored = [(self._load_score(client), index, client) for index, client in enumerate(candidates)]
+        available = [entry for entry in scored if entry[0] is not None]
+        if not available:
+            logger.warning(f"No load data for controllers of {job_name}, using {candidates[0].name}")
+            return candidates[0]
+        return min(available)[2]
+    
+    def _record_trigger(self, name: str):
+        """Count a triggered build against the cached load until the next refresh"""
+        with self._lock:
+            fetched_at, load, pending = self._load.get(name, (0.0, None, 0))
+            self._load[name] = (fetched_at, load, pending + 1)
+    
+    def resolve(self, job_name: str, build_number: int, controller: Optional[str] = None) -> Optional[JenkinsClient]:
+        """Find the controller owning a build"""
+        if controller:
+            return self.get(controller)
+        candidates = self.candidates(job_name)
+        if len(candidates) <= 1:
+            return candidates[0] if candidates else None
+        for client in candidates:
+            if client.build_exists(job_name, build_number):
+                return client
+        return None
+    
+    def trigger_job(self, job_name: str, parameters: Dict[str, str],
+                    controllers: Optional[Collection[str]] = None) -> Optional[Dict[str, Any]]:
+        """Trigger a job on the least loaded controller routed for it"""
+        client = self.select_controller(job_name, controllers)
+        if client is None:
+            logger.error(f"No Jenkins controller is routed for job {job_name}")
+            return None
+        
+        logger.info(f"Routing {job_name} to controller {client.name}")
+        result = client.trigger_job(job_name, parameters)
+        if result:
+            self._record_trigger(client.name)
+        return result
+    
+    def get_build_status(self, job_name: str, build_number: int, controller: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Get the status of a specific build"""
+        client = self.resolve(job_name, build_number, controller)
+        return client.get_build_status(job_name, build_number) if client else None
+    
+    def get_build_logs(self, job_name: str, build_number: int, tail: Optional[int] = None,
+                       controller: Optional[str] = None) -> Optional[str]:
+        """Get build logs"""
+        client = self.resolve(job_name, build_number, controller)
+        return client.get_build_logs(job_name, build_number, tail) if client else None
+    
+    def stream_build_log_lines(self, job_name: str, build_number: int,
+                               controller: Optional[str] = None) -> Optional[Iterator[str]]:
+        """Stream build log lines"""
+        client = self.resolve(job_name, build_number, controller)
+        return client.stream_build_log_lines(job_name, build_number) if client else None
+    
+    def fetch_progressive_log(self, job_name: str, build_number: int, start: int, destination: BinaryIO,
+                              controller: Optional[str] = None) -> Optional[Tuple[int, bool]]:
+        """Stream the log from byte offset start into a file"""
+        client = self.resolve(job_name, build_number, controller)
+        return client.fetch_progressive_log(job_name, build_number, start, destination) if client else None
+    
+    def list_artifacts(self, job_name: str, build_number: int,
+                       controller: Optional[str] = None) -> Optional[List[str]]:
+        """Get the relative paths of a build's archived artifacts"""
+        client = self.resolve(job_name, build_number, controller)
+        return client.list_artifacts(job_name, build_number) if client else None
+    
+    def download_artifact(self, job_name: str, build_number: int, relative_path: str,
+                          destination: BinaryIO, max_bytes: int, controller: Optional[str] = None) -> bool:
+        """Stream an artifact into a file"""
+        client = self.resolve(job_name, build_number, controller)
+        return client.download_artifact(job_name, build_number, relative_path, destination, max_bytes) if client else False
+    
+    def test_connection(self) -> bool:
+        """Test connections to all controllers"""
+        return all([client.test_connection() for client in self.controllers.values()])
+
+
+# Global Jenkins client, routing across the configured controllers
+jenkins_client = JenkinsControllerRegistry(settings.jenkins_controller_settings())
\ No newline at end of file
@@ -0,0 +1,250 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from .caching import make_etag
+from .config import settings
+from .jenkins_client import JenkinsControllerRegistry, jenkins_client
+from .serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+# Unknown job names remembered between lookups; clients can send any name
+MAX_REMEMBERED_MISSES = 1000
+
+
+class JobValidationError(ValueError):
+    """Raised when a trigger request doesn't match the job's definition"""
+
+
+class UnknownJobError(JobValidationError):
+    """Raised when no controller routed for the job has it"""
+
+
+@dataclass(frozen=True)
+class ParameterDefinition:
+    """A Jenkins job parameter, as declared in the job's configuration"""
+
+    name: str
+    type: str
+    required: bool
+    default: Optional[str] = None
+    choices: Tuple[str, ...] = ()
+    description: Optional[str] = None
+
+    def check(self, value: str) -> Optional[str]:
+        """Error message for an invalid value, or None"""
+        if self.type == "ChoiceParameterDefinition" and self.choices and value not in self.choices:
+            return f"Invalid value for {self.name}: must be one of {', '.join(self.choices)}"
+        if self.type == "BooleanParameterDefinition" and value.lower() not in ("true", "false"):
+            return f"Invalid value for {self.name}: must be true or false"
+        return None
+
+
+@dataclass(frozen=True)
+class JobDefinition:
+    """A Jenkins job and its parameters"""
+
+    name: str
+    buildable: bool
+    parameters: Tuple[ParameterDefinition, ...] = field(default=())
+
+    def validate(self, parameters: Dict[str, str]) -> List[str]:
+        """Error messages for a trigger of this job with the given parameters"""
+        if not self.buildable:
+            return [f"Job {self.name} is disabled"]
+
+        definitions = {parameter.name: parameter for parameter in self.parameters}
+        errors = [f"Unknown parameter: {name}" for name in parameters if name not in definitions]
+        for definition in self.parameters:
+            if definition.name not in parameters:
+                if definition.required:
+                    errors.append(f"Missing required parameter: {definition.name}")
+                continue
+            error = definition.check(parameters[definition.name])
+            if error:
+                errors.append(error)
+        return errors
+
+
+def _default_value(raw: Optional[Dict[str, Any]]) -> Optional[str]:
+    value = (raw or {}).get("value")
+    if isinstance(value, bool):
+        return str(value).lower()
+    return None if value is None else str(value)
+
+
+def parse_job(raw: Dict[str, Any]) -> JobDefinition:
+    """Build a JobDefinition from a job in Jenkins' JSON API"""
+    parameters = []
+    for prop in raw.get("property") or []:
+        for definition in prop.get("parameterDefinitions") or []:
+            parameters.append(ParameterDefinition(
+                name=definition["name"],
+                type=definition.get("type", ""),
+                # Jenkins falls back to the default for omitted parameters
+                required=definition.get("defaultParameterValue") is None,
+                default=_default_value(definition.get("defaultParameterValue")),
+                choices=tuple(definition.get("choices") or ()),
+                description=definition.get("description") or None
+            ))
+    return JobDefinition(name=raw["name"], buildable=raw.get("buildable", True), parameters=tuple(parameters))
+
+
+class JobCatalog:
+    """In-memory catalog of Jenkins jobs and their parameter definitions
+
+    The catalog is refreshed in the background with one tree-limited
+    request per controller. Trigger requests are validated against it
+    without calling Jenkins; a job missing from the catalog is looked up
+    individually (at most once per refresh interval, for the most recent
+    MAX_REMEMBERED_MISSES names) in case it was created since the last refresh. Until the first refresh succeeds nothing is
+    rejected.
+    """
+
+    def __init__(self, registry: JenkinsControllerRegistry):
+        self.registry = registry
+        self._jobs: Dict[str, Dict[str, JobDefinition]] = {}
+        # Job name -> when it was last looked up in vain, oldest first
+        self._misses: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.version = 0
+        self._listing: Optional[Tuple[Dict[str, Dict[str, JobDefinition]], str, Dict[str, Any]]] = None
+
+    @property
+    def loaded(self) -> bool:
+        return bool(self._jobs)
+
+    def refresh(self) -> bool:
+        """Reload job definitions from every controller, keeping the last good copy on failure"""
+        fetched = {}
+        for name, client in self.registry.controllers.items():
+            jobs = client.get_jobs()
+            if jobs is None:
+                logger.warning(f"Keeping cached job catalog for controller {name}")
+                continue
+            fetched[name] = {job.name: job for job in map(parse_job, jobs)}
+
+        with self._lock:
+            changed = {name: jobs for name, jobs in fetched.items() if self._jobs.get(name) != jobs}
+            if changed:
+                self._jobs = {**self._jobs, **changed}
+                self._misses = OrderedDict()
+                self.version += 1
+                logger.info(f"Job catalog updated from {', '.join(changed)}")
+        return bool(fetched)
+
+    def refresh_job(self, job_name: str) -> bool:
+        """Look up one job not in the catalog on its candidate controllers, returning whether it was found"""
+        with self._lock:
+            missed_at = self._misses.get(job_name)
+        if missed_at is not None and time.monotonic() - missed_at < settings.job_catalog_refresh_seconds:
+            return False
+
+        found = {}
+        for client in self.registry.candidates(job_name):
+            raw = client.get_job(job_name)
+            if raw is not None:
+                found[client.name] = parse_job(raw)
+
+        with self._lock:
+            if not found:
+                self._remember_miss(job_name, time.monotonic())
+                return False
+            jobs = dict(self._jobs)
+            for name, job in found.items():
+                jobs[name] = {**jobs.get(name, {}), job.name: job}
+            self._jobs = jobs
+            self.version += 1
+        return True
+
+    def _remember_miss(self, job_name: str, now: float) -> None:
+        """Record a failed lookup, forgetting expired and least recent misses beyond the cap"""
+        self._misses[job_name] = now
+        self._misses.move_to_end(job_name)
+        while self._misses:
+            oldest_name, oldest_at = next(iter(self._misses.items()))
+            if len(self._misses) <= MAX_REMEMBERED_MISSES and now - oldest_at < settings.job_catalog_refresh_seconds:
+                break
+            del self._misses[oldest_name]
+
+    def controllers_for(self, job_name: str) -> Optional[List[str]]:
+        """Candidate controllers that have the job, or None if the catalog can't tell"""
+        if not self.loaded:
+            return None
+        return [client.name for client in self.registry.candidates(job_name)
+                if job_name in self._jobs.get(client.name, {})]
+
+    def get(self, job_name: str) -> Optional[JobDefinition]:
+        """Definition of a job on the first candidate controller that has it"""
+        for name in self.controllers_for(job_name) or ():
+            return self._jobs[name][job_name]
+        return None
+
+    def validate(self, job_name: str, parameters: Dict[str, str]) -> None:
+        """Check a trigger request against the catalog
+
+        Raises UnknownJobError if no candidate controller has the job and
+        JobValidationError if the parameters don't match its definition.
+        """
+        if not self.loaded:
+            return
+        job = self.get(job_name)
+        if job is None:
+            raise UnknownJobError(f"Unknown job: {job_name}")
+        errors = job.validate(parameters)
+        if errors:
+            raise JobValidationError("; ".join(errors))
+
+    def listing(self) -> Tuple[str, Dict[str, Any]]:
+        """ETag and response body of the job listing, rebuilt only when the catalog changes"""
+        # Every change replaces self._jobs, so its identity marks the listing's freshness
+        snapshot, listing = self._jobs, self._listing
+        if listing is not None and listing[0] is snapshot:
+            return listing[1], listing[2]
+
+        jobs: Dict[str, Dict[str, Any]] = {}
+        for controller, definitions in snapshot.items():
+            for job in definitions.values():
+                entry = jobs.get(job.name)
+                if entry is not None:
+                    entry["controllers"].append(controller)
+                    continue
+                jobs[job.name] = {
+                    "name": job.name,
+                    "buildable": job.buildable,
+                    "controllers": [controller],
+                    "parameters": [
+                        {
+                            "name": parameter.name,
+                            "type": parameter.type,
+                            "required": parameter.required,
+                            "default": parameter.default,
+                            "choices": list(parameter.choices),
+                            "description": parameter.description
+                        }
+                        for parameter in job.parameters
+                    ]
+                }
+        body = {"jobs": [jobs[name] for name in sorted(jobs)]}
+        # Derived from the content so every worker process agrees on it
+        etag = make_etag("jobs", dumps(body))
+        self._listing = (snapshot, etag, body)
+        return etag, body
+
+    async def run(self):
+        """Refresh the catalog every job_catalog_refresh_seconds until cancelled"""
+        while True:
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                logger.error(f"Job catalog refresh failed: {e}")
+            await asyncio.sleep(settings.job_catalog_refresh_seconds)
+
+
+# Global job catalog
+job_catalog = JobCatalog(jenkins_client)
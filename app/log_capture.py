@@ -0,0 +1,176 @@
+"""
+Incremental capture of build logs while builds run.
+
+Each build log read through the API appends only the bytes Jenkins wrote
+since the previous read (via progressiveText offsets) to a spool file in
+LOG_CAPTURE_DIR, and the log is served from that file. When the build's
+callback arrives only the remaining tail is fetched. A build still logging
+when it calls back (e.g. post-build steps) keeps being read from its spool
+file until Jenkins reports the log complete; the spool file is removed once
+the complete log is stored, after which the stored log is served instead.
+
+The spool file's size is the offset to continue from. Spool files are kept
+per owning controller, whether or not a read names it. Worker processes
+share the directory and lock a spool file while extending and reading it.
+"""
+
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, Optional, Tuple
+from urllib.parse import quote
+
+from .config import settings
+from .jenkins_client import jenkins_client
+
+try:
+    import fcntl
+except ImportError:  # Windows has no flock; concurrent captures of one build aren't serialized
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+def _lock(spool: BinaryIO) -> None:
+    if fcntl is not None:
+        fcntl.flock(spool, fcntl.LOCK_EX)
+
+
+def tail_lines(logs: str, tail: Optional[int]) -> str:
+    """The last tail lines of a log, or all of it"""
+    if tail:
+        return '\n'.join(logs.split('\n')[-tail:])
+    return logs
+
+
+class LogCapture:
+    """Spool files of build logs, extended from Jenkins by byte offset"""
+
+    @property
+    def enabled(self) -> bool:
+        return bool(settings.log_capture_dir)
+
+    def path(self, job_name: str, build_number: int, controller: str) -> str:
+        """Spool file of a build on the named controller"""
+        # Build numbers are per controller; job names may contain folders
+        return os.path.join(
+            settings.log_capture_dir, quote(controller, safe=""), quote(job_name, safe=""), f"{build_number}.log"
+        )
+
+    def _controller(self, job_name: str, build_number: int, controller: Optional[str]) -> Optional[str]:
+        """The controller owning a build, so reads that do and don't name it share a spool file"""
+        if controller:
+            return controller
+        client = jenkins_client.resolve(job_name, build_number)
+        return client.name if client else None
+
+    def _extend(self, spool: BinaryIO, job_name: str, build_number: int, controller: str) -> Optional[bool]:
+        """Append what Jenkins logged since the last capture to a locked spool file"""
+        start = spool.seek(0, os.SEEK_END)
+        offset = start
+        while True:
+            progress = jenkins_client.fetch_progressive_log(
+                job_name, build_number, offset, spool, controller=controller
+            )
+            if progress is None:
+                spool.truncate(offset)
+                return None
+
+            next_offset, more_data = progress
+            if spool.tell() == next_offset:
+                break
+            if offset == 0:
+                spool.truncate(0)
+                return None
+            # Jenkins' log doesn't continue the captured one; capture it again from the start
+            logger.warning(f"Captured log of {job_name}#{build_number} is out of sync at {spool.tell()}, "
+                           f"Jenkins is at {next_offset}; capturing it again")
+            offset = spool.truncate(0)
+            spool.seek(0)
+
+        if next_offset != start:
+            logger.debug(f"Captured {next_offset - start} log bytes of {job_name}#{build_number}")
+        return not more_data
+
+    @contextmanager
+    def _spool(self, job_name: str, build_number: int, controller: str) -> Iterator[BinaryIO]:
+        """A build's spool file, locked, positioned for reading from the start"""
+        path = self.path(job_name, build_number, controller)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a+b") as spool:
+            _lock(spool)
+            yield spool
+
+    def update(self, job_name: str, build_number: int, controller: Optional[str] = None) -> Optional[bool]:
+        """Append what Jenkins logged since the last capture, returning whether the log is complete
+
+        Returns None if Jenkins couldn't be read.
+        """
+        controller = self._controller(job_name, build_number, controller)
+        if controller is None:
+            return None
+        with self._spool(job_name, build_number, controller) as spool:
+            return self._extend(spool, job_name, build_number, controller)
+
+    def capture(self, job_name: str, build_number: int,
+                controller: Optional[str] = None) -> Optional[Tuple[str, bool]]:
+        """Bring the captured log up to date, returning it and whether it is complete
+
+        Returns None if Jenkins couldn't be read.
+        """
+        controller = self._controller(job_name, build_number, controller)
+        if controller is None:
+            return None
+        # Read under the lock, so a concurrent capture starting over can't truncate the log mid-read
+        with self._spool(job_name, build_number, controller) as spool:
+            complete = self._extend(spool, job_name, build_number, controller)
+            if complete is None:
+                return None
+            spool.seek(0)
+            return spool.read().decode("utf-8", errors="replace"), complete
+
+    def read(self, job_name: str, build_number: int, tail: Optional[int] = None,
+             controller: Optional[str] = None) -> Optional[str]:
+        """Bring the captured log up to date and return it, or None if Jenkins couldn't be read"""
+        captured = self.capture(job_name, build_number, controller)
+        return tail_lines(captured[0], tail) if captured else None
+
+    def capturing(self, job_name: str, build_number: int, controller: Optional[str] = None) -> bool:
+        """Whether a build's log is being captured, i.e. it wasn't stored complete yet"""
+        controller = self._controller(job_name, build_number, controller)
+        return controller is not None and os.path.exists(self.path(job_name, build_number, controller))
+
+    def discard(self, job_name: str, build_number: int, controller: Optional[str] = None) -> None:
+        """Remove a build's spool file once its complete log is stored"""
+        controller = self._controller(job_name, build_number, controller)
+        if controller is None:
+            return
+        try:
+            os.remove(self.path(job_name, build_number, controller))
+        except FileNotFoundError:
+            pass
+
+    def prune(self, max_age_seconds: float, now: Optional[float] = None) -> int:
+        """Remove spool files not extended for max_age_seconds, returning how many were removed"""
+        now = time.time() if now is None else now
+        removed = 0
+        for directory, _, files in os.walk(settings.log_capture_dir, topdown=False):
+            for name in files:
+                path = os.path.join(directory, name)
+                try:
+                    if now - os.path.getmtime(path) > max_age_seconds:
+                        os.remove(path)
+                        removed += 1
+                except FileNotFoundError:
+                    pass
+            if directory != settings.log_capture_dir:
+                try:
+                    os.rmdir(directory)
+                except OSError:  # not empty
+                    pass
+        return removed
+
+
+# Global log capture
+log_capture = LogCapture()
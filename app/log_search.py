@@ -0,0 +1,125 @@
+import time
+from collections import deque
+from typing import Callable, Dict, Any, Iterable, Iterator, Optional
+
+import regex
+
+# Longest pattern accepted from a client
+MAX_PATTERN_LENGTH = 1000
+
+
+class LogSearchError(ValueError):
+    """Raised for an invalid search pattern"""
+
+
+def split_lines(text: str) -> Iterator[str]:
+    """Yield the lines of text one by one, like text.split('\\n')"""
+    start = 0
+    while True:
+        end = text.find("\n", start)
+        if end == -1:
+            yield text[start:]
+            return
+        yield text[start:end]
+        start = end + 1
+
+
+def build_matcher(pattern: str, use_regex: bool = False, ignore_case: bool = False) -> Callable[[str, float], bool]:
+    """Build a line predicate ``matcher(line, timeout)`` for a search pattern
+
+    Regexes use the ``regex`` module, whose matching can be interrupted
+    after ``timeout`` seconds (raising TimeoutError), so a catastrophically
+    backtracking pattern cannot pin a worker.
+    """
+    if not pattern:
+        raise LogSearchError("Search pattern must not be empty")
+    if len(pattern) > MAX_PATTERN_LENGTH:
+        raise LogSearchError(f"Search pattern longer than {MAX_PATTERN_LENGTH} characters")
+
+    if use_regex:
+        try:
+            compiled = regex.compile(pattern, regex.IGNORECASE if ignore_case else 0)
+        except regex.error as e:
+            raise LogSearchError(f"Invalid regular expression: {e}")
+        return lambda line, timeout: compiled.search(line, timeout=timeout) is not None
+
+    if ignore_case:
+        needle = pattern.casefold()
+        return lambda line, timeout: needle in line.casefold()
+    return lambda line, timeout: pattern in line
+
+
+def search_lines(
+    lines: Iterable[str],
+    matcher: Callable[[str, float], bool],
+    context: int = 0,
+    max_matches: int = 1000,
+    timeout: float = 5.0,
+    max_bytes: int = 256 * 1024 * 1024,
+    max_line_length: int = 10000,
+) -> Dict[str, Any]:
+    """Scan lines once, keeping only matches and their context lines
+
+    Stops early, flagging the result as truncated, when ``max_matches`` is
+    reached, ``timeout`` seconds have elapsed or more than ``max_bytes``
+    (counted as characters including newlines) would be read. Only the
+    first ``max_line_length`` characters of a line are matched and returned;
+    longer lines are flagged as truncated.
+    """
+    deadline = time.monotonic() + timeout
+    before = deque(maxlen=context)
+    output = []
+    match_count = 0
+    bytes_scanned = 0
+    lines_scanned = 0
+    last_emitted = 0
+    after_remaining = 0
+    truncated_reason: Optional[str] = None
+
+    for line_number, line in enumerate(lines, 1):
+        # A line that would exceed the budget is not scanned, so it isn't counted
+        if bytes_scanned + len(line) + 1 > max_bytes:
+            truncated_reason = "max_bytes"
+            break
+        bytes_scanned += len(line) + 1
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            truncated_reason = "timeout"
+            break
+
+        text, cut = line[:max_line_length], len(line) > max_line_length
+        try:
+            matched = matcher(text, remaining)
+        except TimeoutError:
+            truncated_reason = "timeout"
+            break
+        lines_scanned = line_number
+
+        if matched:
+            if match_count >= max_matches:
+                truncated_reason = "max_matches"
+                break
+            for number, context_text, context_cut in before:
+                if number > last_emitted:
+                    output.append(
+                        {"line_number": number, "text": context_text, "match": False, "truncated": context_cut}
+                    )
+            output.append({"line_number": line_number, "text": text, "match": True, "truncated": cut})
+            last_emitted = line_number
+            match_count += 1
+            after_remaining = context
+        elif after_remaining > 0:
+            output.append({"line_number": line_number, "text": text, "match": False, "truncated": cut})
+            last_emitted = line_number
+            after_remaining -= 1
+
+        before.append((line_number, text, cut))
+
+    return {
+        "lines": output,
+        "match_count": match_count,
+        "lines_scanned": lines_scanned,
+        "bytes_scanned": bytes_scanned,
+        "truncated": truncated_reason is not None,
+        "truncated_reason": truncated_reason,
+    }
@@ -1,9 +1,12 @@
+import asyncio
 import logging
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 
 from .config import settings
+from .compression import CompressionMiddleware
 
 # Configure logging FIRST, before importing other modules
 logging.basicConfig(
@@ -25,6 +28,9 @@ logger = logging.getLogger(__name__)
 from .routers import scan
 from .database import db_manager
 from .jenkins_client import jenkins_client
+from .job_catalog import job_catalog
+from . import findings, retention, serving
+from .scheduler import jenkins_scheduler
 
 
 @asynccontextmanager
@@ -35,8 +41,8 @@ async def lifespan(app: FastAPI):
     
     # Test database connection
     try:
-        logger.info("Testing database connection...")
-        # Database connection is established in DatabaseManager.__init__
+        logger.info(f"Testing database connection ({db_manager.name})...")
+        await db_manager.connect()
         logger.info("Database connection successful")
     except Exception as e:
         logger.error(f"Database connection failed: {e}")
@@ -52,11 +58,28 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Jenkins connection test failed: {e}")
     
+    # Keep the job catalog used to validate triggers up to date
+    catalog_task = None
+    if settings.job_catalog_refresh_seconds > 0:
+        catalog_task = asyncio.create_task(job_catalog.run())
+    
+    # Create upcoming partitions and drop expired ones in the background
+    retention_task = None
+    if settings.retention_interval_seconds > 0:
+        retention_task = asyncio.create_task(retention.run())
+    
+    serving.mark_ready()
+    
     yield
     
     # Shutdown
     logger.info("Shutting down CI/CD Scan API Server...")
-    db_manager.close()
+    serving.mark_stopped()
+    for task in (catalog_task, retention_task):
+        if task is not None:
+            task.cancel()
+    findings.shutdown()
+    await db_manager.close()
 
 
 # Create FastAPI application
@@ -76,6 +99,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large responses (logs, result lists) for clients that accept it
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.compression_minimum_size,
+    gzip_level=settings.compression_gzip_level,
+    brotli_quality=settings.compression_brotli_quality,
+)
+
 
 # Include routers
 app.include_router(scan.router)
@@ -124,6 +155,17 @@ async def health_check():
     return health_status
 
 
+@app.get("/health/ready")
+async def readiness_check():
+    """Readiness of the worker serving this request, and of its sibling workers"""
+    state = serving.readiness()
+    # Jenkins calls of this worker in flight and waiting per priority
+    state["jenkins_calls"] = {"active": jenkins_scheduler.active, "waiting": jenkins_scheduler.waiting()}
+    if not state["ready"]:
+        return JSONResponse(status_code=503, content=state)
+    return state
+
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     """Global exception handler"""
@@ -137,5 +179,6 @@ if __name__ == "__main__":
         "app.main:app",
         host=settings.host,
         port=settings.port,
-        reload=settings.debug
+        reload=settings.debug,
+        **serving.uvicorn_options()
     ) 
\ No newline at end of file
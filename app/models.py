@@ -9,12 +9,36 @@ class TriggerRequest(BaseModel):
     parameters: Dict[str, str] = Field(..., description="Job parameters")
 
 
+class JobParameter(BaseModel):
+    """Parameter definition of a Jenkins job"""
+    name: str = Field(..., description="Parameter name")
+    type: str = Field(..., description="Jenkins parameter type, e.g. StringParameterDefinition")
+    required: bool = Field(..., description="Whether the parameter has no default")
+    default: Optional[str] = Field(None, description="Default value")
+    choices: List[str] = Field([], description="Allowed values of a choice parameter")
+    description: Optional[str] = Field(None, description="Parameter description")
+
+
+class JobInfo(BaseModel):
+    """A Jenkins job that can be triggered"""
+    name: str = Field(..., description="Job name")
+    buildable: bool = Field(..., description="False if the job is disabled")
+    controllers: List[str] = Field(..., description="Jenkins controllers with this job")
+    parameters: List[JobParameter] = Field(..., description="Job parameters")
+
+
+class JobListResponse(BaseModel):
+    """Response model for the job catalog"""
+    jobs: List[JobInfo] = Field(..., description="Jobs, ordered by name")
+
+
 class TriggerResponse(BaseModel):
     """Response model for job trigger"""
     status: str = Field(..., description="Trigger status")
     job_name: str = Field(..., description="Job name")
     build_number: int = Field(..., description="Build number")
     jenkins_url: str = Field(..., description="Jenkins build URL")
+    controller: Optional[str] = Field(None, description="Jenkins controller running the build")
 
 
 class StatusResponse(BaseModel):
@@ -30,6 +54,25 @@ class LogResponse(BaseModel):
     lines: List[str] = Field(..., description="Log lines")
 
 
+class LogSearchLine(BaseModel):
+    """A matching log line or one of its context lines"""
+    line_number: int = Field(..., description="1-based line number in the log")
+    text: str = Field(..., description="Line text")
+    match: bool = Field(..., description="Whether the line matched (False for context lines)")
+    truncated: bool = Field(False, description="Whether the text was cut at log_search_max_line_length")
+
+
+class LogSearchResponse(BaseModel):
+    """Response model for a server-side log search"""
+    source: str = Field(..., description="Where the log was read from", enum=["stored", "jenkins"])
+    lines: List[LogSearchLine] = Field(..., description="Matching lines with context, in log order")
+    match_count: int = Field(..., description="Number of matching lines returned")
+    lines_scanned: int = Field(..., description="Number of log lines searched")
+    bytes_scanned: int = Field(..., description="Approximate number of bytes read")
+    truncated: bool = Field(..., description="Whether the search stopped before the end of the log")
+    truncated_reason: Optional[str] = Field(None, description="Budget that stopped the search", enum=["max_matches", "timeout", "max_bytes"])
+
+
 class CallbackRequest(BaseModel):
     """Request model for Jenkins callback"""
     job_name: str = Field(..., description="Job name")
@@ -37,6 +80,7 @@ class CallbackRequest(BaseModel):
     status: str = Field(..., description="Build status", enum=["SUCCESS", "FAILURE"])
     results: Dict[str, str] = Field(..., description="Scan results")
     timestamp: Optional[datetime] = Field(None, description="Callback timestamp")
+    controller: Optional[str] = Field(None, description="Jenkins controller that ran the build")
 
 
 class CallbackResponse(BaseModel):
@@ -53,6 +97,44 @@ class ResultResponse(BaseModel):
     timestamp: datetime = Field(..., description="Result timestamp")
 
 
+class ResultListResponse(BaseModel):
+    """Response model for a scan result query"""
+    results: List[ResultResponse] = Field(..., description="Matching results, newest first")
+
+
+class Finding(BaseModel):
+    """A finding extracted from a build's report artifact"""
+    job_name: str = Field(..., description="Job name")
+    build_number: int = Field(..., description="Build number")
+    artifact: Optional[str] = Field(None, description="Artifact the finding was read from")
+    tool: str = Field(..., description="Tool that reported it")
+    rule_id: str = Field(..., description="Rule or vulnerability id, e.g. a CVE")
+    severity: str = Field(..., description="Normalized severity", enum=["critical", "high", "medium", "low", "info"])
+    component: Optional[str] = Field(None, description="Affected file or package")
+    location: Optional[str] = Field(None, description="Location within the component")
+    message: Optional[str] = Field(None, description="Description")
+
+
+class FindingListResponse(BaseModel):
+    """Response model for findings queries"""
+    findings: List[Finding] = Field(..., description="Matching findings, most severe first")
+
+
+class StatsBucket(BaseModel):
+    """Result counts for one job in one time bucket"""
+    job_name: str = Field(..., description="Job name")
+    bucket_start: datetime = Field(..., description="Start of the time bucket")
+    total: int = Field(..., description="Number of results in the bucket")
+    counts: Dict[str, int] = Field(..., description="Number of results per status")
+    pass_rate: float = Field(..., description="Fraction of results with status SUCCESS")
+
+
+class StatsResponse(BaseModel):
+    """Response model for aggregated scan statistics"""
+    granularity: str = Field(..., description="Bucket size", enum=["hour", "day"])
+    buckets: List[StatsBucket] = Field(..., description="Buckets ordered by time, then job")
+
+
 class ErrorResponse(BaseModel):
     """Error response model"""
     error: str = Field(..., description="Error message")
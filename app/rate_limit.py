@@ -0,0 +1,25 @@
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at rate tokens per second, holding at most burst"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self, now: Optional[float] = None) -> float:
+        """Take a token, returning 0 if one was available or else the seconds until one is"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + max(0.0, now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
@@ -0,0 +1,177 @@
+"""
+Parsers turning scan report artifacts into normalized findings.
+
+Runs in the findings process pool, so it only depends on orjson and the
+standard library. Every finding is a dict with tool, rule_id, severity
+(one of SEVERITIES), component, location and message.
+"""
+
+import os
+from typing import Any, Dict, List, Optional
+
+import orjson
+
+# Normalized severities, most severe first
+SEVERITIES = ("critical", "high", "medium", "low", "info")
+
+# SARIF result levels when no numeric security-severity is given
+_SARIF_LEVELS = {"error": "high", "warning": "medium", "note": "low", "none": "info"}
+
+# Longest values kept per finding, in UTF-8 bytes, so they fit the scan_findings
+# columns (Oracle VARCHAR2 limits count bytes)
+MAX_FIELD_BYTES = {"tool": 255, "rule_id": 255, "component": 1000, "location": 2000, "message": 2000}
+MAX_ARTIFACT_BYTES = 1000
+
+
+class ReportFormatError(ValueError):
+    """Raised when an artifact is not a report format we can parse"""
+
+
+def severity_from_score(score: float) -> str:
+    """Map a CVSS-style 0-10 score to a severity"""
+    if score >= 9.0:
+        return "critical"
+    if score >= 7.0:
+        return "high"
+    if score >= 4.0:
+        return "medium"
+    if score > 0:
+        return "low"
+    return "info"
+
+
+def normalize_severity(value: Optional[str]) -> str:
+    value = (value or "").lower()
+    if value in SEVERITIES:
+        return value
+    if value == "moderate":
+        return "medium"
+    return "info"
+
+
+def truncate_bytes(value: Any, max_bytes: int) -> Optional[str]:
+    """A value as text of at most max_bytes UTF-8 bytes, cut at a character boundary"""
+    if value is None or value == "":
+        return None
+    return str(value).encode("utf-8", errors="replace")[:max_bytes].decode("utf-8", errors="ignore")
+
+
+def _finding(tool, rule_id, severity, component=None, location=None, message=None) -> Dict[str, Any]:
+    return {
+        "tool": truncate_bytes(tool, MAX_FIELD_BYTES["tool"]) or "unknown",
+        "rule_id": truncate_bytes(rule_id, MAX_FIELD_BYTES["rule_id"]) or "unknown",
+        "severity": severity,
+        "component": truncate_bytes(component, MAX_FIELD_BYTES["component"]),
+        "location": truncate_bytes(location, MAX_FIELD_BYTES["location"]),
+        "message": truncate_bytes(message, MAX_FIELD_BYTES["message"]),
+    }
+
+
+def _sarif_rule(driver: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, Any]:
+    rules = driver.get("rules") or []
+    index = result.get("ruleIndex", (result.get("rule") or {}).get("index"))
+    if isinstance(index, int) and 0 <= index < len(rules):
+        return rules[index]
+    rule_id = result.get("ruleId")
+    return next((rule for rule in rules if rule.get("id") == rule_id), {})
+
+
+def _sarif_severity(rule: Dict[str, Any], result: Dict[str, Any]) -> str:
+    # GitHub code scanning convention: a CVSS score in security-severity
+    for properties in (result.get("properties") or {}, rule.get("properties") or {}):
+        score = properties.get("security-severity")
+        if score is not None:
+            try:
+                return severity_from_score(float(score))
+            except (TypeError, ValueError):
+                pass
+    level = result.get("level") or (rule.get("defaultConfiguration") or {}).get("level") or "warning"
+    return _SARIF_LEVELS.get(level, "info")
+
+
+def parse_sarif(report: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Findings from a SARIF 2.1 log"""
+    findings = []
+    for run in report.get("runs") or []:
+        driver = (run.get("tool") or {}).get("driver") or {}
+        for result in run.get("results") or []:
+            rule = _sarif_rule(driver, result)
+            physical = ((result.get("locations") or [{}])[0]).get("physicalLocation") or {}
+            uri = (physical.get("artifactLocation") or {}).get("uri")
+            line = (physical.get("region") or {}).get("startLine")
+            findings.append(_finding(
+                tool=driver.get("name"),
+                rule_id=result.get("ruleId") or rule.get("id"),
+                severity=_sarif_severity(rule, result),
+                component=uri,
+                location=f"{uri}:{line}" if uri and line else uri,
+                message=(result.get("message") or {}).get("text")
+            ))
+    return findings
+
+
+def _cyclonedx_tool(report: Dict[str, Any]) -> Optional[str]:
+    tools = (report.get("metadata") or {}).get("tools") or []
+    if isinstance(tools, dict):  # CycloneDX 1.5 groups tools by kind
+        tools = tools.get("components") or tools.get("services") or []
+    return next((tool.get("name") for tool in tools if tool.get("name")), None)
+
+
+def _cyclonedx_components(components, index: Dict[str, str]) -> Dict[str, str]:
+    for component in components or []:
+        name = component.get("purl") or "@".join(filter(None, (component.get("name"), component.get("version"))))
+        if component.get("bom-ref"):
+            index[component["bom-ref"]] = name
+        _cyclonedx_components(component.get("components"), index)
+    return index
+
+
+def _cyclonedx_severity(vulnerability: Dict[str, Any]) -> str:
+    severities = [normalize_severity(rating.get("severity")) for rating in vulnerability.get("ratings") or []]
+    scores = [rating["score"] for rating in vulnerability.get("ratings") or [] if rating.get("score") is not None]
+    if not any(severity != "info" for severity in severities) and scores:
+        return severity_from_score(max(scores))
+    # The most severe rating wins when sources disagree
+    return min(severities, key=SEVERITIES.index, default="info")
+
+
+def parse_cyclonedx(report: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Findings from the vulnerabilities of a CycloneDX (1.4+) JSON BOM, one per affected component"""
+    tool = _cyclonedx_tool(report)
+    components = _cyclonedx_components(report.get("components"), {})
+    findings = []
+    for vulnerability in report.get("vulnerabilities") or []:
+        severity = _cyclonedx_severity(vulnerability)
+        message = vulnerability.get("description") or vulnerability.get("detail")
+        refs = [affected.get("ref") for affected in vulnerability.get("affects") or []] or [None]
+        for ref in refs:
+            findings.append(_finding(
+                tool=tool,
+                rule_id=vulnerability.get("id"),
+                severity=severity,
+                component=components.get(ref, ref),
+                location=ref,
+                message=message
+            ))
+    return findings
+
+
+def parse_report(report: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Findings from a parsed SARIF or CycloneDX report"""
+    if isinstance(report, dict) and report.get("bomFormat") == "CycloneDX":
+        return parse_cyclonedx(report)
+    if isinstance(report, dict) and "runs" in report and ("sarif" in str(report.get("$schema", "")).lower()
+                                                          or str(report.get("version", "")).startswith("2.")):
+        return parse_sarif(report)
+    raise ReportFormatError("Not a SARIF or CycloneDX JSON report")
+
+
+def parse_report_file(path: str) -> List[Dict[str, Any]]:
+    """Parse a downloaded report artifact; the process pool entry point"""
+    with open(path, "rb") as report_file:
+        data = report_file.read()
+    try:
+        report = orjson.loads(data)
+    except orjson.JSONDecodeError as e:
+        raise ReportFormatError(f"Invalid JSON in {os.path.basename(path)}: {e}")
+    return parse_report(report)
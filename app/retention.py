@@ -0,0 +1,149 @@
+"""
+Apply the retention policy for scan results and logs.
+
+The server applies it every RETENTION_INTERVAL_SECONDS; to apply it once,
+for example from cron when the background task is disabled:
+
+    python -m app.retention
+"""
+
+import asyncio
+import gzip
+import logging
+import os
+import sys
+from datetime import datetime, timedelta
+from typing import Dict, IO, Optional
+
+from . import serialization, serving
+from .config import settings
+from .database import db_manager
+from .log_capture import log_capture
+from .storage.base import month_start
+
+logger = logging.getLogger(__name__)
+
+# Logs read from the database per archive page
+ARCHIVE_PAGE_SIZE = 50
+
+
+def retention_cutoff(now: datetime, days: int) -> datetime:
+    """Month start before which rows are expired, so only whole partitions are removed"""
+    return month_start(now - timedelta(days=days))
+
+
+def _archive_path(directory: str, month: datetime) -> str:
+    return os.path.join(directory, f"scan_logs-{month:%Y-%m}.jsonl.gz")
+
+
+def _write_archive_page(files: Dict[str, IO[bytes]], directory: str, rows) -> None:
+    for row in rows:
+        path = _archive_path(directory, month_start(row["timestamp"]))
+        archive = files.get(path)
+        if archive is None:
+            archive = files[path] = gzip.open(f"{path}.partial", "wb")
+        archive.write(serialization.dumps({
+            "job_name": row["job_name"],
+            "build_number": row["build_number"],
+            "timestamp": row["timestamp"],
+            "log_content": row["log_content"]
+        }).encode())
+        archive.write(b"\n")
+
+
+def _close_archives(files: Dict[str, IO[bytes]], complete: bool) -> None:
+    for path, archive in files.items():
+        archive.close()
+        if complete:
+            os.replace(f"{path}.partial", path)
+        else:
+            os.remove(f"{path}.partial")
+
+
+async def archive_scan_logs(before: datetime, directory: str) -> bool:
+    """Write logs stored before a time to one gzipped JSON lines file per month
+
+    Files are written under a temporary name and only renamed into place
+    once every page was read, so a failed run leaves no partial archive.
+    """
+    os.makedirs(directory, exist_ok=True)
+    files: Dict[str, IO[bytes]] = {}
+    complete = False
+    try:
+        after = None
+        while True:
+            rows = await db_manager.list_scan_logs_before(before, after=after, limit=ARCHIVE_PAGE_SIZE)
+            if rows is None:
+                return False
+            if not rows:
+                break
+            await asyncio.to_thread(_write_archive_page, files, directory, rows)
+            after = (rows[-1]["timestamp"], rows[-1]["id"])
+        complete = True
+        logger.info(f"Archived scan logs before {before} to {len(files)} files in {directory}")
+        return True
+
+    except Exception as e:
+        logger.error(f"Failed to archive scan logs: {e}")
+        return False
+    finally:
+        await asyncio.to_thread(_close_archives, files, complete)
+
+
+async def apply_retention(now: Optional[datetime] = None) -> bool:
+    """Create upcoming partitions and remove expired results, findings and logs"""
+    now = now or datetime.utcnow()
+    ok = await db_manager.maintain_partitions(now)
+
+    if settings.retention_results_days > 0:
+        cutoff = retention_cutoff(now, settings.retention_results_days)
+        # Findings are part of a build's results and expire with them
+        for table in ("scan_results", "scan_findings"):
+            ok = await db_manager.drop_expired(table, cutoff) and ok
+
+    if settings.retention_logs_days > 0:
+        cutoff = retention_cutoff(now, settings.retention_logs_days)
+        # Keep logs in the database until they are safely archived
+        if settings.retention_archive_dir and not await archive_scan_logs(cutoff, settings.retention_archive_dir):
+            return False
+        ok = await db_manager.drop_expired("scan_logs", cutoff) and ok
+
+    # Captured logs of builds whose callback never arrived
+    if log_capture.enabled:
+        removed = await asyncio.to_thread(log_capture.prune, settings.log_capture_max_age_hours * 3600)
+        if removed:
+            logger.info(f"Removed {removed} stale captured logs")
+
+    return ok
+
+
+async def run():
+    """Apply retention every retention_interval_seconds until cancelled
+
+    With several workers only the one holding the maintenance lock applies it.
+    """
+    while True:
+        try:
+            if serving.is_maintenance_worker():
+                await apply_retention()
+        except Exception as e:
+            logger.error(f"Retention run failed: {e}")
+        await asyncio.sleep(settings.retention_interval_seconds)
+
+
+async def apply_once() -> bool:
+    try:
+        await db_manager.connect()
+        return await apply_retention()
+    finally:
+        await db_manager.close()
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    logger.info(f"Applying retention ({db_manager.name})...")
+    sys.exit(0 if asyncio.run(apply_once()) else 1)
+
+
+if __name__ == "__main__":
+    main()
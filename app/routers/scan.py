@@ -1,37 +1,107 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from typing import Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse, PlainTextResponse
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional, List
 import logging
 
 from ..models import (
-    TriggerRequest, TriggerResponse,
-    StatusResponse, LogResponse,
+    TriggerRequest, TriggerResponse, JobListResponse,
+    StatusResponse, LogResponse, LogSearchResponse,
     CallbackRequest, CallbackResponse,
-    ResultResponse, ErrorResponse
+    ResultResponse, ResultListResponse, FindingListResponse,
+    StatsBucket, StatsResponse, ErrorResponse
 )
 from ..auth import get_current_user
+from ..caching import TERMINAL_STATUSES, cache_headers, etag_matches, make_etag
+from ..config import settings
 from ..jenkins_client import jenkins_client
+from ..job_catalog import JobValidationError, UnknownJobError, job_catalog
 from ..database import db_manager
+from ..findings import extract_findings_safely
+from ..log_capture import log_capture, tail_lines
+from ..report_parsers import SEVERITIES
+from ..scheduler import effective_priority, jenkins_scheduler
+from ..storage import ResultFilter
+from ..log_search import LogSearchError, build_matcher, search_lines, split_lines
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/scan", tags=["scan"])
 
 
+async def _build_controller(job_name: str, build_number: int, controller: Optional[str] = None) -> Optional[str]:
+    """Controller owning a build: as given, as recorded at trigger time, or None to let the client resolve it"""
+    if controller:
+        if jenkins_client.get(controller) is None:
+            raise HTTPException(status_code=404, detail=f"Unknown Jenkins controller: {controller}")
+        return controller
+    if len(jenkins_client.candidates(job_name)) <= 1:
+        return None
+    return await db_manager.get_build_controller(job_name, build_number)
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """A query timestamp as the naive UTC the database stores; naive values are taken as UTC"""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+async def _jenkins(current_user: dict, priority: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking Jenkins call through the fair scheduler
+
+    Calls are scheduled at the less urgent of the API key's and the
+    endpoint's priority, so e.g. log reads never outrank triggers. Calls of
+    critical endpoints (triggers and callbacks) may use the reserved slots
+    whatever the key's priority.
+    """
+    return await jenkins_scheduler.run(
+        effective_priority(current_user["priority"], priority), current_user["client"], func, *args,
+        reserved=priority == "critical", **kwargs
+    )
+
+
+async def _validate_trigger(request: TriggerRequest, current_user: dict):
+    """Reject triggers that don't match the job catalog before calling Jenkins"""
+    try:
+        try:
+            job_catalog.validate(request.job_name, request.parameters)
+        except UnknownJobError:
+            # The job may have been created since the last catalog refresh
+            if not await _jenkins(current_user, "critical", job_catalog.refresh_job, request.job_name):
+                raise
+            job_catalog.validate(request.job_name, request.parameters)
+    except UnknownJobError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except JobValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.post("/trigger", response_model=TriggerResponse)
 async def trigger_scan(
     request: TriggerRequest,
     current_user: dict = Depends(get_current_user)
 ):
     """Trigger a Jenkins scan job"""
+    await _validate_trigger(request, current_user)
+
     try:
         logger.info(f"Triggering scan job: {request.job_name}")
         
-        # Trigger the Jenkins job
-        result = jenkins_client.trigger_job(request.job_name, request.parameters)
+        # Trigger the Jenkins job, on a controller that has it when the catalog knows
+        result = await _jenkins(
+            current_user, "critical", jenkins_client.trigger_job,
+            request.job_name, request.parameters, controllers=job_catalog.controllers_for(request.job_name)
+        )
         
         if not result:
             raise HTTPException(status_code=500, detail="Failed to trigger Jenkins job")
         
+        # Remember the controller so later lookups don't have to probe for the build
+        if result.get("controller"):
+            await db_manager.store_build_controller(result["job_name"], result["build_number"], result["controller"])
+        
         return TriggerResponse(**result)
         
     except Exception as e:
@@ -39,22 +109,57 @@ async def trigger_scan(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/jobs", response_model=JobListResponse)
+async def list_jobs(
+    request: Request,
+    current_user: dict = Depends(get_current_user)
+):
+    """List triggerable Jenkins jobs and their parameters from the cached catalog"""
+    if not job_catalog.loaded:
+        raise HTTPException(status_code=503, detail="Job catalog not loaded yet")
+    
+    etag, body = job_catalog.listing()
+    headers = cache_headers(etag, False)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    
+    # The body is built once per catalog change and already matches JobListResponse
+    return ORJSONResponse(body, headers=headers)
+
+
 @router.get("/status", response_model=StatusResponse)
 async def get_scan_status(
+    request: Request,
+    response: Response,
     job_name: str = Query(..., description="Jenkins job name"),
     build_number: int = Query(..., description="Build number"),
+    controller: Optional[str] = Query(None, description="Jenkins controller running the build"),
     current_user: dict = Depends(get_current_user)
 ):
     """Get the status of a scan build"""
+    controller = await _build_controller(job_name, build_number, controller)
+    
     try:
         logger.info(f"Getting status for {job_name}#{build_number}")
         
         # Get status from Jenkins
-        status = jenkins_client.get_build_status(job_name, build_number)
+        status = await _jenkins(
+            current_user, "interactive", jenkins_client.get_build_status, job_name, build_number, controller=controller
+        )
         
         if not status:
             raise HTTPException(status_code=404, detail="Build not found")
         
+        # The ETag covers every field of the build state we return
+        etag = make_etag(
+            job_name, build_number, status["status"], status["progress_percent"],
+            status["start_time"], status["estimated_end_time"]
+        )
+        headers = cache_headers(etag, status["status"] in TERMINAL_STATUSES)
+        if etag_matches(request, etag):
+            return Response(status_code=304, headers=headers)
+        
+        response.headers.update(headers)
         return StatusResponse(**status)
         
     except Exception as e:
@@ -62,44 +167,162 @@ async def get_scan_status(
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/log", response_model=LogResponse)
+@router.get(
+    "/log",
+    response_model=LogResponse,
+    responses={200: {"content": {"text/plain": {}}, "description": "Log lines, or the raw log when format=text"}}
+)
 async def get_scan_log(
+    request: Request,
     job_name: str = Query(..., description="Jenkins job name"),
     build_number: int = Query(..., description="Build number"),
     tail: Optional[int] = Query(None, description="Number of lines to return from end"),
+    format: str = Query("json", pattern="^(json|text)$", description="json for a list of lines, text for the raw log"),
+    controller: Optional[str] = Query(None, description="Jenkins controller running the build"),
     current_user: dict = Depends(get_current_user)
 ):
     """Get the logs for a scan build"""
+    controller = await _build_controller(job_name, build_number, controller)
+    
     try:
         logger.info(f"Getting logs for {job_name}#{build_number}")
         
-        # Get logs from Jenkins
-        logs = jenkins_client.get_build_logs(job_name, build_number, tail)
+        # A stored result means the callback arrived and the build is over
+        finished = await db_manager.get_scan_result(job_name, build_number) is not None
+        complete = finished
+        if log_capture.enabled and (
+            not finished or await run_in_threadpool(log_capture.capturing, job_name, build_number, controller)
+        ):
+            # Only fetch what was logged since the last read; a build may still log after
+            # its callback, so it is read from the spool file until Jenkins has the whole log
+            captured = await _jenkins(
+                current_user, "bulk", log_capture.capture, job_name, build_number, controller=controller
+            )
+            logs, complete = captured if captured else (None, False)
+            if finished and complete and await db_manager.store_scan_log(job_name, build_number, logs):
+                await run_in_threadpool(log_capture.discard, job_name, build_number, controller)
+        else:
+            # A captured build's complete log was stored when its capture finished
+            logs = await db_manager.get_scan_log(job_name, build_number) if log_capture.enabled and finished else None
+            if logs is None:
+                logs = await _jenkins(
+                    current_user, "bulk", jenkins_client.get_build_logs, job_name, build_number, controller=controller
+                )
         
         if logs is None:
             raise HTTPException(status_code=404, detail="Build logs not found")
         
-        # Split logs into lines
+        # Jenkins logs only grow, so the full log's length identifies the
+        # content (a tail of the same length may not)
+        etag = make_etag(job_name, build_number, len(logs), tail, format)
+        headers = cache_headers(etag, finished and complete)
+        if etag_matches(request, etag):
+            return Response(status_code=304, headers=headers)
+        
+        logs = tail_lines(logs, tail)
+        
+        if format == "text":
+            return PlainTextResponse(logs, headers=headers)
+        
+        # Split logs into lines; the lines are plain strings, so skip
+        # per-line LogResponse validation and encode them with orjson
         lines = logs.split('\n') if logs else []
         
-        return LogResponse(lines=lines)
+        return ORJSONResponse({"lines": lines}, headers=headers)
         
     except Exception as e:
         logger.error(f"Error getting scan logs: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/log/search", response_model=LogSearchResponse)
+async def search_scan_log(
+    job_name: str = Query(..., description="Jenkins job name"),
+    build_number: int = Query(..., description="Build number"),
+    pattern: str = Query(..., min_length=1, description="Substring, or regular expression when regex=true"),
+    use_regex: bool = Query(False, alias="regex", description="Treat pattern as a regular expression"),
+    ignore_case: bool = Query(False, description="Case-insensitive matching"),
+    context: int = Query(0, ge=0, le=50, description="Lines of context around each match"),
+    max_matches: int = Query(1000, ge=1, le=10000, description="Stop after this many matches"),
+    source: str = Query("auto", pattern="^(auto|stored|jenkins)$", description="Read the stored log, Jenkins, or stored with Jenkins fallback"),
+    controller: Optional[str] = Query(None, description="Jenkins controller running the build"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Search a build log server-side, returning only matching lines"""
+    try:
+        matcher = build_matcher(pattern, use_regex, ignore_case)
+    except LogSearchError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        logger.info(f"Searching logs for {job_name}#{build_number}")
+        
+        lines, used_source = None, None
+        if source in ("auto", "stored"):
+            log = await db_manager.get_scan_log(job_name, build_number)
+            if log is not None:
+                lines, used_source = split_lines(log), "stored"
+        if lines is None and source in ("auto", "jenkins"):
+            controller = await _build_controller(job_name, build_number, controller)
+        
+        def search():
+            # Runs in a worker thread: the Jenkins read and matching are blocking
+            log_lines, log_source = lines, used_source
+            if log_lines is None and source in ("auto", "jenkins"):
+                log_lines, log_source = jenkins_client.stream_build_log_lines(
+                    job_name, build_number, controller=controller
+                ), "jenkins"
+            if log_lines is None:
+                return None
+            try:
+                return dict(
+                    search_lines(
+                        log_lines, matcher,
+                        context=context,
+                        max_matches=max_matches,
+                        timeout=settings.log_search_timeout_seconds,
+                        max_bytes=settings.log_search_max_bytes,
+                        max_line_length=settings.log_search_max_line_length
+                    ),
+                    source=log_source
+                )
+            finally:
+                # Stop the Jenkins download if the search ended early
+                if hasattr(log_lines, "close"):
+                    log_lines.close()
+        
+        # Only searches that read from Jenkins take a scheduler slot
+        if lines is None:
+            result = await _jenkins(current_user, "bulk", search)
+        else:
+            result = await run_in_threadpool(search)
+        
+        if result is None:
+            raise HTTPException(status_code=404, detail="Build logs not found")
+        
+        return LogSearchResponse(**result)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error searching scan logs: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.post("/callback", response_model=CallbackResponse)
 async def receive_callback(
     request: CallbackRequest,
+    background_tasks: BackgroundTasks,
     current_user: dict = Depends(get_current_user)
 ):
     """Receive callback from Jenkins after scan completion"""
+    controller = await _build_controller(request.job_name, request.build_number, request.controller)
+    
     try:
         logger.info(f"Received callback for {request.job_name}#{request.build_number}")
         
         # Store the scan result in database
-        success = db_manager.store_scan_result(
+        success = await db_manager.store_scan_result(
             request.job_name,
             request.build_number,
             request.status,
@@ -110,10 +333,26 @@ async def receive_callback(
             logger.error("Failed to store scan result in database")
             raise HTTPException(status_code=500, detail="Failed to store scan result")
         
-        # Store logs if available
-        logs = jenkins_client.get_build_logs(request.job_name, request.build_number)
-        if logs:
-            db_manager.store_scan_log(request.job_name, request.build_number, logs)
+        # Store logs if available; a captured log only needs its tail fetched and is
+        # discarded once it is complete and stored, else /log keeps capturing it
+        if log_capture.enabled:
+            captured = await _jenkins(
+                current_user, "critical", log_capture.capture, request.job_name, request.build_number,
+                controller=controller
+            )
+            logs, complete = captured if captured else (None, False)
+        else:
+            logs = await _jenkins(
+                current_user, "critical", jenkins_client.get_build_logs, request.job_name, request.build_number,
+                controller=controller
+            )
+            complete = False
+        if logs and await db_manager.store_scan_log(request.job_name, request.build_number, logs) and complete:
+            await run_in_threadpool(log_capture.discard, request.job_name, request.build_number, controller)
+        
+        # Report artifacts can be large; parse them after responding to Jenkins
+        if settings.findings_enabled:
+            background_tasks.add_task(extract_findings_safely, request.job_name, request.build_number, controller)
         
         return CallbackResponse(status="received")
         
@@ -124,6 +363,7 @@ async def receive_callback(
 
 @router.get("/result", response_model=ResultResponse)
 async def get_scan_result(
+    request: Request,
     job_name: str = Query(..., description="Jenkins job name"),
     build_number: int = Query(..., description="Build number"),
     current_user: dict = Depends(get_current_user)
@@ -133,13 +373,135 @@ async def get_scan_result(
         logger.info(f"Getting result for {job_name}#{build_number}")
         
         # Get result from database
-        result = db_manager.get_scan_result(job_name, build_number)
+        result = await db_manager.get_scan_result(job_name, build_number)
         
         if not result:
             raise HTTPException(status_code=404, detail="Scan result not found")
         
-        return ResultResponse(**result)
+        # A later callback for the same build stores a new row with a newer timestamp,
+        # so even results of finished builds are revalidated rather than cached as immutable
+        etag = make_etag(job_name, build_number, result["status"], result["timestamp"])
+        headers = cache_headers(etag, False)
+        if etag_matches(request, etag):
+            return Response(status_code=304, headers=headers)
+        
+        # Rows from our own database already match ResultResponse
+        return ORJSONResponse(result, headers=headers)
         
     except Exception as e:
         logger.error(f"Error getting scan result: {e}")
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e)) 
+
+
+@router.get("/results", response_model=ResultListResponse)
+async def query_scan_results(
+    job_name: Optional[str] = Query(None, description="Jenkins job name"),
+    status: Optional[str] = Query(None, description="Final status"),
+    filter: List[str] = Query([], description="Results filter as key:op:value, op one of eq, ne, gt, gte, lt, lte"),
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of results"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Query stored scan results by results keys, evaluated in the database"""
+    try:
+        filters = [ResultFilter.parse(expression) for expression in filter]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        logger.info(f"Querying results with {len(filters)} filters")
+        
+        results = await db_manager.query_scan_results(filters, job_name=job_name, status=status, limit=limit)
+        
+        if results is None:
+            raise HTTPException(status_code=500, detail="Failed to query scan results")
+        
+        return ResultListResponse(results=results)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error querying scan results: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+
+@router.get("/findings", response_model=FindingListResponse)
+async def query_scan_findings(
+    job_name: Optional[str] = Query(None, description="Jenkins job name"),
+    build_number: Optional[int] = Query(None, description="Build number"),
+    severity: List[str] = Query([], description="Severities to include: critical, high, medium, low, info"),
+    rule_id: Optional[str] = Query(None, description="Rule or vulnerability id"),
+    component: Optional[str] = Query(None, description="Affected file or package"),
+    limit: int = Query(100, ge=1, le=1000, description="Maximum number of findings"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Query findings extracted from report artifacts, most severe first"""
+    unknown = [value for value in severity if value not in SEVERITIES]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown severity: {', '.join(unknown)}")
+
+    try:
+        logger.info(f"Querying findings for {job_name or 'all jobs'}")
+        
+        findings = await db_manager.query_scan_findings(
+            job_name=job_name, build_number=build_number, severities=severity,
+            rule_id=rule_id, component=component, limit=limit
+        )
+        
+        if findings is None:
+            raise HTTPException(status_code=500, detail="Failed to query scan findings")
+        
+        # Rows from our own database already match FindingListResponse
+        return ORJSONResponse({"findings": findings})
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error querying scan findings: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/stats", response_model=StatsResponse)
+async def get_scan_stats(
+    granularity: str = Query("day", pattern="^(hour|day)$", description="Bucket size: hour or day"),
+    job_name: Optional[str] = Query(None, description="Jenkins job name"),
+    since: Optional[datetime] = Query(None, description="Only buckets starting at or after this time"),
+    until: Optional[datetime] = Query(None, description="Only buckets starting before this time"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Get result counts and pass rates per job and time bucket"""
+    try:
+        logger.info(f"Getting {granularity} stats for {job_name or 'all jobs'}")
+        
+        # Rollups are maintained as callbacks arrive, so this never scans scan_results
+        rows = await db_manager.get_scan_stats(
+            granularity, job_name=job_name, since=_naive_utc(since), until=_naive_utc(until)
+        )
+        
+        if rows is None:
+            raise HTTPException(status_code=500, detail="Failed to read scan stats")
+        
+        buckets = {}
+        for row in rows:
+            counts = buckets.setdefault((row["bucket_start"], row["job_name"]), {})
+            counts[row["status"]] = counts.get(row["status"], 0) + row["count"]
+        
+        return StatsResponse(
+            granularity=granularity,
+            buckets=[
+                StatsBucket(
+                    job_name=job,
+                    bucket_start=bucket_start,
+                    total=sum(counts.values()),
+                    counts=counts,
+                    pass_rate=counts.get("SUCCESS", 0) / sum(counts.values())
+                )
+                for (bucket_start, job), counts in buckets.items()
+            ]
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting scan stats: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,130 @@
+"""
+Fair scheduling of Jenkins calls.
+
+Every Jenkins call made on behalf of a request takes one of a bounded number
+of slots. When all are taken, waiting calls are started in priority order
+and, within a priority, round robin across API keys, so one client issuing
+many calls only delays its own. A few slots are reserved for triggers and
+callbacks, whatever their key's priority; they start before other waiting
+calls and therefore never wait behind bulk log reads.
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Deque, Dict, Tuple
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Scheduling priorities, most urgent first
+PRIORITIES = ("critical", "interactive", "bulk")
+
+# Queues of waiting calls as (may use reserved slots, priority), started in this order
+_LANES = tuple((reserved, priority) for reserved in (True, False) for priority in PRIORITIES)
+
+
+def validate_priority(priority: str) -> str:
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown priority: {priority} (expected one of {', '.join(PRIORITIES)})")
+    return priority
+
+
+def effective_priority(*priorities: str) -> str:
+    """The least urgent of the given priorities, e.g. of an API key and of an endpoint"""
+    return max(priorities, key=PRIORITIES.index)
+
+
+class FairScheduler:
+    """Bounded concurrency with per-priority round robin queues of callers"""
+
+    def __init__(self, max_concurrency: int, reserved: int = 0):
+        self.max_concurrency = max(1, max_concurrency)
+        self.reserved = min(max(0, reserved), self.max_concurrency - 1)
+        self.active = 0
+        # lane -> client -> waiters, clients in round robin order
+        self._waiting: Dict[Tuple[bool, str], "OrderedDict[str, Deque[asyncio.Future]]"] = {
+            lane: OrderedDict() for lane in _LANES
+        }
+
+    def _limit(self, reserved: bool) -> int:
+        return self.max_concurrency if reserved else self.max_concurrency - self.reserved
+
+    def _waiters_before(self, lane: Tuple[bool, str]) -> bool:
+        """Whether calls of this or an earlier lane are already waiting"""
+        return any(self._waiting[l] for l in _LANES[:_LANES.index(lane) + 1])
+
+    def waiting(self) -> Dict[str, int]:
+        """Number of waiting calls per priority"""
+        return {
+            priority: sum(sum(map(len, self._waiting[(reserved, priority)].values())) for reserved in (True, False))
+            for priority in PRIORITIES
+        }
+
+    async def acquire(self, priority: str, client: str, reserved: bool = False) -> None:
+        """Take a slot; reserved calls may also take the reserved slots"""
+        lane = (reserved, validate_priority(priority))
+        if self.active < self._limit(reserved) and not self._waiters_before(lane):
+            self.active += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiting[lane].setdefault(client, deque()).append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Granted just before the cancellation; pass the slot on
+                self.release()
+            else:
+                self._discard(lane, client, waiter)
+            raise
+
+    def _discard(self, lane: Tuple[bool, str], client: str, waiter: asyncio.Future) -> None:
+        waiters = self._waiting[lane].get(client)
+        if waiters is not None and waiter in waiters:
+            waiters.remove(waiter)
+            if not waiters:
+                del self._waiting[lane][client]
+
+    def release(self) -> None:
+        self.active -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Start waiting calls while slots are free, reserved then most urgent priority first"""
+        for reserved, priority in _LANES:
+            clients = self._waiting[(reserved, priority)]
+            while clients and self.active < self._limit(reserved):
+                client, waiters = next(iter(clients.items()))
+                waiter = waiters.popleft()
+                # Move the client to the back so the others go next
+                del clients[client]
+                if waiters:
+                    clients[client] = waiters
+                if not waiter.done():
+                    self.active += 1
+                    waiter.set_result(None)
+            if clients:
+                # Later lanes never overtake waiting calls of earlier ones
+                return
+
+    @asynccontextmanager
+    async def slot(self, priority: str, client: str, reserved: bool = False):
+        await self.acquire(priority, client, reserved)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def run(self, priority: str, client: str, func: Callable[..., Any], *args,
+                  reserved: bool = False, **kwargs) -> Any:
+        """Run a blocking Jenkins call in a worker thread once it gets a slot"""
+        async with self.slot(priority, client, reserved):
+            return await asyncio.to_thread(func, *args, **kwargs)
+
+
+# Global scheduler for Jenkins calls
+jenkins_scheduler = FairScheduler(settings.jenkins_max_concurrency, settings.jenkins_reserved_slots)
@@ -0,0 +1,12 @@
+import orjson
+from typing import Any, Union
+
+
+def dumps(obj: Any) -> str:
+    """Serialize to a JSON string using orjson"""
+    return orjson.dumps(obj).decode()
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """Parse a JSON string or bytes using orjson"""
+    return orjson.loads(data)
@@ -0,0 +1,192 @@
+"""
+Process model for serving the API: one uvicorn process, or a gunicorn
+master supervising uvicorn worker processes.
+
+Workers share a state directory (created by the master and passed in the
+environment) where each one records that its startup finished, so any
+worker can report how many of its siblings are ready, and where a lock
+file elects the single worker that runs database maintenance.
+"""
+
+import importlib.util
+import logging
+import os
+import tempfile
+from typing import Any, Dict, Optional
+
+from .config import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows has no flock; every process runs maintenance
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Set by the master for its workers
+WORKERS_DIR_ENV = "SCAN_API_WORKERS_DIR"
+WORKERS_ENV = "SCAN_API_WORKERS"
+
+_ready = False
+_maintenance_lock = None
+
+
+def available_cpus() -> int:
+    """CPUs this process may use, honouring affinity and cgroup (container) quotas"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+
+    try:
+        # cgroup v2: "<quota> <period>" or "max <period>"
+        with open("/sys/fs/cgroup/cpu.max") as cpu_max:
+            quota, period = cpu_max.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, int(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+def worker_count() -> int:
+    """Configured number of worker processes, one per available CPU when 0"""
+    return settings.workers if settings.workers > 0 else available_cpus()
+
+
+def event_loop() -> str:
+    return "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+
+
+def http_protocol() -> str:
+    return "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+
+def uvicorn_options() -> Dict[str, Any]:
+    """uvicorn settings shared by the single-process and worker modes"""
+    return {
+        "loop": event_loop(),
+        "http": http_protocol(),
+        "timeout_keep_alive": settings.keepalive_seconds,
+        "backlog": settings.backlog,
+        "limit_concurrency": settings.limit_concurrency or None,
+        "timeout_graceful_shutdown": settings.graceful_timeout_seconds,
+    }
+
+
+def worker_processes() -> int:
+    """Number of worker processes serving the app"""
+    return int(os.environ.get(WORKERS_ENV, "1"))
+
+
+def _workers_dir() -> Optional[str]:
+    return os.environ.get(WORKERS_DIR_ENV)
+
+
+def mark_ready() -> None:
+    """Record that this process finished startup and can serve requests"""
+    global _ready
+    _ready = True
+    directory = _workers_dir()
+    if directory:
+        open(os.path.join(directory, f"{os.getpid()}.ready"), "w").close()
+    state = readiness()
+    logger.info(f"Worker {os.getpid()} ready ({state['workers_ready']}/{state['workers']} workers ready)")
+
+
+def mark_stopped() -> None:
+    """Record that this process is shutting down"""
+    global _ready
+    _ready = False
+    directory = _workers_dir()
+    if directory:
+        remove_worker(directory, os.getpid())
+
+
+def remove_worker(directory: str, pid: int) -> None:
+    """Forget a worker's readiness, e.g. after it exited"""
+    try:
+        os.remove(os.path.join(directory, f"{pid}.ready"))
+    except FileNotFoundError:
+        pass
+
+
+def readiness() -> Dict[str, Any]:
+    """This worker's readiness and how many of its siblings are ready"""
+    directory = _workers_dir()
+    if directory:
+        try:
+            ready = sum(1 for name in os.listdir(directory) if name.endswith(".ready"))
+        except OSError:
+            ready = 0
+    else:
+        ready = int(_ready)
+    return {
+        "ready": _ready,
+        "worker_pid": os.getpid(),
+        "workers_ready": ready,
+        "workers": worker_processes()
+    }
+
+
+def is_maintenance_worker() -> bool:
+    """Whether this process runs database maintenance, holding the lock once it gets it
+
+    The lock is released when the process exits (e.g. when it is recycled),
+    so another worker takes over on its next attempt.
+    """
+    global _maintenance_lock
+    directory = _workers_dir()
+    if _maintenance_lock is not None or not directory or fcntl is None:
+        return True
+    lock = open(os.path.join(directory, "maintenance.lock"), "w")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock.close()
+        return False
+    _maintenance_lock = lock
+    return True
+
+
+def serve_workers(workers: int) -> None:
+    """Run the app in gunicorn with the given number of uvicorn workers"""
+    from gunicorn.app.base import BaseApplication
+
+    options = uvicorn_options()
+
+    def child_exit(server, worker):
+        # A crashed worker never ran its shutdown, so clear its readiness here
+        remove_worker(os.environ[WORKERS_DIR_ENV], worker.pid)
+
+    def when_ready(server):
+        server.log.info(f"Listening on {settings.host}:{settings.port} with {workers} workers "
+                        f"({options['loop']}, {options['http']})")
+
+    class ScanApplication(BaseApplication):
+        def load_config(self):
+            config = {
+                "bind": f"{settings.host}:{settings.port}",
+                "workers": workers,
+                "worker_class": "app.workers.ScanUvicornWorker",
+                "preload_app": settings.preload_app,
+                "keepalive": settings.keepalive_seconds,
+                "backlog": settings.backlog,
+                "max_requests": settings.max_requests,
+                "max_requests_jitter": settings.max_requests_jitter,
+                "graceful_timeout": settings.graceful_timeout_seconds,
+                "timeout": settings.worker_timeout_seconds,
+                "loglevel": settings.log_level.lower(),
+                "child_exit": child_exit,
+                "when_ready": when_ready,
+            }
+            for key, value in config.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from .main import app
+            return app
+
+    os.environ[WORKERS_DIR_ENV] = tempfile.mkdtemp(prefix="scan-api-workers-")
+    os.environ[WORKERS_ENV] = str(workers)
+    ScanApplication().run()
@@ -0,0 +1,27 @@
+# Pluggable storage backends for scan results and logs
+from typing import Optional
+
+from ..config import settings
+from .base import StorageBackend, ResultFilter
+
+
+def create_storage_backend(backend: Optional[str] = None) -> StorageBackend:
+    """Create the storage backend selected by settings.storage_backend"""
+    name = (backend or settings.storage_backend).lower()
+
+    # Backends are imported lazily so that optional drivers are only
+    # required when the corresponding backend is selected
+    if name == "oracle":
+        from .oracle import OracleStorageBackend
+        return OracleStorageBackend()
+    if name == "sqlite":
+        from .sqlite import SQLiteStorageBackend
+        return SQLiteStorageBackend()
+    if name in ("postgres", "postgresql"):
+        from .postgres import PostgresStorageBackend
+        return PostgresStorageBackend()
+
+    raise ValueError(f"Unknown storage backend: {name}")
+
+
+__all__ = ["StorageBackend", "ResultFilter", "create_storage_backend"]
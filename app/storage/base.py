@@ -0,0 +1,257 @@
+import re
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Sequence, Tuple, Callable
+
+from ..config import settings
+from ..report_parsers import SEVERITIES
+
+# Comparison operators accepted in result filters
+RESULT_FILTER_OPS = {"eq": "=", "ne": "!=", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+
+# Operators that compare the value as a number rather than as text
+NUMERIC_FILTER_OPS = {"gt", "gte", "lt", "lte"}
+
+# Time buckets maintained in the scan_result_rollups table
+ROLLUP_GRANULARITIES = ("hour", "day")
+
+# Tables the retention policy removes old rows from; all are partitioned by month of timestamp
+RETENTION_TABLES = ("scan_results", "scan_logs", "scan_findings")
+
+# Orders findings from most to least severe
+SEVERITY_RANK = "CASE severity {} ELSE {} END".format(
+    " ".join(f"WHEN '{severity}' THEN {rank}" for rank, severity in enumerate(SEVERITIES)), len(SEVERITIES)
+)
+
+# Columns of scan_findings returned by queries, in order
+FINDING_COLUMNS = ("job_name", "build_number", "artifact", "tool", "rule_id", "severity", "component", "location", "message")
+
+# Result keys are interpolated into JSON paths, so only plain identifiers are allowed
+_RESULT_KEY = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def validate_result_key(key: str) -> str:
+    """Ensure a results key is safe to use in a JSON path expression"""
+    if not _RESULT_KEY.match(key):
+        raise ValueError(f"Invalid result key: {key!r}")
+    return key
+
+
+def validate_granularity(granularity: str) -> str:
+    """Ensure a rollup granularity is one that is maintained"""
+    if granularity not in ROLLUP_GRANULARITIES:
+        raise ValueError(f"Invalid granularity: {granularity!r}, expected one of {', '.join(ROLLUP_GRANULARITIES)}")
+    return granularity
+
+
+def validate_retention_table(table: str) -> str:
+    """Ensure a table name is one the retention policy applies to"""
+    if table not in RETENTION_TABLES:
+        raise ValueError(f"Invalid retention table: {table!r}, expected one of {', '.join(RETENTION_TABLES)}")
+    return table
+
+
+def month_start(value: datetime) -> datetime:
+    """Start of the month (and partition) containing value"""
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(value: datetime, months: int) -> datetime:
+    """Start of the month the given number of months after value's month"""
+    index = value.year * 12 + value.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def indexed_result_keys() -> List[str]:
+    """Result keys that get dedicated indexes, from settings.results_indexed_keys"""
+    keys = [key.strip() for key in settings.results_indexed_keys.split(",") if key.strip()]
+    return [validate_result_key(key) for key in keys]
+
+
+@dataclass(frozen=True)
+class ResultFilter:
+    """Predicate on a single key of the stored results JSON"""
+    key: str
+    op: str
+    value: str
+
+    def __post_init__(self):
+        validate_result_key(self.key)
+        if self.op not in RESULT_FILTER_OPS:
+            raise ValueError(f"Invalid filter operator: {self.op!r}")
+        if self.op in NUMERIC_FILTER_OPS:
+            try:
+                float(self.value)
+            except ValueError:
+                raise ValueError(f"Operator {self.op!r} needs a numeric value, got {self.value!r}")
+
+    @classmethod
+    def parse(cls, expression: str) -> "ResultFilter":
+        """Parse a ``key:op:value`` filter expression"""
+        parts = expression.split(":", 2)
+        if len(parts) != 3:
+            raise ValueError(f"Invalid filter {expression!r}, expected key:op:value")
+        return cls(*parts)
+
+
+def build_result_filters(
+    filters: Sequence[ResultFilter],
+    text_expr: Callable[[str], str],
+    number_expr: Callable[[str], str],
+    placeholder: Callable[[int], str],
+    start: int = 1,
+) -> Tuple[List[str], List[Any]]:
+    """Translate result filters into SQL clauses and bind parameters
+
+    ``text_expr``/``number_expr`` render the backend's JSON extraction
+    expression for a key; they must match the expressions used in the
+    backend's indexes so the database can use them.
+    """
+    clauses, params = [], []
+    for position, result_filter in enumerate(filters, start):
+        if result_filter.op in NUMERIC_FILTER_OPS:
+            expr = number_expr(result_filter.key)
+            params.append(float(result_filter.value))
+        else:
+            expr = text_expr(result_filter.key)
+            params.append(result_filter.value)
+        clauses.append(f"{expr} {RESULT_FILTER_OPS[result_filter.op]} {placeholder(position)}")
+    return clauses, params
+
+
+def build_finding_filters(
+    placeholder: Callable[[int], str],
+    job_name: Optional[str] = None,
+    build_number: Optional[int] = None,
+    severities: Sequence[str] = (),
+    rule_id: Optional[str] = None,
+    component: Optional[str] = None,
+) -> Tuple[List[str], List[Any]]:
+    """Translate findings query arguments into SQL clauses and bind parameters"""
+    clauses, params = [], []
+    for column, value in (("job_name", job_name), ("build_number", build_number),
+                          ("rule_id", rule_id), ("component", component)):
+        if value is not None:
+            params.append(value)
+            clauses.append(f"{column} = {placeholder(len(params))}")
+    if severities:
+        start = len(params)
+        params.extend(severities)
+        clauses.append(f"severity IN ({', '.join(placeholder(start + n) for n in range(1, len(severities) + 1))})")
+    return clauses or ["1 = 1"], params
+
+
+class StorageBackend(ABC):
+    """Interface implemented by every scan result/log storage backend"""
+
+    # Short backend identifier used in logs and settings
+    name: str = "base"
+
+    @abstractmethod
+    async def connect(self) -> None:
+        """Open connections and create tables if they don't exist"""
+
+    @abstractmethod
+    async def close(self) -> None:
+        """Flush pending writes and close connections"""
+
+    @abstractmethod
+    async def store_scan_result(self, job_name: str, build_number: int, status: str, results: Dict[str, str]) -> bool:
+        """Store scan result, returning False on failure"""
+
+    @abstractmethod
+    async def get_scan_result(self, job_name: str, build_number: int) -> Optional[Dict[str, Any]]:
+        """Retrieve the latest scan result for a build"""
+
+    @abstractmethod
+    async def query_scan_results(
+        self,
+        filters: Sequence[ResultFilter] = (),
+        job_name: Optional[str] = None,
+        status: Optional[str] = None,
+        limit: int = 100,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Find scan results matching all filters, newest first
+
+        Filters are evaluated by the database. Returns None on failure.
+        """
+
+    @abstractmethod
+    async def get_scan_stats(
+        self,
+        granularity: str = "day",
+        job_name: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Read result counts per job, time bucket and status
+
+        Served from the scan_result_rollups table, which store_scan_result
+        updates in the same transaction as the result row. Returns rows with
+        job_name, bucket_start, status and count, or None on failure.
+        """
+
+    @abstractmethod
+    async def rebuild_scan_rollups(self) -> bool:
+        """Recompute all rollups from the rows in scan_results"""
+
+    @abstractmethod
+    async def store_scan_log(self, job_name: str, build_number: int, log_content: str) -> bool:
+        """Store scan log, returning False on failure"""
+
+    @abstractmethod
+    async def get_scan_log(self, job_name: str, build_number: int) -> Optional[str]:
+        """Retrieve the latest scan log for a build"""
+
+    @abstractmethod
+    async def store_scan_findings(self, job_name: str, build_number: int, findings: Sequence[Dict[str, Any]]) -> bool:
+        """Replace the findings of a build, returning False on failure
+
+        Each finding has artifact, tool, rule_id, severity, component,
+        location and message.
+        """
+
+    @abstractmethod
+    async def query_scan_findings(
+        self,
+        job_name: Optional[str] = None,
+        build_number: Optional[int] = None,
+        severities: Sequence[str] = (),
+        rule_id: Optional[str] = None,
+        component: Optional[str] = None,
+        limit: int = 100,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Findings matching all given criteria, most severe first"""
+
+    @abstractmethod
+    async def list_scan_logs_before(
+        self,
+        before: datetime,
+        after: Optional[Tuple[datetime, int]] = None,
+        limit: int = 100,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Logs stored before a time, ordered by (timestamp, id) and starting after that key
+
+        Rows have id, job_name, build_number, timestamp and log_content.
+        """
+
+    @abstractmethod
+    async def maintain_partitions(self, now: datetime) -> bool:
+        """Create the time partitions needed around now, where the database doesn't create them itself"""
+
+    @abstractmethod
+    async def drop_expired(self, table: str, before: datetime) -> bool:
+        """Remove rows of a retention table stored before a month start
+
+        Partitioned tables drop whole partitions; tables that are not
+        partitioned fall back to deleting rows in batches.
+        """
+
+    @abstractmethod
+    async def store_build_controller(self, job_name: str, build_number: int, controller: str) -> bool:
+        """Record which Jenkins controller runs a build, returning False on failure"""
+
+    @abstractmethod
+    async def get_build_controller(self, job_name: str, build_number: int) -> Optional[str]:
+        """Name of the Jenkins controller running a build, if recorded"""
@@ -0,0 +1,656 @@
+import asyncio
+import logging
+import re
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Sequence, Tuple
+
+import oracledb
+
+from .. import serialization
+from ..config import settings
+from .base import (
+    FINDING_COLUMNS, SEVERITY_RANK, StorageBackend, ResultFilter, RETENTION_TABLES, build_finding_filters,
+    build_result_filters, indexed_result_keys, validate_granularity, validate_retention_table
+)
+
+logger = logging.getLogger(__name__)
+
+# Return CLOB columns as str so rows need no extra LOB round trips
+oracledb.defaults.fetch_lobs = False
+
+# ORA- error codes that mean a DDL object is already in place
+_ALREADY_EXISTS = {
+    955,   # name is already used by an existing object
+    1408,  # such column list already indexed
+    2261,  # such unique or primary key already exists
+    2264,  # name already used by an existing constraint
+    2275,  # such a referential constraint already exists
+}
+
+
+# Monthly interval partitioning; Oracle creates each month's partition on first insert.
+# The initial range partition only anchors the interval and stays empty.
+_PARTITIONING = """
+    PARTITION BY RANGE (timestamp) INTERVAL (NUMTOYMINTERVAL(1, 'MONTH'))
+    (PARTITION p_initial VALUES LESS THAN (TIMESTAMP '2000-01-01 00:00:00'))
+"""
+
+# Timestamps are stored in UTC, like the retention cutoffs they are compared to,
+# whatever the session or database time zone
+_UTC_NOW = "SYS_EXTRACT_UTC(SYSTIMESTAMP)"
+
+# Upper bound of a partition as shown in user_tab_partitions.high_value
+_HIGH_VALUE = re.compile(r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})")
+
+# Rows removed per statement from tables that are not partitioned
+_DELETE_BATCH_SIZE = 10000
+
+
+def _json_text(key: str) -> str:
+    return f"JSON_VALUE(results, '$.{key}')"
+
+
+def _json_number(key: str) -> str:
+    # Only plain decimals are numbers, as on the other backends; RETURNING NUMBER alone also takes e.g. 1e5
+    return (f"(CASE WHEN REGEXP_LIKE({_json_text(key)}, '^-?[0-9]+(\\.[0-9]+)?$') "
+            f"THEN JSON_VALUE(results, '$.{key}' RETURNING NUMBER NULL ON ERROR) END)")
+
+
+# TRUNC formats for each rollup granularity
+_ROLLUP_BUCKETS = """
+    SELECT 'hour' AS granularity, 'HH' AS fmt FROM dual
+    UNION ALL SELECT 'day', 'DD' FROM dual
+"""
+
+# Insert a result and count it into its hourly and daily buckets atomically
+_STORE_RESULT = f"""
+    DECLARE
+        v_timestamp TIMESTAMP;
+    BEGIN
+        INSERT INTO scan_results (job_name, build_number, status, results)
+        VALUES (:job_name, :build_number, :status, :results)
+        RETURNING timestamp INTO v_timestamp;
+
+        MERGE INTO scan_result_rollups r
+        USING (
+            SELECT granularity, TRUNC(v_timestamp, fmt) AS bucket_start FROM ({_ROLLUP_BUCKETS})
+        ) b
+        ON (r.granularity = b.granularity AND r.bucket_start = b.bucket_start
+            AND r.job_name = :job_name AND r.status = :status)
+        WHEN MATCHED THEN UPDATE SET r.result_count = r.result_count + 1
+        WHEN NOT MATCHED THEN INSERT (job_name, granularity, bucket_start, status, result_count)
+            VALUES (:job_name, b.granularity, b.bucket_start, :status, 1);
+    END;
+"""
+
+
+def _row_to_result(row) -> Dict[str, Any]:
+    return {
+        "job_name": row[0],
+        "build_number": row[1],
+        "status": row[2],
+        "results": serialization.loads(row[3]) if row[3] else {},
+        "timestamp": row[4]
+    }
+
+
+class OracleStorageBackend(StorageBackend):
+    """Oracle database storage for scan results
+
+    Uses python-oracledb in thin mode (no Oracle Instant Client needed)
+    with its native asyncio connection pool, so queries never block the
+    event loop.
+    """
+
+    name = "oracle"
+
+    def __init__(self):
+        self.pool: Optional[oracledb.AsyncConnectionPool] = None
+        self._connect_lock = asyncio.Lock()
+
+    async def connect(self) -> None:
+        """Initialize database connection pool"""
+        async with self._connect_lock:
+            if self.pool is None:
+                await self._create_pool()
+
+    async def _create_pool(self):
+        try:
+            # Oracle Easy Connect string
+            dsn = f"{settings.oracle_host}:{settings.oracle_port}/{settings.oracle_service}"
+
+            self.pool = oracledb.create_pool_async(
+                user=settings.oracle_username,
+                password=settings.oracle_password,
+                dsn=dsn,
+                min=settings.oracle_pool_min,
+                max=settings.oracle_pool_max,
+                increment=1
+            )
+
+            # Create tables if they don't exist
+            await self._create_tables()
+            logger.info("Database connection established successfully")
+
+        except Exception as e:
+            logger.error(f"Failed to connect to database: {e}")
+            if self.pool is not None:
+                await self.pool.close(force=True)
+                self.pool = None
+            raise
+
+    async def _create_tables(self):
+        """Create necessary tables and indexes if they don't exist"""
+        async with self.pool.acquire() as connection:
+            cursor = connection.cursor()
+
+            # Create scan_results table, partitioned by month so retention can drop partitions
+            await self._execute_ddl(cursor, f"""
+                CREATE TABLE scan_results (
+                    id NUMBER GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+                    job_name VARCHAR2(255) NOT NULL,
+                    build_number NUMBER NOT NULL,
+                    status VARCHAR2(50) NOT NULL,
+                    results CLOB,
+                    timestamp TIMESTAMP DEFAULT {_UTC_NOW} NOT NULL,
+                    created_at TIMESTAMP DEFAULT {_UTC_NOW},
+                    CONSTRAINT scan_results_results_json CHECK (results IS JSON)
+                ) {_PARTITIONING}
+            """)
+
+            # Tables created before results were validated lack the IS JSON constraint
+            await self._execute_ddl(cursor, """
+                ALTER TABLE scan_results
+                ADD CONSTRAINT scan_results_results_json CHECK (results IS JSON)
+            """)
+
+            # Create scan_logs table
+            await self._execute_ddl(cursor, f"""
+                CREATE TABLE scan_logs (
+                    id NUMBER GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+                    job_name VARCHAR2(255) NOT NULL,
+                    build_number NUMBER NOT NULL,
+                    log_content CLOB,
+                    timestamp TIMESTAMP DEFAULT {_UTC_NOW} NOT NULL
+                ) {_PARTITIONING}
+            """)
+
+            # Create scan_findings table
+            await self._execute_ddl(cursor, f"""
+                CREATE TABLE scan_findings (
+                    id NUMBER GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+                    job_name VARCHAR2(255) NOT NULL,
+                    build_number NUMBER NOT NULL,
+                    artifact VARCHAR2(1000),
+                    tool VARCHAR2(255) NOT NULL,
+                    rule_id VARCHAR2(255) NOT NULL,
+                    severity VARCHAR2(20) NOT NULL,
+                    component VARCHAR2(1000),
+                    location VARCHAR2(2000),
+                    message VARCHAR2(4000),
+                    timestamp TIMESTAMP DEFAULT {_UTC_NOW} NOT NULL
+                ) {_PARTITIONING}
+            """)
+
+            # Create scan_result_rollups table
+            await self._execute_ddl(cursor, """
+                CREATE TABLE scan_result_rollups (
+                    job_name VARCHAR2(255) NOT NULL,
+                    granularity VARCHAR2(10) NOT NULL,
+                    bucket_start DATE NOT NULL,
+                    status VARCHAR2(50) NOT NULL,
+                    result_count NUMBER NOT NULL,
+                    CONSTRAINT scan_result_rollups_pk PRIMARY KEY (granularity, bucket_start, job_name, status)
+                ) ORGANIZATION INDEX
+            """)
+
+            # Create build_controllers table
+            await self._execute_ddl(cursor, """
+                CREATE TABLE build_controllers (
+                    job_name VARCHAR2(255) NOT NULL,
+                    build_number NUMBER NOT NULL,
+                    controller VARCHAR2(255) NOT NULL,
+                    CONSTRAINT build_controllers_pk PRIMARY KEY (job_name, build_number)
+                ) ORGANIZATION INDEX
+            """)
+
+            # Tables created with local time defaults store UTC from now on
+            for table in RETENTION_TABLES:
+                await self._execute_ddl(cursor, f"ALTER TABLE {table} MODIFY (timestamp DEFAULT {_UTC_NOW})")
+
+            # Tables created before partitioning stay plain tables; retention deletes from them instead
+            partitioned = await self._partitioned_tables(cursor)
+            for table in RETENTION_TABLES:
+                if table not in partitioned:
+                    logger.warning(f"{table} is not partitioned; retention will delete its rows in batches")
+            # Local indexes are dropped along with their partition instead of being rebuilt
+            results_local = " LOCAL" if "scan_results" in partitioned else ""
+            logs_local = " LOCAL" if "scan_logs" in partitioned else ""
+            findings_local = " LOCAL" if "scan_findings" in partitioned else ""
+
+            await self._execute_ddl(
+                cursor, f"CREATE INDEX idx_scan_results_build ON scan_results (job_name, build_number){results_local}"
+            )
+            await self._execute_ddl(
+                cursor, f"CREATE INDEX idx_scan_results_ts ON scan_results (timestamp){results_local}"
+            )
+            await self._execute_ddl(
+                cursor, f"CREATE INDEX idx_scan_logs_build ON scan_logs (job_name, build_number){logs_local}"
+            )
+            await self._execute_ddl(cursor, f"CREATE INDEX idx_scan_logs_ts ON scan_logs (timestamp, id){logs_local}")
+            for name, columns in (("build", "job_name, build_number"), ("severity", "severity, job_name"),
+                                  ("rule", "rule_id"), ("component", "component"), ("ts", "timestamp")):
+                await self._execute_ddl(
+                    cursor, f"CREATE INDEX idx_scan_findings_{name} ON scan_findings ({columns}){findings_local}"
+                )
+            await self._execute_ddl(
+                cursor, "CREATE INDEX idx_rollups_job ON scan_result_rollups (job_name, granularity, bucket_start)"
+            )
+
+            # Function-based indexes matching the filters built by query_scan_results
+            for key in indexed_result_keys():
+                await self._execute_ddl(
+                    cursor, f"CREATE INDEX idx_sr_{key} ON scan_results ({_json_text(key)}){results_local}"
+                )
+                await self._execute_ddl(
+                    cursor, f"CREATE INDEX idx_sr_{key}_num ON scan_results ({_json_number(key)}){results_local}"
+                )
+
+            # JSON search index for ad-hoc keys; needs Oracle Text, so it is optional
+            try:
+                await self._execute_ddl(cursor, "CREATE SEARCH INDEX idx_scan_results_json ON scan_results (results) FOR JSON")
+            except oracledb.DatabaseError as e:
+                logger.warning(f"JSON search index not created: {e}")
+
+            await connection.commit()
+            logger.info("Database tables ready")
+
+    @staticmethod
+    async def _partitioned_tables(cursor) -> set:
+        tables = ", ".join(f"'{table.upper()}'" for table in RETENTION_TABLES)
+        await cursor.execute(
+            f"SELECT LOWER(table_name) FROM user_tables WHERE partitioned = 'YES' AND table_name IN ({tables})"
+        )
+        return {row[0] for row in await cursor.fetchall()}
+
+    async def _execute_ddl(self, cursor, sql: str):
+        """Execute a DDL statement, ignoring errors for objects that already exist"""
+        try:
+            await cursor.execute(sql)
+        except oracledb.DatabaseError as e:
+            error, = e.args
+            if error.code not in _ALREADY_EXISTS:
+                logger.error(f"Database error: {e}")
+                raise
+
+    async def _pool(self) -> oracledb.AsyncConnectionPool:
+        if self.pool is None:
+            await self.connect()
+        return self.pool
+
+    async def _execute(self, sql: str, params):
+        """Execute a statement and commit it, rolling back on failure"""
+        pool = await self._pool()
+        async with pool.acquire() as connection:
+            try:
+                cursor = connection.cursor()
+                await cursor.execute(sql, params)
+                await connection.commit()
+            except Exception:
+                await connection.rollback()
+                raise
+
+    async def _fetchone(self, sql: str, params: tuple):
+        pool = await self._pool()
+        async with pool.acquire() as connection:
+            cursor = connection.cursor()
+            await cursor.execute(sql, params)
+            return await cursor.fetchone()
+
+    async def _fetchall(self, sql: str, params):
+        pool = await self._pool()
+        async with pool.acquire() as connection:
+            cursor = connection.cursor()
+            await cursor.execute(sql, params)
+            return await cursor.fetchall()
+
+    async def store_scan_result(self, job_name: str, build_number: int, status: str, results: Dict[str, str]) -> bool:
+        """Store scan result in database"""
+        try:
+            # Convert results dict to JSON string
+            params = {
+                "job_name": job_name,
+                "build_number": build_number,
+                "status": status,
+                "results": serialization.dumps(results),
+            }
+
+            try:
+                await self._execute(_STORE_RESULT, params)
+            except oracledb.IntegrityError:
+                # Concurrent MERGEs may both try to insert a new bucket; the retry updates it
+                await self._execute(_STORE_RESULT, params)
+
+            logger.info(f"Stored scan result for {job_name}#{build_number}")
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to store scan result: {e}")
+            return False
+
+    async def get_scan_result(self, job_name: str, build_number: int) -> Optional[Dict[str, Any]]:
+        """Retrieve scan result from database"""
+        try:
+            row = await self._fetchone("""
+                SELECT job_name, build_number, status, results, timestamp
+                FROM scan_results
+                WHERE job_name = :1 AND build_number = :2
+                ORDER BY timestamp DESC, id DESC
+                FETCH FIRST 1 ROWS ONLY
+            """, (job_name, build_number))
+
+            return _row_to_result(row) if row else None
+
+        except Exception as e:
+            logger.error(f"Failed to retrieve scan result: {e}")
+            return None
+
+    async def query_scan_results(
+        self,
+        filters: Sequence[ResultFilter] = (),
+        job_name: Optional[str] = None,
+        status: Optional[str] = None,
+        limit: int = 100,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Find scan results matching all filters, newest first"""
+        clauses, params = build_result_filters(filters, _json_text, _json_number, lambda n: f":{n}")
+        if job_name is not None:
+            params.append(job_name)
+            clauses.append(f"job_name = :{len(params)}")
+        if status is not None:
+            params.append(status)
+            clauses.append(f"status = :{len(params)}")
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        params.append(limit)
+
+        try:
+            rows = await self._fetchall(f"""
+                SELECT job_name, build_number, status, results, timestamp
+                FROM scan_results
+                {where}
+                ORDER BY timestamp DESC, id DESC
+                FETCH FIRST :{len(params)} ROWS ONLY
+            """, tuple(params))
+            return [_row_to_result(row) for row in rows]
+
+        except Exception as e:
+            logger.error(f"Failed to query scan results: {e}")
+            return None
+
+    async def get_scan_stats(
+        self,
+        granularity: str = "day",
+        job_name: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Read result counts per job, bucket and status from the rollups"""
+        validate_granularity(granularity)
+        clauses, params = ["granularity = :granularity"], {"granularity": granularity}
+        if job_name is not None:
+            clauses.append("job_name = :job_name")
+            params["job_name"] = job_name
+        if since is not None:
+            clauses.append("bucket_start >= :since")
+            params["since"] = since
+        if until is not None:
+            clauses.append("bucket_start < :until")
+            params["until"] = until
+
+        try:
+            rows = await self._fetchall(f"""
+                SELECT job_name, bucket_start, status, result_count
+                FROM scan_result_rollups
+                WHERE {' AND '.join(clauses)}
+                ORDER BY bucket_start, job_name, status
+            """, params)
+            return [
+                {"job_name": row[0], "bucket_start": row[1], "status": row[2], "count": int(row[3])}
+                for row in rows
+            ]
+
+        except Exception as e:
+            logger.error(f"Failed to read scan stats: {e}")
+            return None
+
+    async def rebuild_scan_rollups(self) -> bool:
+        """Recompute rollups from scan_results, keeping those older than its first row"""
+        try:
+            pool = await self._pool()
+            async with pool.acquire() as connection:
+                try:
+                    cursor = connection.cursor()
+                    # Block concurrent rollup updates so no callback is lost or counted twice
+                    await cursor.execute("LOCK TABLE scan_result_rollups IN EXCLUSIVE MODE")
+                    await cursor.execute("""
+                        DELETE FROM scan_result_rollups
+                        WHERE bucket_start >= (SELECT TRUNC(MIN(timestamp), 'DD') FROM scan_results)
+                    """)
+                    await cursor.execute(f"""
+                        INSERT INTO scan_result_rollups (job_name, granularity, bucket_start, status, result_count)
+                        SELECT r.job_name, b.granularity, TRUNC(r.timestamp, b.fmt), r.status, COUNT(*)
+                        FROM scan_results r CROSS JOIN ({_ROLLUP_BUCKETS}) b
+                        GROUP BY r.job_name, b.granularity, TRUNC(r.timestamp, b.fmt), r.status
+                    """)
+                    await connection.commit()
+                except Exception:
+                    await connection.rollback()
+                    raise
+            logger.info("Rebuilt scan result rollups")
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to rebuild scan rollups: {e}")
+            return False
+
+    async def store_scan_log(self, job_name: str, build_number: int, log_content: str) -> bool:
+        """Store scan log in database"""
+        try:
+            await self._execute("""
+                INSERT INTO scan_logs (job_name, build_number, log_content)
+                VALUES (:1, :2, :3)
+            """, (job_name, build_number, log_content))
+
+            logger.info(f"Stored scan log for {job_name}#{build_number}")
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to store scan log: {e}")
+            return False
+
+    async def get_scan_log(self, job_name: str, build_number: int) -> Optional[str]:
+        """Retrieve scan log from database"""
+        try:
+            row = await self._fetchone("""
+                SELECT log_content
+                FROM scan_logs
+                WHERE job_name = :1 AND build_number = :2
+                ORDER BY timestamp DESC, id DESC
+                FETCH FIRST 1 ROWS ONLY
+            """, (job_name, build_number))
+            return row[0] if row else None
+
+        except Exception as e:
+            logger.error(f"Failed to retrieve scan log: {e}")
+            return None
+
+    async def store_scan_findings(self, job_name: str, build_number: int, findings: Sequence[Dict[str, Any]]) -> bool:
+        """Replace the findings of a build in one transaction"""
+        columns = FINDING_COLUMNS[2:]
+        try:
+            pool = await self._pool()
+            async with pool.acquire() as connection:
+                try:
+                    cursor = connection.cursor()
+                    await cursor.execute(
+                        "DELETE FROM scan_findings WHERE job_name = :1 AND build_number = :2", (job_name, build_number)
+                    )
+                    if findings:
+                        await cursor.executemany(f"""
+                            INSERT INTO scan_findings (job_name, build_number, {', '.join(columns)})
+                            VALUES (:1, :2, {', '.join(f':{n}' for n in range(3, len(columns) + 3))})
+                        """, [(job_name, build_number, *(finding.get(column) for column in columns))
+                              for finding in findings])
+                    await connection.commit()
+                except Exception:
+                    await connection.rollback()
+                    raise
+
+            logger.info(f"Stored {len(findings)} findings for {job_name}#{build_number}")
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to store scan findings: {e}")
+            return False
+
+    async def query_scan_findings(
+        self,
+        job_name: Optional[str] = None,
+        build_number: Optional[int] = None,
+        severities: Sequence[str] = (),
+        rule_id: Optional[str] = None,
+        component: Optional[str] = None,
+        limit: int = 100,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Find findings matching all criteria, most severe first"""
+        clauses, params = build_finding_filters(
+            lambda n: f":{n}", job_name, build_number, severities, rule_id, component
+        )
+        params.append(limit)
+
+        try:
+            rows = await self._fetchall(f"""
+                SELECT {', '.join(FINDING_COLUMNS)}
+                FROM scan_findings
+                WHERE {' AND '.join(clauses)}
+                ORDER BY {SEVERITY_RANK}, id
+                FETCH FIRST :{len(params)} ROWS ONLY
+            """, tuple(params))
+            return [dict(zip(FINDING_COLUMNS, row)) for row in rows]
+
+        except Exception as e:
+            logger.error(f"Failed to query scan findings: {e}")
+            return None
+
+    async def list_scan_logs_before(
+        self,
+        before: datetime,
+        after: Optional[Tuple[datetime, int]] = None,
+        limit: int = 100,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Page through logs stored before a time"""
+        try:
+            clauses, params = ["timestamp < :before"], {"before": before, "limit": limit}
+            if after is not None:
+                clauses.append("(timestamp > :after_ts OR (timestamp = :after_ts AND id > :after_id))")
+                params.update(after_ts=after[0], after_id=after[1])
+            rows = await self._fetchall(f"""
+                SELECT id, job_name, build_number, timestamp, log_content
+                FROM scan_logs
+                WHERE {' AND '.join(clauses)}
+                ORDER BY timestamp, id
+                FETCH FIRST :limit ROWS ONLY
+            """, params)
+            return [
+                {"id": row[0], "job_name": row[1], "build_number": row[2],
+                 "timestamp": row[3], "log_content": row[4]}
+                for row in rows
+            ]
+
+        except Exception as e:
+            logger.error(f"Failed to list expired scan logs: {e}")
+            return None
+
+    async def maintain_partitions(self, now: datetime) -> bool:
+        """Interval partitioning creates partitions on insert; nothing to do"""
+        return True
+
+    async def drop_expired(self, table: str, before: datetime) -> bool:
+        """Drop monthly partitions that end by a time, or delete rows from an unpartitioned table"""
+        try:
+            validate_retention_table(table)
+            pool = await self._pool()
+            async with pool.acquire() as connection:
+                cursor = connection.cursor()
+                if table not in await self._partitioned_tables(cursor):
+                    while True:
+                        await cursor.execute(
+                            f"DELETE FROM {table} WHERE timestamp < :1 AND ROWNUM <= {_DELETE_BATCH_SIZE}", (before,)
+                        )
+                        deleted = cursor.rowcount
+                        await connection.commit()
+                        if not deleted:
+                            break
+                    logger.info(f"Deleted {table} rows before {before}")
+                    return True
+
+                await cursor.execute("""
+                    SELECT partition_name, high_value
+                    FROM user_tab_partitions
+                    WHERE table_name = :1
+                    ORDER BY partition_position
+                """, (table.upper(),))
+                for partition_name, high_value in await cursor.fetchall():
+                    match = _HIGH_VALUE.search(high_value or "")
+                    # The initial partition anchors the interval and can't be dropped
+                    if partition_name == "P_INITIAL" or not match:
+                        continue
+                    if datetime.fromisoformat(match[1]) > before:
+                        break
+                    await cursor.execute(
+                        f'ALTER TABLE {table} DROP PARTITION "{partition_name}" UPDATE GLOBAL INDEXES'
+                    )
+                    logger.info(f"Dropped partition {partition_name} of {table}")
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to remove expired {table} rows: {e}")
+            return False
+
+    async def store_build_controller(self, job_name: str, build_number: int, controller: str) -> bool:
+        """Record the Jenkins controller running a build"""
+        try:
+            await self._execute("""
+                MERGE INTO build_controllers b
+                USING (SELECT :1 AS job_name, :2 AS build_number, :3 AS controller FROM dual) s
+                ON (b.job_name = s.job_name AND b.build_number = s.build_number)
+                WHEN MATCHED THEN UPDATE SET b.controller = s.controller
+                WHEN NOT MATCHED THEN INSERT (job_name, build_number, controller)
+                    VALUES (s.job_name, s.build_number, s.controller)
+            """, (job_name, build_number, controller))
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to store build controller: {e}")
+            return False
+
+    async def get_build_controller(self, job_name: str, build_number: int) -> Optional[str]:
+        """Retrieve the Jenkins controller running a build"""
+        try:
+            row = await self._fetchone("""
+                SELECT controller
+                FROM build_controllers
+                WHERE job_name = :1 AND build_number = :2
+            """, (job_name, build_number))
+            return row[0] if row else None
+
+        except Exception as e:
+            logger.error(f"Failed to retrieve build controller: {e}")
+            return None
+
+    async def close(self) -> None:
+        """Close database connection pool"""
+        if self.pool is not None:
+            await self.pool.close()
+            self.pool = None
+            logger.info("Database connection closed")
@@ -0,0 +1,547 @@
+import asyncio
+import logging
+import re
+from datetime import datetime
+from decimal import Decimal
+from typing import Optional, Dict, Any, List, Sequence, Tuple
+
+import asyncpg
+
+from .. import serialization
+from ..config import settings
+from .base import (
+    FINDING_COLUMNS, SEVERITY_RANK, StorageBackend, ResultFilter, RETENTION_TABLES, ROLLUP_GRANULARITIES,
+    add_months, build_finding_filters, build_result_filters, indexed_result_keys, month_start, validate_granularity,
+    validate_retention_table
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _json_text(key: str) -> str:
+    return f"(results->>'{key}')"
+
+
+def _json_number(key: str) -> str:
+    # Non-numeric values compare as NULL instead of failing the cast
+    return (f"(CASE WHEN results->>'{key}' ~ '^-?[0-9]+(\\.[0-9]+)?$' "
+            f"THEN (results->>'{key}')::numeric END)")
+
+
+# Monthly partitions are named <table>_pYYYYMM
+_PARTITION_NAME = re.compile(r"_p(\d{4})(\d{2})$")
+
+# Months of partitions created ahead of the current one
+_PARTITIONS_AHEAD = 2
+
+# Rows removed per statement from tables that are not partitioned
+_DELETE_BATCH_SIZE = 10000
+
+_ROLLUP_BUCKETS = ", ".join(f"('{granularity}')" for granularity in ROLLUP_GRANULARITIES)
+
+
+def _row_to_result(row) -> Dict[str, Any]:
+    return {
+        "job_name": row["job_name"],
+        "build_number": row["build_number"],
+        "status": row["status"],
+        "results": serialization.loads(row["results"]) if row["results"] else {},
+        "timestamp": row["timestamp"]
+    }
+
+
+class PostgresStorageBackend(StorageBackend):
+    """PostgreSQL storage for scan results using the asyncpg driver"""
+
+    name = "postgres"
+
+    def __init__(self):
+        self.pool: Optional[asyncpg.Pool] = None
+        self._connect_lock = asyncio.Lock()
+
+    async def connect(self) -> None:
+        """Create the connection pool and tables"""
+        async with self._connect_lock:
+            if self.pool is None:
+                await self._create_pool()
+
+    async def _create_pool(self):
+        try:
+            self.pool = await asyncpg.create_pool(
+                host=settings.postgres_host,
+                port=settings.postgres_port,
+                database=settings.postgres_database,
+                user=settings.postgres_username,
+                password=settings.postgres_password,
+                min_size=settings.postgres_pool_min,
+                max_size=settings.postgres_pool_max,
+                # CURRENT_TIMESTAMP defaults store UTC, like the partition bounds and retention cutoffs
+                server_settings={"timezone": "UTC"},
+            )
+            await self._create_tables()
+            logger.info("Database connection established successfully")
+
+        except Exception as e:
+            logger.error(f"Failed to connect to database: {e}")
+            raise
+
+    async def _create_tables(self):
+        """Create necessary tables if they don't exist"""
+        async with self.pool.acquire() as conn:
+            # Results, logs and findings are range partitioned by month so retention can
+            # drop whole partitions; the partition key must be in the primary key
+            await conn.execute("""
+                CREATE TABLE IF NOT EXISTS scan_results (
+                    id BIGSERIAL,
+                    job_name VARCHAR(255) NOT NULL,
+                    build_number INTEGER NOT NULL,
+                    status VARCHAR(50) NOT NULL,
+                    results JSONB,
+                    timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (id, timestamp)
+                ) PARTITION BY RANGE (timestamp);
+                CREATE INDEX IF NOT EXISTS idx_scan_results_build
+                    ON scan_results (job_name, build_number);
+                CREATE INDEX IF NOT EXISTS idx_scan_results_timestamp
+                    ON scan_results (timestamp);
+
+                CREATE TABLE IF NOT EXISTS scan_logs (
+                    id BIGSERIAL,
+                    job_name VARCHAR(255) NOT NULL,
+                    build_number INTEGER NOT NULL,
+                    log_content TEXT,
+                    timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (id, timestamp)
+                ) PARTITION BY RANGE (timestamp);
+                CREATE INDEX IF NOT EXISTS idx_scan_logs_build
+                    ON scan_logs (job_name, build_number);
+                CREATE INDEX IF NOT EXISTS idx_scan_logs_timestamp
+                    ON scan_logs (timestamp, id);
+
+                CREATE TABLE IF NOT EXISTS scan_findings (
+                    id BIGSERIAL,
+                    job_name VARCHAR(255) NOT NULL,
+                    build_number INTEGER NOT NULL,
+                    artifact TEXT,
+                    tool VARCHAR(255) NOT NULL,
+                    rule_id VARCHAR(255) NOT NULL,
+                    severity VARCHAR(20) NOT NULL,
+                    component TEXT,
+                    location TEXT,
+                    message TEXT,
+                    timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (id, timestamp)
+                ) PARTITION BY RANGE (timestamp);
+                CREATE INDEX IF NOT EXISTS idx_scan_findings_build
+                    ON scan_findings (job_name, build_number);
+                CREATE INDEX IF NOT EXISTS idx_scan_findings_severity
+                    ON scan_findings (severity, job_name);
+                CREATE INDEX IF NOT EXISTS idx_scan_findings_rule
+                    ON scan_findings (rule_id);
+                CREATE INDEX IF NOT EXISTS idx_scan_findings_component
+                    ON scan_findings (component);
+                CREATE INDEX IF NOT EXISTS idx_scan_findings_timestamp
+                    ON scan_findings (timestamp);
+
+                -- Tables created before results became JSONB stored it as TEXT
+                DO $$
+                BEGIN
+                    IF (SELECT data_type FROM information_schema.columns
+                        WHERE table_name = 'scan_results' AND column_name = 'results') = 'text' THEN
+                        ALTER TABLE scan_results ALTER COLUMN results TYPE JSONB USING results::jsonb;
+                    END IF;
+                END $$;
+
+                CREATE INDEX IF NOT EXISTS idx_scan_results_json
+                    ON scan_results USING GIN (results jsonb_path_ops);
+
+                CREATE TABLE IF NOT EXISTS scan_result_rollups (
+                    job_name VARCHAR(255) NOT NULL,
+                    granularity VARCHAR(10) NOT NULL,
+                    bucket_start TIMESTAMP NOT NULL,
+                    status VARCHAR(50) NOT NULL,
+                    result_count BIGINT NOT NULL,
+                    PRIMARY KEY (granularity, bucket_start, job_name, status)
+                );
+                CREATE INDEX IF NOT EXISTS idx_scan_result_rollups_job
+                    ON scan_result_rollups (job_name, granularity, bucket_start);
+
+                CREATE TABLE IF NOT EXISTS build_controllers (
+                    job_name VARCHAR(255) NOT NULL,
+                    build_number INTEGER NOT NULL,
+                    controller VARCHAR(255) NOT NULL,
+                    PRIMARY KEY (job_name, build_number)
+                );
+            """)
+
+            # Expression indexes matching the filters built by query_scan_results
+            for key in indexed_result_keys():
+                await conn.execute(f"CREATE INDEX IF NOT EXISTS idx_scan_results_{key} ON scan_results ({_json_text(key)})")
+                await conn.execute(f"CREATE INDEX IF NOT EXISTS idx_scan_results_{key}_num ON scan_results ({_json_number(key)})")
+
+            # Tables created before partitioning stay plain tables; retention deletes from them instead
+            for table in RETENTION_TABLES:
+                if table in await self._partitioned_tables(conn):
+                    await conn.execute(f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT")
+                else:
+                    logger.warning(f"{table} is not partitioned; retention will delete its rows in batches")
+
+        await self.maintain_partitions(datetime.utcnow())
+
+    @staticmethod
+    async def _partitioned_tables(conn) -> set:
+        rows = await conn.fetch("""
+            SELECT relname FROM pg_class
+            WHERE relkind = 'p' AND relname = ANY($1::text[]) AND pg_table_is_visible(oid)
+        """, list(RETENTION_TABLES))
+        return {row["relname"] for row in rows}
+
+    async def _pool(self) -> asyncpg.Pool:
+        if self.pool is None:
+            await self.connect()
+        return self.pool
+
+    async def store_scan_result(self, job_name: str, build_number: int, status: str, results: Dict[str, str]) -> bool:
+        """Store scan result in database"""
+        try:
+            pool = await self._pool()
+            # Insert the result and count it into its hourly and daily buckets atomically
+            await pool.execute(f"""
+                WITH inserted AS (
+                    INSERT INTO scan_results (job_name, build_number, status, results)
+                    VALUES ($1, $2, $3, $4::jsonb)
+                    RETURNING job_name, status, timestamp
+                )
+                INSERT INTO scan_result_rollups (job_name, granularity, bucket_start, status, result_count)
+                SELECT i.job_name, b.granularity, date_trunc(b.granularity, i.timestamp), i.status, 1
+                FROM inserted i CROSS JOIN (VALUES {_ROLLUP_BUCKETS}) AS b (granularity)
+                ON CONFLICT (granularity, bucket_start, job_name, status)
+                DO UPDATE SET result_count = scan_result_rollups.result_count + 1
+            """, job_name, build_number, status, serialization.dumps(results))
+            logger.info(f"Stored scan result for {job_name}#{build_number}")
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to store scan result: {e}")
+            return False
+
+    async def get_scan_result(self, job_name: str, build_number: int) -> Optional[Dict[str, Any]]:
+        """Retrieve scan result from database"""
+        try:
+            pool = await self._pool()
+            row = await pool.fetchrow("""
+                SELECT job_name, build_number, status, results, timestamp
+                FROM scan_results
+                WHERE job_name = $1 AND build_number = $2
+                ORDER BY timestamp DESC, id DESC
+                LIMIT 1
+            """, job_name, build_number)
+
+            return _row_to_result(row) if row else None
+
+        except Exception as e:
+            logger.error(f"Failed to retrieve scan result: {e}")
+            return None
+
+    async def query_scan_results(
+        self,
+        filters: Sequence[ResultFilter] = (),
+        job_name: Optional[str] = None,
+        status: Optional[str] = None,
+        limit: int = 100,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Find scan results matching all filters, newest first"""
+        clauses, params = build_result_filters(filters, _json_text, _json_number, lambda n: f"${n}")
+        # asyncpg binds numeric parameters from Decimal
+        params = [Decimal(str(p)) if isinstance(p, float) else p for p in params]
+        if job_name is not None:
+            params.append(job_name)
+            clauses.append(f"job_name = ${len(params)}")
+        if status is not None:
+            params.append(status)
+            clauses.append(f"status = ${len(params)}")
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        params.append(limit)
+
+        try:
+            pool = await self._pool()
+            rows = await pool.fetch(f"""
+                SELECT job_name, build_number, status, results, timestamp
+                FROM scan_results
+                {where}
+                ORDER BY timestamp DESC, id DESC
+                LIMIT ${len(params)}
+            """, *params)
+            return [_row_to_result(row) for row in rows]
+
+        except Exception as e:
+            logger.error(f"Failed to query scan results: {e}")
+            return None
+
+    async def get_scan_stats(
+        self,
+        granularity: str = "day",
+        job_name: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Read result counts per job, bucket and status from the rollups"""
+        validate_granularity(granularity)
+        params: List[Any] = [granularity]
+        clauses = ["granularity = $1"]
+        if job_name is not None:
+            params.append(job_name)
+            clauses.append(f"job_name = ${len(params)}")
+        if since is not None:
+            params.append(since)
+            clauses.append(f"bucket_start >= ${len(params)}")
+        if until is not None:
+            params.append(until)
+            clauses.append(f"bucket_start < ${len(params)}")
+
+        try:
+            pool = await self._pool()
+            rows = await pool.fetch(f"""
+                SELECT job_name, bucket_start, status, result_count
+                FROM scan_result_rollups
+                WHERE {' AND '.join(clauses)}
+                ORDER BY bucket_start, job_name, status
+            """, *params)
+            return [
+                {"job_name": row["job_name"], "bucket_start": row["bucket_start"],
+                 "status": row["status"], "count": row["result_count"]}
+                for row in rows
+            ]
+
+        except Exception as e:
+            logger.error(f"Failed to read scan stats: {e}")
+            return None
+
+    async def rebuild_scan_rollups(self) -> bool:
+        """Recompute rollups from scan_results, keeping those older than its first row"""
+        try:
+            pool = await self._pool()
+            async with pool.acquire() as conn:
+                async with conn.transaction():
+                    # Block concurrent rollup updates so no callback is lost or counted twice
+                    await conn.execute("LOCK TABLE scan_result_rollups IN EXCLUSIVE MODE")
+                    await conn.execute("""
+                        DELETE FROM scan_result_rollups
+                        WHERE bucket_start >= (SELECT date_trunc('day', MIN(timestamp)) FROM scan_results)
+                    """)
+                    await conn.execute(f"""
+                        INSERT INTO scan_result_rollups (job_name, granularity, bucket_start, status, result_count)
+                        SELECT r.job_name, b.granularity, date_trunc(b.granularity, r.timestamp), r.status, COUNT(*)
+                        FROM scan_results r CROSS JOIN (VALUES {_ROLLUP_BUCKETS}) AS b (granularity)
+                        GROUP BY r.job_name, b.granularity, date_trunc(b.granularity, r.timestamp), r.status
+                    """)
+            logger.info("Rebuilt scan result rollups")
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to rebuild scan rollups: {e}")
+            return False
+
+    async def store_scan_log(self, job_name: str, build_number: int, log_content: str) -> bool:
+        """Store scan log in database"""
+        try:
+            pool = await self._pool()
+            await pool.execute("""
+                INSERT INTO scan_logs (job_name, build_number, log_content)
+                VALUES ($1, $2, $3)
+            """, job_name, build_number, log_content)
+            logger.info(f"Stored scan log for {job_name}#{build_number}")
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to store scan log: {e}")
+            return False
+
+    async def get_scan_log(self, job_name: str, build_number: int) -> Optional[str]:
+        """Retrieve scan log from database"""
+        try:
+            pool = await self._pool()
+            return await pool.fetchval("""
+                SELECT log_content
+                FROM scan_logs
+                WHERE job_name = $1 AND build_number = $2
+                ORDER BY timestamp DESC, id DESC
+                LIMIT 1
+            """, job_name, build_number)
+
+        except Exception as e:
+            logger.error(f"Failed to retrieve scan log: {e}")
+            return None
+
+    async def store_scan_findings(self, job_name: str, build_number: int, findings: Sequence[Dict[str, Any]]) -> bool:
+        """Replace the findings of a build in one transaction, copying the new rows in bulk"""
+        try:
+            pool = await self._pool()
+            async with pool.acquire() as conn:
+                async with conn.transaction():
+                    await conn.execute(
+                        "DELETE FROM scan_findings WHERE job_name = $1 AND build_number = $2", job_name, build_number
+                    )
+                    await conn.copy_records_to_table(
+                        "scan_findings",
+                        columns=FINDING_COLUMNS,
+                        records=[(job_name, build_number, *(finding.get(column) for column in FINDING_COLUMNS[2:]))
+                                 for finding in findings]
+                    )
+            logger.info(f"Stored {len(findings)} findings for {job_name}#{build_number}")
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to store scan findings: {e}")
+            return False
+
+    async def query_scan_findings(
+        self,
+        job_name: Optional[str] = None,
+        build_number: Optional[int] = None,
+        severities: Sequence[str] = (),
+        rule_id: Optional[str] = None,
+        component: Optional[str] = None,
+        limit: int = 100,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Find findings matching all criteria, most severe first"""
+        clauses, params = build_finding_filters(
+            lambda n: f"${n}", job_name, build_number, severities, rule_id, component
+        )
+        params.append(limit)
+
+        try:
+            pool = await self._pool()
+            rows = await pool.fetch(f"""
+                SELECT {', '.join(FINDING_COLUMNS)}
+                FROM scan_findings
+                WHERE {' AND '.join(clauses)}
+                ORDER BY {SEVERITY_RANK}, id
+                LIMIT ${len(params)}
+            """, *params)
+            return [dict(row) for row in rows]
+
+        except Exception as e:
+            logger.error(f"Failed to query scan findings: {e}")
+            return None
+
+    async def list_scan_logs_before(
+        self,
+        before: datetime,
+        after: Optional[Tuple[datetime, int]] = None,
+        limit: int = 100,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Page through logs stored before a time"""
+        try:
+            pool = await self._pool()
+            clauses, params = ["timestamp < $1"], [before]
+            if after is not None:
+                clauses.append("(timestamp > $2 OR (timestamp = $2 AND id > $3))")
+                params += list(after)
+            rows = await pool.fetch(f"""
+                SELECT id, job_name, build_number, timestamp, log_content
+                FROM scan_logs
+                WHERE {' AND '.join(clauses)}
+                ORDER BY timestamp, id
+                LIMIT ${len(params) + 1}
+            """, *params, limit)
+            return [dict(row) for row in rows]
+
+        except Exception as e:
+            logger.error(f"Failed to list expired scan logs: {e}")
+            return None
+
+    async def maintain_partitions(self, now: datetime) -> bool:
+        """Create monthly partitions from last month to a few months ahead"""
+        try:
+            pool = await self._pool()
+            async with pool.acquire() as conn:
+                partitioned = await self._partitioned_tables(conn)
+                for table in RETENTION_TABLES:
+                    if table not in partitioned:
+                        continue
+                    for offset in range(-1, _PARTITIONS_AHEAD + 1):
+                        start = add_months(month_start(now), offset)
+                        try:
+                            await conn.execute(f"""
+                                CREATE TABLE IF NOT EXISTS {table}_p{start:%Y%m} PARTITION OF {table}
+                                FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{add_months(start, 1):%Y-%m-%d}')
+                            """)
+                        except asyncpg.PostgresError as e:
+                            # Rows for this month already landed in the default partition
+                            logger.warning(f"Partition {table}_p{start:%Y%m} not created: {e}")
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to maintain partitions: {e}")
+            return False
+
+    async def drop_expired(self, table: str, before: datetime) -> bool:
+        """Drop monthly partitions that end by a time, or delete rows from an unpartitioned table"""
+        try:
+            validate_retention_table(table)
+            pool = await self._pool()
+            async with pool.acquire() as conn:
+                if table not in await self._partitioned_tables(conn):
+                    while await conn.execute(f"""
+                        DELETE FROM {table} WHERE ctid = ANY(ARRAY(
+                            SELECT ctid FROM {table} WHERE timestamp < $1 LIMIT {_DELETE_BATCH_SIZE}
+                        ))
+                    """, before) != "DELETE 0":
+                        pass
+                    logger.info(f"Deleted {table} rows before {before}")
+                    return True
+
+                partitions = await conn.fetch("""
+                    SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+                    WHERE i.inhparent = to_regclass($1)
+                """, table)
+                for partition in sorted(row["relname"] for row in partitions):
+                    match = _PARTITION_NAME.search(partition)
+                    if match and add_months(datetime(int(match[1]), int(match[2]), 1), 1) <= before:
+                        await conn.execute(f"DROP TABLE {partition}")
+                        logger.info(f"Dropped partition {partition}")
+                # Stray old rows outside the monthly partitions
+                await conn.execute(f"DELETE FROM {table}_default WHERE timestamp < $1", before)
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to remove expired {table} rows: {e}")
+            return False
+
+    async def store_build_controller(self, job_name: str, build_number: int, controller: str) -> bool:
+        """Record the Jenkins controller running a build"""
+        try:
+            pool = await self._pool()
+            await pool.execute("""
+                INSERT INTO build_controllers (job_name, build_number, controller)
+                VALUES ($1, $2, $3)
+                ON CONFLICT (job_name, build_number) DO UPDATE SET controller = EXCLUDED.controller
+            """, job_name, build_number, controller)
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to store build controller: {e}")
+            return False
+
+    async def get_build_controller(self, job_name: str, build_number: int) -> Optional[str]:
+        """Retrieve the Jenkins controller running a build"""
+        try:
+            pool = await self._pool()
+            return await pool.fetchval("""
+                SELECT controller
+                FROM build_controllers
+                WHERE job_name = $1 AND build_number = $2
+            """, job_name, build_number)
+
+        except Exception as e:
+            logger.error(f"Failed to retrieve build controller: {e}")
+            return None
+
+    async def close(self) -> None:
+        """Close the connection pool"""
+        if self.pool is not None:
+            await self.pool.close()
+            self.pool = None
+            logger.info("Database connection closed")
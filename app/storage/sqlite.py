@@ -0,0 +1,567 @@
+import asyncio
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Sequence, Tuple
+
+from .. import serialization
+from ..config import settings
+from .base import (
+    FINDING_COLUMNS, SEVERITY_RANK, StorageBackend, ResultFilter, build_finding_filters, build_result_filters,
+    indexed_result_keys, validate_granularity, validate_retention_table
+)
+
+logger = logging.getLogger(__name__)
+
+# Sentinel telling the writer thread to flush and exit
+_STOP = object()
+
+# Rows removed per write transaction when applying retention
+_DELETE_BATCH_SIZE = 1000
+
+
+def _json_text(key: str) -> str:
+    return f"json_extract(results, '$.{key}')"
+
+
+def _json_number(key: str) -> str:
+    # Non-numeric values compare as NULL, as on the server backends, instead of
+    # casting to 0.0; numeric text is -?[0-9]+(.[0-9]+)?, checked with GLOB
+    value = _json_text(key)
+    digits = f"(CASE WHEN substr({value}, 1, 1) = '-' THEN substr({value}, 2) ELSE {value} END)"
+    return (f"(CASE WHEN json_type(results, '$.{key}') IN ('integer', 'real') "
+            f"OR ({digits} GLOB '[0-9]*' AND {digits} NOT GLOB '*[^0-9.]*' "
+            f"AND {digits} NOT GLOB '*.*.*' AND {digits} NOT GLOB '*.') "
+            f"THEN CAST({value} AS REAL) END)")
+
+
+# strftime formats truncating a timestamp to each rollup bucket
+_BUCKET_FORMATS = {"hour": "%Y-%m-%d %H:00:00", "day": "%Y-%m-%d 00:00:00"}
+
+_ROLLUP_BUCKETS = " UNION ALL ".join(
+    f"SELECT '{granularity}' AS granularity, '{fmt}' AS fmt" for granularity, fmt in _BUCKET_FORMATS.items()
+)
+
+# Count the result row just inserted into its hourly and daily buckets
+_UPDATE_ROLLUPS = f"""
+    INSERT INTO scan_result_rollups (job_name, granularity, bucket_start, status, result_count)
+    SELECT r.job_name, b.granularity, strftime(b.fmt, r.timestamp), r.status, 1
+    FROM scan_results r, ({_ROLLUP_BUCKETS}) b
+    WHERE r.id = last_insert_rowid()
+    ON CONFLICT (job_name, granularity, bucket_start, status)
+    DO UPDATE SET result_count = result_count + 1
+"""
+
+
+def _timestamp(value: datetime) -> str:
+    """Format a datetime like the timestamps SQLite stores"""
+    return value.isoformat(sep=" ", timespec="milliseconds")
+
+
+def _row_to_result(row) -> Dict[str, Any]:
+    return {
+        "job_name": row[0],
+        "build_number": row[1],
+        "status": row[2],
+        "results": serialization.loads(row[3]) if row[3] else {},
+        "timestamp": datetime.fromisoformat(row[4])
+    }
+
+
+class SQLiteStorageBackend(StorageBackend):
+    """Embedded SQLite storage for scan results
+
+    The database runs in WAL mode so readers never block the writer. All
+    writes go through a single writer thread which groups concurrent inserts
+    into one transaction (up to ``sqlite_batch_size`` statements or
+    ``sqlite_batch_interval_ms`` of waiting), so a burst of callbacks costs
+    one fsync instead of one per row.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: Optional[str] = None, batch_size: Optional[int] = None,
+                 batch_interval_ms: Optional[int] = None):
+        self.path = path or settings.sqlite_path
+        self.batch_size = batch_size or settings.sqlite_batch_size
+        self.batch_interval = (batch_interval_ms if batch_interval_ms is not None
+                               else settings.sqlite_batch_interval_ms) / 1000.0
+        self._queue: "queue.Queue" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._local = threading.local()
+        self._readers: List[sqlite3.Connection] = []
+        self._start_lock = threading.Lock()
+
+    def _open(self) -> sqlite3.Connection:
+        """Open a connection with the pragmas every connection needs"""
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    async def connect(self) -> None:
+        """Create tables and start the writer thread"""
+        await asyncio.to_thread(self._start)
+
+    def _start(self):
+        with self._start_lock:
+            if self._writer is not None:
+                return
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+
+                conn = self._open()
+                self._create_tables(conn)
+
+                self._writer = threading.Thread(
+                    target=self._writer_loop, args=(conn,), name="sqlite-writer", daemon=True
+                )
+                self._writer.start()
+                logger.info(f"SQLite database opened at {self.path}")
+
+            except Exception as e:
+                logger.error(f"Failed to open SQLite database: {e}")
+                raise
+
+    def _create_tables(self, conn: sqlite3.Connection):
+        """Create necessary tables if they don't exist"""
+        with conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS scan_results (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    job_name TEXT NOT NULL,
+                    build_number INTEGER NOT NULL,
+                    status TEXT NOT NULL,
+                    results TEXT CHECK (results IS NULL OR json_valid(results)),
+                    timestamp TEXT DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now')),
+                    created_at TEXT DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now'))
+                );
+                CREATE INDEX IF NOT EXISTS idx_scan_results_build
+                    ON scan_results (job_name, build_number);
+                CREATE INDEX IF NOT EXISTS idx_scan_results_timestamp
+                    ON scan_results (timestamp);
+
+                CREATE TABLE IF NOT EXISTS scan_logs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    job_name TEXT NOT NULL,
+                    build_number INTEGER NOT NULL,
+                    log_content TEXT,
+                    timestamp TEXT DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now'))
+                );
+                CREATE INDEX IF NOT EXISTS idx_scan_logs_build
+                    ON scan_logs (job_name, build_number);
+                CREATE INDEX IF NOT EXISTS idx_scan_logs_timestamp
+                    ON scan_logs (timestamp, id);
+
+                CREATE TABLE IF NOT EXISTS scan_result_rollups (
+                    job_name TEXT NOT NULL,
+                    granularity TEXT NOT NULL,
+                    bucket_start TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    result_count INTEGER NOT NULL,
+                    PRIMARY KEY (granularity, bucket_start, job_name, status)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS idx_scan_result_rollups_job
+                    ON scan_result_rollups (job_name, granularity, bucket_start);
+
+                CREATE TABLE IF NOT EXISTS scan_findings (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    job_name TEXT NOT NULL,
+                    build_number INTEGER NOT NULL,
+                    artifact TEXT,
+                    tool TEXT NOT NULL,
+                    rule_id TEXT NOT NULL,
+                    severity TEXT NOT NULL,
+                    component TEXT,
+                    location TEXT,
+                    message TEXT,
+                    timestamp TEXT DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now'))
+                );
+                CREATE INDEX IF NOT EXISTS idx_scan_findings_build
+                    ON scan_findings (job_name, build_number);
+                CREATE INDEX IF NOT EXISTS idx_scan_findings_severity
+                    ON scan_findings (severity, job_name);
+                CREATE INDEX IF NOT EXISTS idx_scan_findings_rule
+                    ON scan_findings (rule_id);
+                CREATE INDEX IF NOT EXISTS idx_scan_findings_component
+                    ON scan_findings (component);
+                CREATE INDEX IF NOT EXISTS idx_scan_findings_timestamp
+                    ON scan_findings (timestamp);
+
+                CREATE TABLE IF NOT EXISTS build_controllers (
+                    job_name TEXT NOT NULL,
+                    build_number INTEGER NOT NULL,
+                    controller TEXT NOT NULL,
+                    PRIMARY KEY (job_name, build_number)
+                ) WITHOUT ROWID;
+            """)
+
+            # Expression indexes matching the filters built by query_scan_results
+            for key in indexed_result_keys():
+                conn.execute(f"CREATE INDEX IF NOT EXISTS idx_scan_results_{key} ON scan_results ({_json_text(key)})")
+                conn.execute(f"CREATE INDEX IF NOT EXISTS idx_scan_results_{key}_num ON scan_results ({_json_number(key)})")
+
+    def _writer_loop(self, conn: sqlite3.Connection):
+        """Drain the write queue, committing each batch in one transaction"""
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+
+            batch = [item]
+            stop = False
+            deadline = time.monotonic() + self.batch_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+
+            self._write_batch(conn, batch)
+            if stop:
+                break
+
+        conn.close()
+
+    def _write_batch(self, conn: sqlite3.Connection, batch: List[Tuple[List[Tuple[str, tuple]], Future]]):
+        try:
+            with conn:
+                for statements, _ in batch:
+                    for sql, params in statements:
+                        conn.execute(sql, params)
+            for _, future in batch:
+                future.set_result(True)
+        except Exception as e:
+            # Retry writes one by one so a single bad row doesn't fail the batch
+            logger.warning(f"Batched write failed, retrying individually: {e}")
+            for statements, future in batch:
+                try:
+                    with conn:
+                        for sql, params in statements:
+                            conn.execute(sql, params)
+                    future.set_result(True)
+                except Exception as row_error:
+                    future.set_exception(row_error)
+
+    async def _write(self, sql: str, params: tuple, *more: Tuple[str, tuple]):
+        """Queue statements for the writer thread and wait for their commit
+
+        All statements of one call are applied atomically.
+        """
+        if self._writer is None:
+            await self.connect()
+        future: Future = Future()
+        self._queue.put(([(sql, params), *more], future))
+        await asyncio.wrap_future(future)
+
+    def _reader(self) -> sqlite3.Connection:
+        """Return this thread's read connection"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._open()
+            self._local.conn = conn
+            self._readers.append(conn)
+        return conn
+
+    async def _read(self, sql: str, params: tuple):
+        if self._writer is None:
+            await self.connect()
+        return await asyncio.to_thread(lambda: self._reader().execute(sql, params).fetchone())
+
+    async def _read_all(self, sql: str, params: tuple):
+        if self._writer is None:
+            await self.connect()
+        return await asyncio.to_thread(lambda: self._reader().execute(sql, params).fetchall())
+
+    async def store_scan_result(self, job_name: str, build_number: int, status: str, results: Dict[str, str]) -> bool:
+        """Store scan result in database"""
+        try:
+            await self._write("""
+                INSERT INTO scan_results (job_name, build_number, status, results)
+                VALUES (?, ?, ?, ?)
+            """, (job_name, build_number, status, serialization.dumps(results)), (_UPDATE_ROLLUPS, ()))
+            logger.info(f"Stored scan result for {job_name}#{build_number}")
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to store scan result: {e}")
+            return False
+
+    async def get_scan_result(self, job_name: str, build_number: int) -> Optional[Dict[str, Any]]:
+        """Retrieve scan result from database"""
+        try:
+            row = await self._read("""
+                SELECT job_name, build_number, status, results, timestamp
+                FROM scan_results
+                WHERE job_name = ? AND build_number = ?
+                ORDER BY timestamp DESC, id DESC
+            """, (job_name, build_number))
+
+            return _row_to_result(row) if row else None
+
+        except Exception as e:
+            logger.error(f"Failed to retrieve scan result: {e}")
+            return None
+
+    async def query_scan_results(
+        self,
+        filters: Sequence[ResultFilter] = (),
+        job_name: Optional[str] = None,
+        status: Optional[str] = None,
+        limit: int = 100,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Find scan results matching all filters, newest first"""
+        clauses, params = build_result_filters(filters, _json_text, _json_number, lambda n: "?")
+        if job_name is not None:
+            clauses.append("job_name = ?")
+            params.append(job_name)
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(status)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        try:
+            rows = await self._read_all(f"""
+                SELECT job_name, build_number, status, results, timestamp
+                FROM scan_results
+                {where}
+                ORDER BY timestamp DESC, id DESC
+                LIMIT ?
+            """, (*params, limit))
+            return [_row_to_result(row) for row in rows]
+
+        except Exception as e:
+            logger.error(f"Failed to query scan results: {e}")
+            return None
+
+    async def get_scan_stats(
+        self,
+        granularity: str = "day",
+        job_name: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Read result counts per job, bucket and status from the rollups"""
+        validate_granularity(granularity)
+        clauses, params = ["granularity = ?"], [granularity]
+        if job_name is not None:
+            clauses.append("job_name = ?")
+            params.append(job_name)
+        if since is not None:
+            clauses.append("bucket_start >= ?")
+            params.append(since.strftime("%Y-%m-%d %H:%M:%S"))
+        if until is not None:
+            clauses.append("bucket_start < ?")
+            params.append(until.strftime("%Y-%m-%d %H:%M:%S"))
+
+        try:
+            rows = await self._read_all(f"""
+                SELECT job_name, bucket_start, status, result_count
+                FROM scan_result_rollups
+                WHERE {' AND '.join(clauses)}
+                ORDER BY bucket_start, job_name, status
+            """, tuple(params))
+            return [
+                {"job_name": row[0], "bucket_start": datetime.fromisoformat(row[1]),
+                 "status": row[2], "count": row[3]}
+                for row in rows
+            ]
+
+        except Exception as e:
+            logger.error(f"Failed to read scan stats: {e}")
+            return None
+
+    async def rebuild_scan_rollups(self) -> bool:
+        """Recompute rollups from scan_results, keeping those older than its first row"""
+        try:
+            await self._write("""
+                DELETE FROM scan_result_rollups
+                WHERE bucket_start >= (SELECT strftime('%Y-%m-%d 00:00:00', MIN(timestamp)) FROM scan_results)
+            """, (), (f"""
+                INSERT INTO scan_result_rollups (job_name, granularity, bucket_start, status, result_count)
+                SELECT r.job_name, b.granularity, strftime(b.fmt, r.timestamp), r.status, COUNT(*)
+                FROM scan_results r, ({_ROLLUP_BUCKETS}) b
+                GROUP BY r.job_name, b.granularity, strftime(b.fmt, r.timestamp), r.status
+            """, ()))
+            logger.info("Rebuilt scan result rollups")
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to rebuild scan rollups: {e}")
+            return False
+
+    async def store_scan_log(self, job_name: str, build_number: int, log_content: str) -> bool:
+        """Store scan log in database"""
+        try:
+            await self._write("""
+                INSERT INTO scan_logs (job_name, build_number, log_content)
+                VALUES (?, ?, ?)
+            """, (job_name, build_number, log_content))
+            logger.info(f"Stored scan log for {job_name}#{build_number}")
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to store scan log: {e}")
+            return False
+
+    async def get_scan_log(self, job_name: str, build_number: int) -> Optional[str]:
+        """Retrieve scan log from database"""
+        try:
+            row = await self._read("""
+                SELECT log_content
+                FROM scan_logs
+                WHERE job_name = ? AND build_number = ?
+                ORDER BY timestamp DESC, id DESC
+            """, (job_name, build_number))
+            return row[0] if row else None
+
+        except Exception as e:
+            logger.error(f"Failed to retrieve scan log: {e}")
+            return None
+
+    async def store_scan_findings(self, job_name: str, build_number: int, findings: Sequence[Dict[str, Any]]) -> bool:
+        """Replace the findings of a build in one write transaction"""
+        try:
+            insert = f"""
+                INSERT INTO scan_findings (job_name, build_number, {', '.join(FINDING_COLUMNS[2:])})
+                VALUES (?, ?, {', '.join('?' for _ in FINDING_COLUMNS[2:])})
+            """
+            await self._write(
+                "DELETE FROM scan_findings WHERE job_name = ? AND build_number = ?", (job_name, build_number),
+                *((insert, (job_name, build_number, *(finding.get(column) for column in FINDING_COLUMNS[2:])))
+                  for finding in findings)
+            )
+            logger.info(f"Stored {len(findings)} findings for {job_name}#{build_number}")
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to store scan findings: {e}")
+            return False
+
+    async def query_scan_findings(
+        self,
+        job_name: Optional[str] = None,
+        build_number: Optional[int] = None,
+        severities: Sequence[str] = (),
+        rule_id: Optional[str] = None,
+        component: Optional[str] = None,
+        limit: int = 100,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Find findings matching all criteria, most severe first"""
+        clauses, params = build_finding_filters(lambda n: "?", job_name, build_number, severities, rule_id, component)
+        try:
+            rows = await self._read_all(f"""
+                SELECT {', '.join(FINDING_COLUMNS)}
+                FROM scan_findings
+                WHERE {' AND '.join(clauses)}
+                ORDER BY {SEVERITY_RANK}, id
+                LIMIT ?
+            """, (*params, limit))
+            return [dict(zip(FINDING_COLUMNS, row)) for row in rows]
+
+        except Exception as e:
+            logger.error(f"Failed to query scan findings: {e}")
+            return None
+
+    async def list_scan_logs_before(
+        self,
+        before: datetime,
+        after: Optional[Tuple[datetime, int]] = None,
+        limit: int = 100,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Page through logs stored before a time"""
+        try:
+            clauses, params = ["timestamp < ?"], [_timestamp(before)]
+            if after is not None:
+                clauses.append("(timestamp > ? OR (timestamp = ? AND id > ?))")
+                params += [_timestamp(after[0]), _timestamp(after[0]), after[1]]
+            rows = await self._read_all(f"""
+                SELECT id, job_name, build_number, timestamp, log_content
+                FROM scan_logs
+                WHERE {' AND '.join(clauses)}
+                ORDER BY timestamp, id
+                LIMIT ?
+            """, (*params, limit))
+            return [
+                {"id": row[0], "job_name": row[1], "build_number": row[2],
+                 "timestamp": datetime.fromisoformat(row[3]), "log_content": row[4]}
+                for row in rows
+            ]
+
+        except Exception as e:
+            logger.error(f"Failed to list expired scan logs: {e}")
+            return None
+
+    async def maintain_partitions(self, now: datetime) -> bool:
+        """SQLite has no partitions; nothing to create"""
+        return True
+
+    async def drop_expired(self, table: str, before: datetime) -> bool:
+        """Delete rows stored before a time in batches, one write transaction each"""
+        try:
+            validate_retention_table(table)
+            cutoff = _timestamp(before)
+            while await self._read(f"SELECT 1 FROM {table} WHERE timestamp < ? LIMIT 1", (cutoff,)):
+                await self._write(f"""
+                    DELETE FROM {table}
+                    WHERE id IN (SELECT id FROM {table} WHERE timestamp < ? LIMIT {_DELETE_BATCH_SIZE})
+                """, (cutoff,))
+            logger.info(f"Removed {table} rows before {cutoff}")
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to remove expired {table} rows: {e}")
+            return False
+
+    async def store_build_controller(self, job_name: str, build_number: int, controller: str) -> bool:
+        """Record the Jenkins controller running a build"""
+        try:
+            await self._write("""
+                INSERT INTO build_controllers (job_name, build_number, controller)
+                VALUES (?, ?, ?)
+                ON CONFLICT (job_name, build_number) DO UPDATE SET controller = excluded.controller
+            """, (job_name, build_number, controller))
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to store build controller: {e}")
+            return False
+
+    async def get_build_controller(self, job_name: str, build_number: int) -> Optional[str]:
+        """Retrieve the Jenkins controller running a build"""
+        try:
+            row = await self._read("""
+                SELECT controller
+                FROM build_controllers
+                WHERE job_name = ? AND build_number = ?
+            """, (job_name, build_number))
+            return row[0] if row else None
+
+        except Exception as e:
+            logger.error(f"Failed to retrieve build controller: {e}")
+            return None
+
+    async def close(self) -> None:
+        """Flush pending writes and close connections"""
+        if self._writer is not None:
+            self._queue.put(_STOP)
+            await asyncio.to_thread(self._writer.join)
+            self._writer = None
+        for conn in self._readers:
+            conn.close()
+        self._readers.clear()
+        self._local = threading.local()
+        logger.info("Database connection closed")
@@ -0,0 +1,19 @@
+from uvicorn.workers import UvicornWorker
+
+from .serving import uvicorn_options
+
+_options = uvicorn_options()
+
+
+class ScanUvicornWorker(UvicornWorker):
+    """uvicorn worker for gunicorn with this app's event loop, HTTP parser and limits
+
+    Keep-alive, backlog and max_requests come from gunicorn's own settings.
+    """
+
+    CONFIG_KWARGS = {
+        "loop": _options["loop"],
+        "http": _options["http"],
+        "limit_concurrency": _options["limit_concurrency"],
+        "timeout_graceful_shutdown": _options["timeout_graceful_shutdown"],
+    }
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark the /api/scan/log response path.
+
+Compares the previous path (LogResponse model validated per line and
+encoded by FastAPI's default JSON encoder) with the orjson and raw text
+paths, and the size/time cost of gzip and brotli compression.
+
+    python benchmarks/bench_log_response.py [--lines 200000]
+"""
+
+import argparse
+import gzip
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse, PlainTextResponse
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.compression import brotli  # noqa: E402
+from app.models import LogResponse  # noqa: E402
+
+
+def build_app(log: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/model", response_model=LogResponse)
+    async def model_path():
+        return LogResponse(lines=log.split('\n'))
+
+    @app.get("/orjson", response_model=LogResponse)
+    async def orjson_path():
+        return ORJSONResponse({"lines": log.split('\n')})
+
+    @app.get("/text")
+    async def text_path():
+        return PlainTextResponse(log)
+
+    return app
+
+
+def timed(func, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=200_000, help="Number of log lines")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement (median is reported)")
+    args = parser.parse_args()
+
+    log = "\n".join(
+        f"[2024-01-01T10:{n // 60 % 60:02d}:{n % 60:02d}] INFO scanner step {n}: checked component lib-{n % 977}"
+        for n in range(args.lines)
+    )
+    client = TestClient(build_app(log))
+
+    print(f"Log: {args.lines} lines, {len(log) / 1e6:.1f} MB")
+    print(f"{'path':<10} {'median ms':>10} {'body MB':>9}")
+    baseline = None
+    for path in ("model", "orjson", "text"):
+        ms, response = timed(lambda: client.get(f"/{path}"), args.repeat)
+        baseline = baseline or ms
+        print(f"{path:<10} {ms:>10.1f} {len(response.content) / 1e6:>9.1f}   ({baseline / ms:.1f}x)")
+
+    body = client.get("/orjson").content
+    print(f"\n{'encoding':<10} {'median ms':>10} {'body MB':>9}")
+    for name, compress in (
+        ("gzip-6", lambda: gzip.compress(body, 6)),
+        ("gzip-9", lambda: gzip.compress(body, 9)),
+        ("br-4", lambda: brotli.compress(body, quality=4) if brotli else None),
+    ):
+        ms, compressed = timed(compress, args.repeat)
+        if compressed is None:
+            print(f"{name:<10} {'(brotli not installed)':>20}")
+            continue
+        print(f"{name:<10} {ms:>10.1f} {len(compressed) / 1e6:>9.2f}   ({len(body) / len(compressed):.0f}x smaller)")
+
+
+if __name__ == "__main__":
+    main()
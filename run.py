@@ -13,6 +13,7 @@ project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
 from app.config import settings
+from app import serving
 
 
 def main():
@@ -22,16 +23,30 @@ def main():
     print(f"🔧 Debug mode: {settings.debug}")
     print(f"📊 Log level: {settings.log_level}")
     print(f"🔗 Jenkins URL: {settings.jenkins_url}")
-    print(f"🗄️  Database: {settings.oracle_host}:{settings.oracle_port}/{settings.oracle_service}")
+    if settings.storage_backend == "sqlite":
+        print(f"🗄️  Database: sqlite {settings.sqlite_path}")
+    elif settings.storage_backend in ("postgres", "postgresql"):
+        print(f"🗄️  Database: postgres {settings.postgres_host}:{settings.postgres_port}/{settings.postgres_database}")
+    else:
+        print(f"🗄️  Database: oracle {settings.oracle_host}:{settings.oracle_port}/{settings.oracle_service}")
+    workers = 1 if settings.debug else serving.worker_count()
+    print(f"👷 Workers: {workers} ({serving.event_loop()}, {serving.http_protocol()})")
     print("-" * 50)
     
+    if workers > 1:
+        # gunicorn supervises the uvicorn workers, restarting them on crashes
+        # and after max_requests requests
+        serving.serve_workers(workers)
+        return
+    
     # Start the server
     uvicorn.run(
         "app.main:app",
         host=settings.host,
         port=settings.port,
         reload=settings.debug,
-        log_level=settings.log_level.lower()
+        log_level=settings.log_level.lower(),
+        **serving.uvicorn_options()
     )
 
 
@@ -0,0 +1,9 @@
+import os
+import tempfile
+
+# Run the API tests against an embedded SQLite database so they don't need Oracle,
+# with the API key the tests send. This must happen before app.config is imported.
+os.environ.setdefault("STORAGE_BACKEND", "sqlite")
+os.environ["API_KEY"] = "test-api-key"
+os.environ["API_KEYS"] = "[]"
+os.environ.setdefault("SQLITE_PATH", os.path.join(tempfile.mkdtemp(prefix="scan-api-tests-"), "scan.db"))
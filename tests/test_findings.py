@@ -0,0 +1,160 @@
+import os
+import tempfile
+from unittest.mock import AsyncMock, patch
+
+import orjson
+import pytest
+
+from app import findings
+from app.findings import extract_findings, report_artifacts
+from app.report_parsers import MAX_FIELD_BYTES, ReportFormatError, parse_report, parse_report_file
+
+SARIF = {
+    "$schema": "https://json.schemastore.org/sarif-2.1.0.json",
+    "version": "2.1.0",
+    "runs": [{
+        "tool": {"driver": {"name": "semgrep", "rules": [
+            {"id": "sql-injection", "properties": {"security-severity": "9.1"}},
+            {"id": "weak-hash", "defaultConfiguration": {"level": "note"}}
+        ]}},
+        "results": [
+            {
+                "ruleId": "sql-injection",
+                "ruleIndex": 0,
+                "message": {"text": "User input reaches a query"},
+                "locations": [{"physicalLocation": {
+                    "artifactLocation": {"uri": "src/db.py"}, "region": {"startLine": 42}
+                }}]
+            },
+            {"ruleId": "weak-hash", "message": {"text": "md5 used"}},
+            {"ruleId": "unlisted", "level": "error"}
+        ]
+    }]
+}
+
+CYCLONEDX = {
+    "bomFormat": "CycloneDX",
+    "specVersion": "1.5",
+    "metadata": {"tools": {"components": [{"name": "trivy"}]}},
+    "components": [
+        {"bom-ref": "pkg-a", "purl": "pkg:pypi/requests@2.19.0"},
+        {"bom-ref": "pkg-b", "name": "urllib3", "version": "1.24"}
+    ],
+    "vulnerabilities": [
+        {
+            "id": "CVE-2018-18074",
+            "ratings": [{"severity": "medium"}, {"severity": "high"}],
+            "description": "Credentials leak on redirect",
+            "affects": [{"ref": "pkg-a"}, {"ref": "pkg-b"}]
+        },
+        {"id": "CVE-2019-0001", "ratings": [{"score": 3.1}], "affects": [{"ref": "pkg-b"}]}
+    ]
+}
+
+
+class TestReportParsers:
+    """Normalizing SARIF and CycloneDX reports"""
+
+    def test_sarif(self):
+        rows = parse_report(SARIF)
+        assert rows[0] == {
+            "tool": "semgrep", "rule_id": "sql-injection", "severity": "critical",
+            "component": "src/db.py", "location": "src/db.py:42", "message": "User input reaches a query"
+        }
+        assert [row["severity"] for row in rows] == ["critical", "low", "high"]
+        assert rows[1]["component"] is None
+
+    def test_cyclonedx_one_finding_per_affected_component(self):
+        rows = parse_report(CYCLONEDX)
+        assert [(row["rule_id"], row["component"], row["severity"]) for row in rows] == [
+            ("CVE-2018-18074", "pkg:pypi/requests@2.19.0", "high"),
+            ("CVE-2018-18074", "urllib3@1.24", "high"),
+            ("CVE-2019-0001", "urllib3@1.24", "low"),
+        ]
+        assert {row["tool"] for row in rows} == {"trivy"}
+
+    def test_long_values_fit_columns_in_bytes(self):
+        uri = "src/" + "é" * 1500
+        report = {"version": "2.1.0", "runs": [{"tool": {"driver": {"name": "semgrep"}}, "results": [{
+            "ruleId": 12345,
+            "message": {"text": "✓" * 1000},
+            "locations": [{"physicalLocation": {"artifactLocation": {"uri": uri}, "region": {"startLine": 1}}}]
+        }]}]}
+
+        row = parse_report(report)[0]
+        assert row["rule_id"] == "12345"
+        for field in ("component", "location", "message"):
+            assert len(row[field].encode()) <= MAX_FIELD_BYTES[field]
+        assert row["component"] == uri[:4 + 498]
+        assert row["message"] == "✓" * 666
+
+    @pytest.mark.parametrize("report", [{}, [], {"bomFormat": "SPDX"}, {"runs": []}])
+    def test_rejects_unknown_formats(self, report):
+        with pytest.raises(ReportFormatError):
+            parse_report(report)
+
+    def test_rejects_invalid_json(self):
+        with tempfile.NamedTemporaryFile("wb", suffix=".sarif", delete=False) as report_file:
+            report_file.write(b"{not json")
+        try:
+            with pytest.raises(ReportFormatError):
+                parse_report_file(report_file.name)
+        finally:
+            os.remove(report_file.name)
+
+
+class TestExtractFindings:
+    """Downloading and parsing a build's report artifacts"""
+
+    def teardown_method(self):
+        findings.shutdown()
+
+    def test_report_artifacts(self):
+        paths = ["reports/scan.sarif", "target/bom.json", "sbom.cdx.json", "app.jar", "reports/Trivy.SARIF",
+                 "sarif/readme.txt"]
+        assert report_artifacts(paths) == ["reports/scan.sarif", "target/bom.json", "sbom.cdx.json",
+                                           "reports/Trivy.SARIF"]
+
+    @pytest.mark.asyncio
+    async def test_parses_reports_in_process_pool(self):
+        artifacts = {"out/scan.sarif": orjson.dumps(SARIF), "bom.json": orjson.dumps(CYCLONEDX),
+                     "broken.sarif": b"{", "app.jar": b"\0"}
+
+        def download(job_name, build_number, relative_path, destination, max_bytes, controller=None):
+            destination.write(artifacts[relative_path])
+            return True
+
+        with patch("app.findings.jenkins_client.list_artifacts", return_value=list(artifacts)), \
+                patch("app.findings.jenkins_client.download_artifact", side_effect=download) as mock_download, \
+                patch("app.findings.db_manager.store_scan_findings", new=AsyncMock(return_value=True)) as mock_store:
+            assert await extract_findings("test-scan", 7, controller="ci-a") is True
+
+        assert sorted(call.args[2] for call in mock_download.call_args_list) == ["bom.json", "broken.sarif",
+                                                                                 "out/scan.sarif"]
+        job_name, build_number, stored = mock_store.call_args.args
+        assert (job_name, build_number) == ("test-scan", 7)
+        assert [(row["artifact"], row["rule_id"]) for row in stored] == [
+            ("out/scan.sarif", "sql-injection"), ("out/scan.sarif", "weak-hash"), ("out/scan.sarif", "unlisted"),
+            ("bom.json", "CVE-2018-18074"), ("bom.json", "CVE-2018-18074"), ("bom.json", "CVE-2019-0001"),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_keeps_most_severe_over_limit(self):
+        def download(job_name, build_number, relative_path, destination, max_bytes, controller=None):
+            destination.write(orjson.dumps(SARIF))
+            return True
+
+        with patch("app.findings.settings.findings_max_per_build", 2), \
+                patch("app.findings.jenkins_client.list_artifacts", return_value=["scan.sarif"]), \
+                patch("app.findings.jenkins_client.download_artifact", side_effect=download), \
+                patch("app.findings.db_manager.store_scan_findings", new=AsyncMock(return_value=True)) as mock_store:
+            assert await extract_findings("test-scan", 7) is True
+
+        assert [row["severity"] for row in mock_store.call_args.args[2]] == ["critical", "high"]
+
+    @pytest.mark.asyncio
+    async def test_unreachable_jenkins_stores_nothing(self):
+        with patch("app.findings.jenkins_client.list_artifacts", return_value=None), \
+                patch("app.findings.db_manager.store_scan_findings", new=AsyncMock()) as mock_store:
+            assert await extract_findings("test-scan", 7) is False
+        mock_store.assert_not_called()
@@ -0,0 +1,64 @@
+from unittest.mock import patch
+
+from app.config import JenkinsControllerSettings
+from app.jenkins_client import JenkinsControllerRegistry
+
+
+def make_registry(*controllers):
+    return JenkinsControllerRegistry([JenkinsControllerSettings(**controller) for controller in controllers])
+
+
+def load(queued=0, busy=0, total=4):
+    return {"queued": queued, "busy_executors": busy, "total_executors": total}
+
+
+class TestJenkinsControllerRegistry:
+    """Routing of Jenkins calls across controllers"""
+
+    def test_single_controller_from_legacy_settings(self):
+        registry = make_registry({"name": "default", "url": "http://jenkins:8080"})
+        assert [client.name for client in registry.candidates("any-job")] == ["default"]
+
+    def test_job_patterns_take_precedence(self):
+        registry = make_registry(
+            {"name": "general", "url": "http://a"},
+            {"name": "security", "url": "http://b", "jobs": ["sec-*"]},
+        )
+        assert [client.name for client in registry.candidates("sec-scan")] == ["security"]
+        assert [client.name for client in registry.candidates("lint")] == ["general"]
+
+    def test_selects_least_loaded_controller(self):
+        registry = make_registry(
+            {"name": "a", "url": "http://a"},
+            {"name": "b", "url": "http://b", "capacity": 10},
+        )
+        loads = {"a": load(queued=2, busy=4), "b": load(busy=4)}
+        with patch("app.jenkins_client.JenkinsClient.get_load", autospec=True,
+                   side_effect=lambda client: loads[client.name]):
+            assert registry.select_controller("scan").name == "b"
+
+    def test_unreachable_controller_is_skipped(self):
+        registry = make_registry({"name": "a", "url": "http://a"}, {"name": "b", "url": "http://b"})
+        loads = {"a": None, "b": load(queued=50)}
+        with patch("app.jenkins_client.JenkinsClient.get_load", autospec=True,
+                   side_effect=lambda client: loads[client.name]):
+            assert registry.select_controller("scan").name == "b"
+
+    def test_triggers_count_until_load_refresh(self):
+        registry = make_registry({"name": "a", "url": "http://a"}, {"name": "b", "url": "http://b"})
+        triggered = {"status": "triggered", "job_name": "scan", "build_number": 1, "jenkins_url": "x"}
+        with patch("app.jenkins_client.JenkinsClient.get_load", return_value=load(total=1)) as get_load, \
+                patch("app.jenkins_client.JenkinsClient.trigger_job", autospec=True,
+                      side_effect=lambda client, job, params: dict(triggered, controller=client.name)):
+            chosen = [registry.trigger_job("scan", {})["controller"] for _ in range(4)]
+
+        # Load is fetched once per controller, then local triggers spread the work
+        assert get_load.call_count == 2
+        assert sorted(chosen) == ["a", "a", "b", "b"]
+
+    def test_resolve_probes_candidates_without_controller(self):
+        registry = make_registry({"name": "a", "url": "http://a"}, {"name": "b", "url": "http://b"})
+        with patch("app.jenkins_client.JenkinsClient.build_exists", autospec=True,
+                   side_effect=lambda client, job, build: client.name == "b"):
+            assert registry.resolve("scan", 5).name == "b"
+        assert registry.resolve("scan", 5, controller="a").name == "a"
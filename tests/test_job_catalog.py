@@ -0,0 +1,130 @@
+from unittest.mock import patch
+
+import pytest
+
+from app.config import JenkinsControllerSettings
+from app.jenkins_client import JenkinsControllerRegistry
+from app.job_catalog import JobCatalog, JobValidationError, UnknownJobError, parse_job
+
+SCAN_JOB = {
+    "name": "ci-nexus-scan",
+    "buildable": True,
+    "property": [
+        {},
+        {
+            "parameterDefinitions": [
+                {"name": "nexusURL", "type": "StringParameterDefinition", "defaultParameterValue": None},
+                {"name": "profile", "type": "ChoiceParameterDefinition", "choices": ["quick", "full"],
+                 "defaultParameterValue": {"value": "quick"}},
+                {"name": "failOnHigh", "type": "BooleanParameterDefinition",
+                 "defaultParameterValue": {"value": False}},
+            ]
+        },
+    ],
+}
+
+
+def make_catalog(jobs_by_controller):
+    registry = JenkinsControllerRegistry([
+        JenkinsControllerSettings(name=name, url=f"http://{name}") for name in jobs_by_controller
+    ])
+    return JobCatalog(registry), jobs_by_controller
+
+
+class TestJobCatalog:
+    """Job definitions and trigger validation"""
+
+    def test_parse_job(self):
+        job = parse_job(SCAN_JOB)
+        parameters = {parameter.name: parameter for parameter in job.parameters}
+
+        assert parameters["nexusURL"].required is True
+        assert parameters["profile"].default == "quick"
+        assert parameters["profile"].choices == ("quick", "full")
+        assert parameters["failOnHigh"].default == "false"
+        assert parameters["failOnHigh"].required is False
+
+    def test_validation_skipped_until_loaded(self):
+        catalog, _ = make_catalog({"a": []})
+        catalog.validate("anything", {"x": "y"})
+
+    def test_validate_parameters(self):
+        catalog, jobs = make_catalog({"a": [SCAN_JOB]})
+        with patch("app.jenkins_client.JenkinsClient.get_jobs", autospec=True,
+                   side_effect=lambda client: jobs[client.name]):
+            assert catalog.refresh() is True
+
+        catalog.validate("ci-nexus-scan", {"nexusURL": "https://nexus/a", "profile": "full"})
+
+        with pytest.raises(UnknownJobError):
+            catalog.validate("ci-nexus-scna", {"nexusURL": "https://nexus/a"})
+        with pytest.raises(JobValidationError, match="Missing required parameter: nexusURL"):
+            catalog.validate("ci-nexus-scan", {})
+        with pytest.raises(JobValidationError, match="Unknown parameter: nexusUrl"):
+            catalog.validate("ci-nexus-scan", {"nexusURL": "x", "nexusUrl": "x"})
+        with pytest.raises(JobValidationError, match="must be one of quick, full"):
+            catalog.validate("ci-nexus-scan", {"nexusURL": "x", "profile": "deep"})
+        with pytest.raises(JobValidationError, match="must be true or false"):
+            catalog.validate("ci-nexus-scan", {"nexusURL": "x", "failOnHigh": "yes"})
+
+    def test_disabled_job_rejected(self):
+        catalog, jobs = make_catalog({"a": [dict(SCAN_JOB, buildable=False)]})
+        with patch("app.jenkins_client.JenkinsClient.get_jobs", autospec=True,
+                   side_effect=lambda client: jobs[client.name]):
+            catalog.refresh()
+
+        with pytest.raises(JobValidationError, match="disabled"):
+            catalog.validate("ci-nexus-scan", {"nexusURL": "x"})
+
+    def test_failed_refresh_keeps_last_catalog(self):
+        catalog, jobs = make_catalog({"a": [SCAN_JOB]})
+        with patch("app.jenkins_client.JenkinsClient.get_jobs", autospec=True,
+                   side_effect=lambda client: jobs[client.name]):
+            catalog.refresh()
+        version = catalog.version
+
+        with patch("app.jenkins_client.JenkinsClient.get_jobs", return_value=None):
+            assert catalog.refresh() is False
+        assert catalog.version == version
+        assert catalog.get("ci-nexus-scan") is not None
+
+    def test_unchanged_refresh_keeps_listing(self):
+        catalog, jobs = make_catalog({"a": [SCAN_JOB], "b": [SCAN_JOB, {"name": "lint"}]})
+        with patch("app.jenkins_client.JenkinsClient.get_jobs", autospec=True,
+                   side_effect=lambda client: jobs[client.name]):
+            catalog.refresh()
+            etag, body = catalog.listing()
+            catalog.refresh()
+
+        assert catalog.listing() == (etag, body)
+        assert [job["name"] for job in body["jobs"]] == ["ci-nexus-scan", "lint"]
+        assert body["jobs"][0]["controllers"] == ["a", "b"]
+        assert catalog.controllers_for("lint") == ["b"]
+
+    def test_missing_job_looked_up_once(self):
+        catalog, jobs = make_catalog({"a": [SCAN_JOB]})
+        with patch("app.jenkins_client.JenkinsClient.get_jobs", autospec=True,
+                   side_effect=lambda client: jobs[client.name]):
+            catalog.refresh()
+
+        with patch("app.jenkins_client.JenkinsClient.get_job", return_value=None) as get_job:
+            assert catalog.refresh_job("new-job") is False
+            assert catalog.refresh_job("new-job") is False
+        assert get_job.call_count == 1
+
+        with patch("app.jenkins_client.JenkinsClient.get_job", return_value={"name": "other-job"}):
+            assert catalog.refresh_job("other-job") is True
+        catalog.validate("other-job", {})
+
+    def test_remembered_misses_are_bounded(self):
+        catalog, _ = make_catalog({"a": [SCAN_JOB]})
+        with patch("app.job_catalog.MAX_REMEMBERED_MISSES", 3), \
+                patch("app.jenkins_client.JenkinsClient.get_job", return_value=None) as get_job:
+            for n in range(5):
+                catalog.refresh_job(f"job-{n}")
+            assert list(catalog._misses) == ["job-2", "job-3", "job-4"]
+
+            # The least recently missed names are looked up again
+            catalog.refresh_job("job-0")
+            catalog.refresh_job("job-4")
+        assert get_job.call_count == 6
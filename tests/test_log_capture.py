@@ -0,0 +1,184 @@
+import os
+import tempfile
+import time
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.log_capture import log_capture
+from app.main import app
+
+client = TestClient(app)
+
+
+class FakeJenkinsLog:
+    """A build log growing like Jenkins' progressiveText"""
+
+    def __init__(self):
+        self.log = b""
+        self.more_data = True
+        self.starts = []
+
+    def fetch(self, job_name, build_number, start, destination, controller=None):
+        self.starts.append(start)
+        destination.write(self.log[start:])
+        return len(self.log), self.more_data
+
+
+@pytest.fixture
+def jenkins_log():
+    fake = FakeJenkinsLog()
+    with patch("app.log_capture.settings.log_capture_dir", tempfile.mkdtemp(prefix="scan-log-capture-")), \
+            patch("app.log_capture.jenkins_client.fetch_progressive_log", side_effect=fake.fetch):
+        yield fake
+
+
+class TestLogCapture:
+    """Capturing build logs by byte offset"""
+
+    def test_fetches_only_new_bytes(self, jenkins_log):
+        jenkins_log.log = "line 1\nstatus ✓\n".encode()
+        assert log_capture.read("test-scan", 1) == "line 1\nstatus ✓\n"
+
+        jenkins_log.log += b"line 3\nline 4"
+        assert log_capture.read("test-scan", 1, tail=2) == "line 3\nline 4"
+        assert jenkins_log.starts == [0, len("line 1\nstatus ✓\n".encode())]
+
+        jenkins_log.more_data = False
+        assert log_capture.update("test-scan", 1) is True
+        assert jenkins_log.starts[-1] == len(jenkins_log.log)
+
+    def test_builds_are_captured_separately(self, jenkins_log):
+        jenkins_log.log = b"log"
+        log_capture.read("folder/test-scan", 1)
+        log_capture.read("folder/test-scan", 1, controller="ci-b")
+        assert jenkins_log.starts == [0, 0]
+        assert log_capture.path("folder/test-scan", 1, "default") != log_capture.path("folder/test-scan", 1, "ci-b")
+
+    def test_recaptures_log_out_of_sync(self, jenkins_log):
+        jenkins_log.log = b"first attempt\n"
+        log_capture.read("test-scan", 1)
+
+        jenkins_log.log = b"new\n"
+        assert log_capture.read("test-scan", 1) == "new\n"
+        assert jenkins_log.starts == [0, 14, 0]
+
+    def test_failed_fetch_keeps_captured_log(self, jenkins_log):
+        jenkins_log.log = b"captured\n"
+        log_capture.read("test-scan", 1)
+
+        def fail(job_name, build_number, start, destination, controller=None):
+            destination.write(b"partial")
+            return None
+
+        with patch("app.log_capture.jenkins_client.fetch_progressive_log", side_effect=fail):
+            assert log_capture.read("test-scan", 1) is None
+        assert os.path.getsize(log_capture.path("test-scan", 1, "default")) == len(b"captured\n")
+
+    def test_prune_removes_stale_logs(self, jenkins_log):
+        log_capture.read("stale-scan", 1)
+        log_capture.read("test-scan", 2)
+        old = time.time() - 3 * 3600
+        os.utime(log_capture.path("stale-scan", 1, "default"), (old, old))
+
+        assert log_capture.prune(3600) == 1
+        assert not os.path.exists(os.path.dirname(log_capture.path("stale-scan", 1, "default")))
+        assert os.path.exists(log_capture.path("test-scan", 2, "default"))
+
+    @patch('app.routers.scan.extract_findings_safely')
+    @patch('app.database.db_manager.store_scan_log')
+    @patch('app.database.db_manager.store_scan_result')
+    def test_callback_fetches_only_the_tail(self, mock_store_result, mock_store_log, mock_extract, jenkins_log):
+        mock_store_result.return_value = True
+        mock_store_log.return_value = True
+        headers = {"Authorization": "Bearer test-api-key"}
+
+        jenkins_log.log = b"compiling\n"
+        response = client.get("/api/scan/log?job_name=test-scan&build_number=9&format=text", headers=headers)
+        assert response.text == "compiling\n"
+
+        jenkins_log.log += b"done\n"
+        jenkins_log.more_data = False
+        response = client.post(
+            "/api/scan/callback",
+            json={"job_name": "test-scan", "build_number": 9, "status": "SUCCESS", "results": {}},
+            headers=headers
+        )
+
+        assert response.status_code == 200
+        assert jenkins_log.starts == [0, len(b"compiling\n")]
+        mock_store_log.assert_called_once_with("test-scan", 9, "compiling\ndone\n")
+        assert not os.path.exists(log_capture.path("test-scan", 9, "default"))
+
+    @patch('app.routers.scan.extract_findings_safely')
+    def test_log_after_early_callback_stays_live(self, mock_extract, jenkins_log):
+        headers = {"Authorization": "Bearer test-api-key"}
+        url = "/api/scan/log?job_name=early-scan&build_number=10&format=text"
+
+        # The pipeline calls back before its post-build steps finished logging
+        jenkins_log.log = b"scanning\n"
+        response = client.post(
+            "/api/scan/callback",
+            json={"job_name": "early-scan", "build_number": 10, "status": "SUCCESS", "results": {}},
+            headers=headers
+        )
+        assert response.status_code == 200
+        assert os.path.exists(log_capture.path("early-scan", 10, "default"))
+
+        jenkins_log.log += b"archiving\n"
+        response = client.get(url, headers=headers)
+        assert response.text == "scanning\narchiving\n"
+        assert response.headers["cache-control"] == "no-cache"
+
+        jenkins_log.log += b"done\n"
+        jenkins_log.more_data = False
+        response = client.get(url, headers=headers)
+        assert response.text == "scanning\narchiving\ndone\n"
+        assert "immutable" in response.headers["cache-control"]
+        assert not os.path.exists(log_capture.path("early-scan", 10, "default"))
+
+        # The complete log was stored and is served from the database from now on
+        response = client.get(url, headers=headers)
+        assert response.text == "scanning\narchiving\ndone\n"
+        assert jenkins_log.starts == [0, 9, 19]
+
+    def test_reads_naming_the_controller_share_the_capture(self, jenkins_log):
+        jenkins_log.log = b"compiling\n"
+        log_capture.read("test-scan", 12)
+        jenkins_log.log += b"done\n"
+        assert log_capture.read("test-scan", 12, controller="default") == "compiling\ndone\n"
+        assert jenkins_log.starts == [0, len(b"compiling\n")]
+
+    @patch('app.database.db_manager.get_scan_log')
+    @patch('app.database.db_manager.get_scan_result')
+    def test_finished_build_log_is_served_as_stored(self, mock_get_result, mock_get_log, jenkins_log):
+        mock_get_result.return_value = {"job_name": "test-scan", "build_number": 9, "status": "SUCCESS"}
+        mock_get_log.return_value = "compiling\ndone\n"
+
+        response = client.get(
+            "/api/scan/log?job_name=test-scan&build_number=9&format=text",
+            headers={"Authorization": "Bearer test-api-key"}
+        )
+
+        assert response.text == "compiling\ndone\n"
+        assert jenkins_log.starts == []
+        assert not os.path.exists(log_capture.path("test-scan", 9, "default"))
+
+    @patch('app.jenkins_client.jenkins_client.get_build_logs')
+    @patch('app.database.db_manager.get_scan_log')
+    @patch('app.database.db_manager.get_scan_result')
+    def test_finished_build_without_stored_log_is_not_captured(self, mock_get_result, mock_get_log, mock_get_logs,
+                                                                jenkins_log):
+        mock_get_result.return_value = {"job_name": "test-scan", "build_number": 9, "status": "SUCCESS"}
+        mock_get_log.return_value = None
+        mock_get_logs.return_value = "compiling\ndone\n"
+
+        response = client.get(
+            "/api/scan/log?job_name=test-scan&build_number=9&format=text",
+            headers={"Authorization": "Bearer test-api-key"}
+        )
+
+        assert response.text == "compiling\ndone\n"
+        assert jenkins_log.starts == []
+        assert not os.path.exists(log_capture.path("test-scan", 9, "default"))
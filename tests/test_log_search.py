@@ -0,0 +1,75 @@
+import pytest
+
+from app.log_search import LogSearchError, build_matcher, search_lines, split_lines
+
+LOG = "\n".join([
+    "Build started",
+    "Step 1 completed",
+    "ERROR: dependency missing",
+    "Step 2 completed",
+    "Step 3 completed",
+    "error: retrying",
+    "Build finished",
+])
+
+
+def numbers(result, match=None):
+    return [line["line_number"] for line in result["lines"] if match is None or line["match"] == match]
+
+
+class TestLogSearch:
+    """Test cases for the log search helpers"""
+
+    def test_split_lines_matches_str_split(self):
+        for text in ["", "a", "a\nb", "a\nb\n", "\n\n"]:
+            assert list(split_lines(text)) == text.split("\n")
+
+    def test_substring_search(self):
+        result = search_lines(split_lines(LOG), build_matcher("ERROR"))
+        assert numbers(result) == [3]
+        assert result["lines"][0]["text"] == "ERROR: dependency missing"
+        assert result["lines_scanned"] == 7
+        assert result["truncated"] is False
+
+    def test_ignore_case(self):
+        result = search_lines(split_lines(LOG), build_matcher("error", ignore_case=True))
+        assert numbers(result) == [3, 6]
+
+    def test_regex_search(self):
+        result = search_lines(split_lines(LOG), build_matcher(r"^Step [13]", use_regex=True))
+        assert numbers(result) == [2, 5]
+
+    def test_context_lines_are_merged(self):
+        result = search_lines(split_lines(LOG), build_matcher("error", ignore_case=True), context=1)
+        assert numbers(result) == [2, 3, 4, 5, 6, 7]
+        assert numbers(result, match=True) == [3, 6]
+
+    def test_max_matches(self):
+        result = search_lines(split_lines(LOG), build_matcher("Step"), max_matches=2)
+        assert numbers(result) == [2, 4]
+        assert result["truncated_reason"] == "max_matches"
+
+    def test_max_bytes(self):
+        result = search_lines(split_lines(LOG), build_matcher("Build"), max_bytes=40)
+        assert numbers(result) == [1]
+        assert result["truncated_reason"] == "max_bytes"
+        # The line that would exceed the budget wasn't scanned
+        assert result["bytes_scanned"] == len("Build started\nStep 1 completed\n")
+        assert result["lines_scanned"] == 2
+
+    def test_long_lines_are_returned_truncated(self):
+        lines = ["ERROR " + "x" * 100, "ERROR short"]
+        result = search_lines(lines, build_matcher("ERROR"), max_line_length=20)
+        assert [line["text"] for line in result["lines"]] == ["ERROR " + "x" * 14, "ERROR short"]
+        assert [line["truncated"] for line in result["lines"]] == [True, False]
+
+    def test_pathological_regex_times_out(self):
+        lines = ["x" * 5000] * 10
+        result = search_lines(lines, build_matcher(r"(x+x+)+y", use_regex=True), timeout=0.2)
+        assert result["truncated_reason"] == "timeout"
+        assert result["match_count"] == 0
+
+    @pytest.mark.parametrize("pattern,use_regex", [("", False), ("(unclosed", True), ("x" * 2000, False)])
+    def test_invalid_pattern(self, pattern, use_regex):
+        with pytest.raises(LogSearchError):
+            build_matcher(pattern, use_regex)
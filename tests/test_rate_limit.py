@@ -0,0 +1,96 @@
+import hashlib
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.auth import reset_api_clients
+from app.config import ApiKeySettings
+from app.main import app
+from app.rate_limit import TokenBucket
+
+client = TestClient(app)
+
+
+def api_key(name, key, **options):
+    return ApiKeySettings(name=name, key_sha256=hashlib.sha256(key.encode()).hexdigest(), **options)
+
+
+KEYS = [
+    api_key("ci", "ci-key", priority="critical"),
+    api_key("dashboard", "dashboard-key", priority="bulk", rate_per_second=0.01, burst=2),
+]
+
+
+@pytest.fixture
+def named_keys():
+    with patch('app.auth.settings.api_keys', KEYS):
+        reset_api_clients()
+        yield
+    reset_api_clients()
+
+
+class TestTokenBucket:
+    """Token bucket refill and burst"""
+
+    def test_burst_then_refill(self):
+        bucket = TokenBucket(rate=2.0, burst=3)
+        assert [bucket.take(now=100.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+        assert bucket.take(now=100.0) == 0.5
+        assert bucket.take(now=100.5) == 0.0
+
+    def test_refill_is_capped_at_burst(self):
+        bucket = TokenBucket(rate=10.0, burst=2)
+        bucket.take(now=0.0)
+        assert [bucket.take(now=60.0) for _ in range(3)] == [0.0, 0.0, 0.1]
+
+
+class TestApiKeys:
+    """Named, hashed API keys with per-key rate limits"""
+
+    @patch('app.database.db_manager.get_scan_result')
+    def test_rate_limit_per_key(self, mock_get_result, named_keys):
+        mock_get_result.return_value = {
+            "job_name": "j", "build_number": 1, "status": "SUCCESS", "results": {}, "timestamp": "2024-01-01T00:00:00"
+        }
+        dashboard = {"Authorization": "Bearer dashboard-key"}
+
+        responses = [client.get("/api/scan/result?job_name=j&build_number=1", headers=dashboard) for _ in range(3)]
+        assert [response.status_code for response in responses] == [200, 200, 429]
+        assert int(responses[2].headers["retry-after"]) > 0
+
+        # Other keys have their own limits
+        response = client.get("/api/scan/result?job_name=j&build_number=1", headers={"Authorization": "Bearer ci-key"})
+        assert response.status_code == 200
+
+    def test_legacy_key_disabled_by_named_keys(self, named_keys):
+        response = client.get("/api/scan/jobs", headers={"Authorization": "Bearer test-api-key"})
+        assert response.status_code == 401
+
+    @patch('app.routers.scan.jenkins_scheduler.run')
+    @patch('app.jenkins_client.jenkins_client.get_build_logs')
+    def test_calls_scheduled_at_key_and_endpoint_priority(self, mock_get_logs, mock_run, named_keys):
+        mock_run.return_value = None
+        ci = {"Authorization": "Bearer ci-key"}
+
+        client.get("/api/scan/status?job_name=j&build_number=1", headers=ci)
+        client.get("/api/scan/log?job_name=j&build_number=1", headers=ci)
+        assert [call.args[:2] for call in mock_run.call_args_list] == [("interactive", "ci"), ("bulk", "ci")]
+        assert [call.kwargs["reserved"] for call in mock_run.call_args_list] == [False, False]
+
+    @patch('app.routers.scan.jenkins_scheduler.run')
+    @patch('app.database.db_manager.store_scan_result')
+    def test_legacy_key_callbacks_use_reserved_slots(self, mock_store_result, mock_run):
+        mock_store_result.return_value = True
+        mock_run.return_value = None
+
+        response = client.post(
+            "/api/scan/callback",
+            json={"job_name": "j", "build_number": 1, "status": "SUCCESS", "results": {}},
+            headers={"Authorization": "Bearer test-api-key"}
+        )
+
+        assert response.status_code == 200
+        log_read = mock_run.call_args_list[0]
+        assert log_read.args[:2] == ("interactive", "default")
+        assert log_read.kwargs["reserved"] is True
@@ -0,0 +1,80 @@
+import gzip
+import json
+import os
+import tempfile
+import uuid
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+import pytest_asyncio
+
+from app.retention import apply_retention, retention_cutoff
+from app.storage.sqlite import SQLiteStorageBackend
+
+
+@pytest_asyncio.fixture
+async def storage():
+    path = os.path.join(tempfile.mkdtemp(prefix="scan-retention-"), "scan.db")
+    backend = SQLiteStorageBackend(path=path)
+    await backend.connect()
+    with patch("app.retention.db_manager", backend):
+        yield backend
+    await backend.close()
+
+
+async def insert_log(storage, job, build_number, timestamp):
+    await storage._write(
+        "INSERT INTO scan_logs (job_name, build_number, log_content, timestamp) VALUES (?, ?, ?, ?)",
+        (job, build_number, f"log of {build_number}", timestamp)
+    )
+
+
+class TestRetention:
+    """Retention policy and log archiving"""
+
+    def test_cutoff_is_month_aligned(self):
+        assert retention_cutoff(datetime(2024, 3, 20, 15, 30), 30) == datetime(2024, 2, 1)
+
+    @pytest.mark.asyncio
+    async def test_disabled_by_default(self, storage):
+        job = f"retention-{uuid.uuid4().hex[:8]}"
+        await insert_log(storage, job, 1, "2020-01-01 00:00:00.000")
+
+        assert await apply_retention(datetime(2024, 6, 1)) is True
+        assert await storage.get_scan_log(job, 1) is not None
+
+    @pytest.mark.asyncio
+    async def test_archives_logs_before_dropping(self, storage):
+        job = f"retention-{uuid.uuid4().hex[:8]}"
+        await insert_log(storage, job, 1, "2024-01-10 08:00:00.000")
+        await insert_log(storage, job, 2, "2024-02-20 08:00:00.000")
+        await insert_log(storage, job, 3, "2024-05-20 08:00:00.000")
+        archive_dir = tempfile.mkdtemp(prefix="scan-archive-")
+
+        with patch("app.retention.settings.retention_logs_days", 60), \
+                patch("app.retention.settings.retention_archive_dir", archive_dir):
+            assert await apply_retention(datetime(2024, 5, 25)) is True
+
+        assert sorted(os.listdir(archive_dir)) == ["scan_logs-2024-01.jsonl.gz", "scan_logs-2024-02.jsonl.gz"]
+        with gzip.open(os.path.join(archive_dir, "scan_logs-2024-02.jsonl.gz")) as archive:
+            entries = [json.loads(line) for line in archive]
+        assert entries == [{
+            "job_name": job, "build_number": 2, "timestamp": "2024-02-20T08:00:00", "log_content": "log of 2"
+        }]
+        assert await storage.get_scan_log(job, 2) is None
+        assert await storage.get_scan_log(job, 3) == "log of 3"
+
+    @pytest.mark.asyncio
+    async def test_failed_archive_keeps_logs(self, storage):
+        job = f"retention-{uuid.uuid4().hex[:8]}"
+        await insert_log(storage, job, 1, "2024-01-10 08:00:00.000")
+        archive_dir = tempfile.mkdtemp(prefix="scan-archive-")
+
+        with patch("app.retention.settings.retention_logs_days", 60), \
+                patch("app.retention.settings.retention_archive_dir", archive_dir), \
+                patch.object(storage, "list_scan_logs_before", return_value=None):
+            assert await apply_retention(datetime(2024, 5, 25)) is False
+
+        assert os.listdir(archive_dir) == []
+        assert await storage.get_scan_log(job, 1) is not None
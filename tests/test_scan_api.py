@@ -2,8 +2,10 @@ import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import Mock, patch
 import json
+from datetime import datetime
 
 from app.main import app
+from app.job_catalog import parse_job
 from app.models import TriggerRequest, StatusResponse, LogResponse
 
 client = TestClient(app)
@@ -17,7 +19,6 @@ class TestScanAPI:
         self.api_key = "test-api-key"
         self.headers = {"Authorization": f"Bearer {self.api_key}"}
     
-    @patch('app.auth.settings.api_key', 'test-api-key')
     @patch('app.jenkins_client.jenkins_client.trigger_job')
     def test_trigger_scan_success(self, mock_trigger_job):
         """Test successful scan trigger"""
@@ -48,7 +49,86 @@ class TestScanAPI:
         assert data["job_name"] == "test-scan"
         assert data["build_number"] == 123
     
-    @patch('app.auth.settings.api_key', 'test-api-key')
+    @patch('app.database.db_manager.store_build_controller')
+    @patch('app.jenkins_client.jenkins_client.trigger_job')
+    def test_trigger_scan_records_controller(self, mock_trigger_job, mock_store_controller):
+        """Test that the controller chosen for a build is recorded"""
+        mock_trigger_job.return_value = {
+            "status": "triggered",
+            "job_name": "test-scan",
+            "build_number": 123,
+            "jenkins_url": "http://jenkins-b/job/test-scan/123",
+            "controller": "jenkins-b"
+        }
+        mock_store_controller.return_value = True
+        
+        response = client.post(
+            "/api/scan/trigger",
+            json={"job_name": "test-scan", "parameters": {}},
+            headers=self.headers
+        )
+        
+        assert response.status_code == 200
+        assert response.json()["controller"] == "jenkins-b"
+        mock_store_controller.assert_called_once_with("test-scan", 123, "jenkins-b")
+    
+    @patch('app.job_catalog.job_catalog._jobs', {"default": {"test-scan": parse_job({
+        "name": "test-scan",
+        "property": [{"parameterDefinitions": [{"name": "nexusURL", "type": "StringParameterDefinition"}]}]
+    })}})
+    @patch('app.jenkins_client.jenkins_client.trigger_job')
+    def test_trigger_scan_invalid_parameters(self, mock_trigger_job):
+        """Test that triggers not matching the job catalog never reach Jenkins"""
+        response = client.post(
+            "/api/scan/trigger",
+            json={"job_name": "test-scan", "parameters": {"nexusUrl": "x"}},
+            headers=self.headers
+        )
+        
+        assert response.status_code == 400
+        assert "Missing required parameter: nexusURL" in response.json()["detail"]
+        mock_trigger_job.assert_not_called()
+    
+    @patch('app.job_catalog.job_catalog._jobs', {"default": {}})
+    @patch('app.job_catalog.job_catalog.refresh_job', return_value=False)
+    def test_trigger_scan_unknown_job(self, mock_refresh_job):
+        """Test triggering a job that no controller has"""
+        response = client.post(
+            "/api/scan/trigger",
+            json={"job_name": "no-such-job", "parameters": {}},
+            headers=self.headers
+        )
+        
+        assert response.status_code == 404
+        mock_refresh_job.assert_called_once_with("no-such-job")
+    
+    @patch('app.job_catalog.job_catalog._jobs', {"default": {"test-scan": parse_job({"name": "test-scan"})}})
+    def test_list_jobs(self):
+        """Test listing jobs from the catalog"""
+        response = client.get("/api/scan/jobs", headers=self.headers)
+        
+        assert response.status_code == 200
+        assert response.json()["jobs"] == [
+            {"name": "test-scan", "buildable": True, "controllers": ["default"], "parameters": []}
+        ]
+        
+        response = client.get(
+            "/api/scan/jobs",
+            headers={**self.headers, "If-None-Match": response.headers["ETag"]}
+        )
+        assert response.status_code == 304
+    
+    @pytest.mark.parametrize("path", ["/api/scan/status", "/api/scan/log", "/api/scan/log/search"])
+    def test_unknown_controller(self, path):
+        """Test an unknown controller parameter is a 404, not a server error"""
+        response = client.get(
+            f"{path}?job_name=test-scan&build_number=123&pattern=x&source=jenkins&controller=nope",
+            headers=self.headers
+        )
+        
+        assert response.status_code == 404
+        assert response.json()["detail"] == "Unknown Jenkins controller: nope"
+    
     def test_trigger_scan_unauthorized(self):
         """Test scan trigger without API key"""
         request_data = {
@@ -60,7 +140,6 @@ class TestScanAPI:
         
         assert response.status_code == 401
     
-    @patch('app.auth.settings.api_key', 'test-api-key')
     @patch('app.jenkins_client.jenkins_client.get_build_status')
     def test_get_scan_status_success(self, mock_get_status):
         """Test successful status retrieval"""
@@ -82,7 +161,6 @@ class TestScanAPI:
         assert data["status"] == "IN_PROGRESS"
         assert data["progress_percent"] == 50.0
     
-    @patch('app.auth.settings.api_key', 'test-api-key')
     @patch('app.jenkins_client.jenkins_client.get_build_logs')
     def test_get_scan_logs_success(self, mock_get_logs):
         """Test successful log retrieval"""
@@ -99,7 +177,79 @@ class TestScanAPI:
         assert len(data["lines"]) == 3
         assert "Build started" in data["lines"]
     
-    @patch('app.auth.settings.api_key', 'test-api-key')
+    @patch('app.jenkins_client.jenkins_client.get_build_logs')
+    def test_get_scan_logs_text_format(self, mock_get_logs):
+        """Test raw log retrieval as text/plain"""
+        mock_get_logs.return_value = "Build started\nStep 1 completed"
+        
+        response = client.get(
+            "/api/scan/log?job_name=test-scan&build_number=123&format=text",
+            headers=self.headers
+        )
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert response.text == "Build started\nStep 1 completed"
+    
+    @patch('app.jenkins_client.jenkins_client.get_build_logs')
+    def test_get_scan_logs_compressed(self, mock_get_logs):
+        """Test large logs are compressed when the client accepts it"""
+        mock_get_logs.return_value = "\n".join(f"Step {n} completed" for n in range(5000))
+        
+        for encoding in ("gzip", "br"):
+            response = client.get(
+                "/api/scan/log?job_name=test-scan&build_number=123",
+                headers={**self.headers, "Accept-Encoding": encoding}
+            )
+            
+            assert response.status_code == 200
+            assert response.headers["content-encoding"] == encoding
+            assert int(response.headers["content-length"]) < 30000
+            assert len(response.json()["lines"]) == 5000
+    
+    @patch('app.jenkins_client.jenkins_client.get_build_logs')
+    def test_small_response_not_compressed(self, mock_get_logs):
+        """Test responses under the size threshold are sent as-is"""
+        mock_get_logs.return_value = "Build started"
+        
+        response = client.get(
+            "/api/scan/log?job_name=test-scan&build_number=123",
+            headers={**self.headers, "Accept-Encoding": "gzip, br"}
+        )
+        
+        assert response.status_code == 200
+        assert "content-encoding" not in response.headers
+    
+    @patch('app.database.db_manager.get_scan_log')
+    @patch('app.jenkins_client.jenkins_client.stream_build_log_lines')
+    def test_search_scan_log_from_jenkins(self, mock_stream, mock_get_log):
+        """Test log search falls back to streaming from Jenkins"""
+        mock_get_log.return_value = None
+        mock_stream.return_value = iter(["Build started", "ERROR: failed", "Build finished"])
+        
+        response = client.get(
+            "/api/scan/log/search?job_name=test-scan&build_number=123&pattern=error&ignore_case=true&context=1",
+            headers=self.headers
+        )
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["source"] == "jenkins"
+        assert data["match_count"] == 1
+        assert [line["line_number"] for line in data["lines"]] == [1, 2, 3]
+        assert data["lines"][1] == {"line_number": 2, "text": "ERROR: failed", "match": True, "truncated": False}
+    
+    @patch('app.database.db_manager.get_scan_log')
+    def test_search_scan_log_invalid_regex(self, mock_get_log):
+        """Test invalid regex is rejected before reading the log"""
+        response = client.get(
+            "/api/scan/log/search?job_name=test-scan&build_number=123&pattern=(oops&regex=true",
+            headers=self.headers
+        )
+        
+        assert response.status_code == 400
+        mock_get_log.assert_not_called()
+    
     @patch('app.database.db_manager.store_scan_result')
     @patch('app.jenkins_client.jenkins_client.get_build_logs')
     def test_callback_success(self, mock_get_logs, mock_store_result):
@@ -129,7 +279,53 @@ class TestScanAPI:
         data = response.json()
         assert data["status"] == "received"
     
-    @patch('app.auth.settings.api_key', 'test-api-key')
+    @patch('app.routers.scan.extract_findings_safely')
+    @patch('app.database.db_manager.store_scan_result')
+    @patch('app.jenkins_client.jenkins_client.get_build_logs')
+    def test_callback_schedules_findings_extraction(self, mock_get_logs, mock_store_result, mock_extract):
+        """Test the callback extracts findings after responding"""
+        mock_store_result.return_value = True
+        mock_get_logs.return_value = None
+        
+        response = client.post(
+            "/api/scan/callback",
+            json={"job_name": "test-scan", "build_number": 123, "status": "SUCCESS", "results": {}},
+            headers=self.headers
+        )
+        
+        assert response.status_code == 200
+        mock_extract.assert_called_once_with("test-scan", 123, None)
+    
+    @patch('app.database.db_manager.query_scan_findings')
+    def test_query_scan_findings_success(self, mock_query):
+        """Test findings query passes criteria to the database"""
+        mock_query.return_value = [{
+            "job_name": "test-scan",
+            "build_number": 123,
+            "artifact": "reports/scan.sarif",
+            "tool": "semgrep",
+            "rule_id": "sql-injection",
+            "severity": "critical",
+            "component": "src/db.py",
+            "location": "src/db.py:42",
+            "message": "User input reaches a query"
+        }]
+        
+        response = client.get(
+            "/api/scan/findings?job_name=test-scan&severity=critical&severity=high",
+            headers=self.headers
+        )
+        
+        assert response.status_code == 200
+        assert response.json()["findings"][0]["rule_id"] == "sql-injection"
+        assert mock_query.call_args.kwargs["severities"] == ["critical", "high"]
+    
+    def test_query_scan_findings_invalid_severity(self):
+        """Test unknown severities are rejected"""
+        response = client.get("/api/scan/findings?severity=urgent", headers=self.headers)
+        
+        assert response.status_code == 400
+    
     @patch('app.database.db_manager.get_scan_result')
     def test_get_scan_result_success(self, mock_get_result):
         """Test successful result retrieval"""
@@ -156,6 +352,193 @@ class TestScanAPI:
         assert data["build_number"] == 123
         assert data["status"] == "SUCCESS"
 
+    @patch('app.database.db_manager.query_scan_results')
+    def test_query_scan_results_success(self, mock_query):
+        """Test querying results by results keys"""
+        mock_query.return_value = [{
+            "job_name": "test-scan",
+            "build_number": 123,
+            "status": "FAILURE",
+            "results": {"critical_count": "3"},
+            "timestamp": "2023-01-01T12:00:00"
+        }]
+        
+        response = client.get(
+            "/api/scan/results?job_name=test-scan&filter=critical_count:gt:0",
+            headers=self.headers
+        )
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["results"][0]["build_number"] == 123
+        filters = mock_query.call_args.args[0]
+        assert filters[0].key == "critical_count"
+        assert filters[0].op == "gt"
+    
+    def test_query_scan_results_invalid_filter(self):
+        """Test invalid results filter is rejected"""
+        response = client.get(
+            "/api/scan/results?filter=critical_count:like:1",
+            headers=self.headers
+        )
+        
+        assert response.status_code == 400
+
+    @patch('app.database.db_manager.get_scan_stats')
+    def test_get_scan_stats_success(self, mock_stats):
+        """Test stats are grouped per job and bucket"""
+        mock_stats.return_value = [
+            {"job_name": "test-scan", "bucket_start": "2023-01-01T00:00:00", "status": "FAILURE", "count": 1},
+            {"job_name": "test-scan", "bucket_start": "2023-01-01T00:00:00", "status": "SUCCESS", "count": 3},
+            {"job_name": "test-scan", "bucket_start": "2023-01-02T00:00:00", "status": "SUCCESS", "count": 2},
+        ]
+        
+        response = client.get(
+            "/api/scan/stats?granularity=day&job_name=test-scan",
+            headers=self.headers
+        )
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["granularity"] == "day"
+        assert len(data["buckets"]) == 2
+        assert data["buckets"][0]["total"] == 4
+        assert data["buckets"][0]["counts"] == {"FAILURE": 1, "SUCCESS": 3}
+        assert data["buckets"][0]["pass_rate"] == 0.75
+    
+    @patch('app.database.db_manager.get_scan_stats')
+    def test_get_scan_stats_aware_window_as_utc(self, mock_stats):
+        """Test timezone-aware bounds are passed on as naive UTC"""
+        mock_stats.return_value = []
+        
+        response = client.get(
+            "/api/scan/stats?since=2023-01-01T02:00:00%2B02:00&until=2023-01-02T00:00:00Z",
+            headers=self.headers
+        )
+        
+        assert response.status_code == 200
+        assert mock_stats.call_args.kwargs["since"] == datetime(2023, 1, 1, 0, 0)
+        assert mock_stats.call_args.kwargs["until"] == datetime(2023, 1, 2, 0, 0)
+    
+    def test_get_scan_stats_invalid_granularity(self):
+        """Test unsupported granularity is rejected"""
+        response = client.get(
+            "/api/scan/stats?granularity=week",
+            headers=self.headers
+        )
+        
+        assert response.status_code == 422
+
+    @patch('app.jenkins_client.jenkins_client.get_build_status')
+    def test_get_scan_status_not_modified(self, mock_get_status):
+        """Test status polling with If-None-Match returns 304"""
+        mock_get_status.return_value = {
+            "status": "IN_PROGRESS",
+            "progress_percent": 50.0,
+            "start_time": "2023-01-01T10:00:00",
+            "estimated_end_time": None
+        }
+        
+        response = client.get("/api/scan/status?job_name=test-scan&build_number=123", headers=self.headers)
+        
+        assert response.status_code == 200
+        assert response.headers["cache-control"] == "no-cache"
+        etag = response.headers["etag"]
+        
+        response = client.get(
+            "/api/scan/status?job_name=test-scan&build_number=123",
+            headers={**self.headers, "If-None-Match": etag}
+        )
+        
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+        
+        mock_get_status.return_value = {**mock_get_status.return_value, "status": "SUCCESS", "progress_percent": 100}
+        response = client.get(
+            "/api/scan/status?job_name=test-scan&build_number=123",
+            headers={**self.headers, "If-None-Match": etag}
+        )
+        
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+        assert "immutable" in response.headers["cache-control"]
+    
+    @patch('app.database.db_manager.get_scan_result')
+    def test_get_scan_result_not_modified(self, mock_get_result):
+        """Test stored results revalidate by ETag, as a later callback may replace them"""
+        mock_get_result.return_value = {
+            "job_name": "test-scan",
+            "build_number": 123,
+            "status": "SUCCESS",
+            "results": {"risk_score": "medium"},
+            "timestamp": "2023-01-01T12:00:00"
+        }
+        
+        response = client.get("/api/scan/result?job_name=test-scan&build_number=123", headers=self.headers)
+        
+        assert response.status_code == 200
+        assert response.headers["cache-control"] == "no-cache"
+        
+        response = client.get(
+            "/api/scan/result?job_name=test-scan&build_number=123",
+            headers={**self.headers, "If-None-Match": f'W/{response.headers["etag"]}, "other"'}
+        )
+        
+        assert response.status_code == 304
+        assert response.content == b""
+    
+    @patch('app.database.db_manager.get_scan_result')
+    @patch('app.jenkins_client.jenkins_client.get_build_logs')
+    def test_get_scan_logs_etag_follows_length(self, mock_get_logs, mock_get_result):
+        """Test log ETag changes when the log grows, including compressed variants"""
+        mock_get_result.return_value = None
+        mock_get_logs.return_value = "x" * 5000
+        
+        response = client.get(
+            "/api/scan/log?job_name=test-scan&build_number=123",
+            headers={**self.headers, "Accept-Encoding": "gzip"}
+        )
+        
+        assert response.headers["content-encoding"] == "gzip"
+        etag = response.headers["etag"]
+        assert etag.endswith('-gzip"')
+        
+        response = client.get(
+            "/api/scan/log?job_name=test-scan&build_number=123",
+            headers={**self.headers, "Accept-Encoding": "gzip", "If-None-Match": etag}
+        )
+        assert response.status_code == 304
+        # Caches match the 304 to the gzip response they hold
+        assert response.headers["etag"] == etag
+        assert "Accept-Encoding" in response.headers["vary"]
+        
+        mock_get_logs.return_value = "x" * 5001
+        response = client.get(
+            "/api/scan/log?job_name=test-scan&build_number=123",
+            headers={**self.headers, "If-None-Match": etag}
+        )
+        assert response.status_code == 200
+    
+    @patch('app.database.db_manager.get_scan_result')
+    @patch('app.jenkins_client.jenkins_client.get_build_logs')
+    def test_get_scan_logs_tail_etag_follows_full_log(self, mock_get_logs, mock_get_result):
+        """Test a tail of unchanged length gets a new ETag when the log grows"""
+        mock_get_result.return_value = None
+        mock_get_logs.return_value = "a\nb\n1"
+        
+        response = client.get("/api/scan/log?job_name=test-scan&build_number=123&tail=1&format=text", headers=self.headers)
+        assert response.text == "1"
+        etag = response.headers["etag"]
+        
+        mock_get_logs.return_value = "a\nb\n1\n2"
+        response = client.get(
+            "/api/scan/log?job_name=test-scan&build_number=123&tail=1&format=text",
+            headers={**self.headers, "If-None-Match": etag}
+        )
+        assert response.status_code == 200
+        assert response.text == "2"
+        assert response.headers["etag"] != etag
+
 
 if __name__ == "__main__":
     pytest.main([__file__]) 
\ No newline at end of file
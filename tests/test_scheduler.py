@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+from app.scheduler import FairScheduler, effective_priority
+
+
+async def hold(scheduler, priority, client, started, release, reserved=False):
+    async with scheduler.slot(priority, client, reserved):
+        started.append((priority, client))
+        await release.wait()
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class TestFairScheduler:
+    """Priority order, round robin and reserved slots for Jenkins calls"""
+
+    def test_effective_priority_is_least_urgent(self):
+        assert effective_priority("critical", "bulk") == "bulk"
+        assert effective_priority("interactive", "critical") == "interactive"
+
+    @pytest.mark.asyncio
+    async def test_waiters_start_by_priority_then_round_robin(self):
+        scheduler = FairScheduler(max_concurrency=1)
+        started, release = [], asyncio.Event()
+        tasks = [asyncio.create_task(hold(scheduler, "bulk", "first", started, release))]
+        await settle()
+
+        # The dashboard queues three bulk reads before the other clients queue theirs
+        for priority, client in [("bulk", "dashboard"), ("bulk", "dashboard"), ("bulk", "dashboard"),
+                                 ("bulk", "other"), ("critical", "ci"), ("interactive", "ui")]:
+            tasks.append(asyncio.create_task(hold(scheduler, priority, client, started, release)))
+            await settle()
+        assert scheduler.waiting() == {"critical": 1, "interactive": 1, "bulk": 4}
+
+        release.set()
+        await asyncio.gather(*tasks)
+        assert started == [("bulk", "first"), ("critical", "ci"), ("interactive", "ui"), ("bulk", "dashboard"),
+                           ("bulk", "other"), ("bulk", "dashboard"), ("bulk", "dashboard")]
+        assert scheduler.active == 0
+
+    @pytest.mark.asyncio
+    async def test_reserved_slots_only_for_reserved_calls(self):
+        scheduler = FairScheduler(max_concurrency=3, reserved=1)
+        started, release = [], asyncio.Event()
+        tasks = [asyncio.create_task(hold(scheduler, "bulk", "dashboard", started, release)) for _ in range(3)]
+        await settle()
+        assert len(started) == 2
+
+        # Reserved calls take the slot whatever their priority, and start before earlier waiters
+        tasks.append(asyncio.create_task(hold(scheduler, "critical", "status", started, release)))
+        tasks.append(asyncio.create_task(hold(scheduler, "interactive", "legacy", started, release, reserved=True)))
+        await settle()
+        assert started[-1] == ("interactive", "legacy")
+        assert scheduler.waiting() == {"critical": 1, "interactive": 0, "bulk": 1}
+
+        release.set()
+        await asyncio.gather(*tasks)
+        assert started[3:] == [("critical", "status"), ("bulk", "dashboard")]
+        assert scheduler.active == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_gives_up_its_place(self):
+        scheduler = FairScheduler(max_concurrency=1)
+        started, release = [], asyncio.Event()
+        running = asyncio.create_task(hold(scheduler, "bulk", "a", started, release))
+        await settle()
+        waiting = asyncio.create_task(hold(scheduler, "bulk", "b", started, release))
+        await settle()
+
+        waiting.cancel()
+        await settle()
+        assert scheduler.waiting()["bulk"] == 0
+
+        release.set()
+        await running
+        assert scheduler.active == 0
+
+    @pytest.mark.asyncio
+    async def test_run_calls_in_thread(self):
+        scheduler = FairScheduler(max_concurrency=2)
+        assert await scheduler.run("interactive", "ui", lambda a, b=0: a + b, 1, b=2) == 3
+        assert scheduler.active == 0
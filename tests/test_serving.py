@@ -0,0 +1,53 @@
+import fcntl
+import os
+import tempfile
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app import serving
+from app.main import app
+
+
+class TestServing:
+    """Worker sizing, readiness and maintenance election"""
+
+    @patch('app.serving.settings.workers', 0)
+    @patch('app.serving.available_cpus', return_value=6)
+    def test_workers_sized_from_cpus(self, mock_cpus):
+        assert serving.worker_count() == 6
+
+    @patch('app.serving.settings.workers', 3)
+    def test_explicit_worker_count(self):
+        assert serving.worker_count() == 3
+
+    def test_readiness_follows_lifespan(self):
+        with TestClient(app) as client:
+            response = client.get("/health/ready")
+            assert response.status_code == 200
+            assert response.json()["worker_pid"] == os.getpid()
+
+        assert TestClient(app).get("/health/ready").status_code == 503
+
+    def test_readiness_counts_sibling_workers(self):
+        directory = tempfile.mkdtemp(prefix="scan-api-workers-")
+        open(os.path.join(directory, "12345.ready"), "w").close()
+        with patch.dict(os.environ, {serving.WORKERS_DIR_ENV: directory, serving.WORKERS_ENV: "4"}):
+            serving.mark_ready()
+            state = serving.readiness()
+            serving.mark_stopped()
+
+        assert state == {"ready": True, "worker_pid": os.getpid(), "workers_ready": 2, "workers": 4}
+        assert os.listdir(directory) == ["12345.ready"]
+
+    def test_single_maintenance_worker(self):
+        directory = tempfile.mkdtemp(prefix="scan-api-workers-")
+        with open(os.path.join(directory, "maintenance.lock"), "w") as other_worker, \
+                patch.dict(os.environ, {serving.WORKERS_DIR_ENV: directory}), \
+                patch('app.serving._maintenance_lock', None):
+            fcntl.flock(other_worker, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            assert serving.is_maintenance_worker() is False
+
+            fcntl.flock(other_worker, fcntl.LOCK_UN)
+            assert serving.is_maintenance_worker() is True
+            assert serving.is_maintenance_worker() is True
@@ -0,0 +1,354 @@
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+
+from app.storage import ResultFilter, create_storage_backend
+from app.storage.sqlite import SQLiteStorageBackend
+
+# Backends to run the conformance suite against. SQLite always runs; set e.g.
+# STORAGE_CONFORMANCE_BACKENDS=sqlite,postgres,oracle with the matching
+# connection settings in the environment to include server backends.
+BACKENDS = os.environ.get("STORAGE_CONFORMANCE_BACKENDS", "sqlite").split(",")
+
+# Minimum accepted write throughput for the throughput tests
+MIN_WRITES_PER_SEC = float(os.environ.get("STORAGE_MIN_WRITES_PER_SEC", "50"))
+
+
+@pytest_asyncio.fixture(params=BACKENDS)
+async def backend(request):
+    """Connected storage backend for each configured implementation"""
+    if request.param == "sqlite":
+        path = os.path.join(tempfile.mkdtemp(prefix="scan-storage-"), "scan.db")
+        storage = SQLiteStorageBackend(path=path)
+    else:
+        storage = create_storage_backend(request.param)
+    await storage.connect()
+    yield storage
+    await storage.close()
+
+
+def unique_job():
+    return f"conformance-{uuid.uuid4().hex[:12]}"
+
+
+class TestStorageConformance:
+    """Behaviour every storage backend must share"""
+
+    @pytest.mark.asyncio
+    async def test_store_and_get_result(self, backend):
+        job = unique_job()
+        results = {"report_url": "http://jenkins/report.html", "risk_score": "medium"}
+
+        assert await backend.store_scan_result(job, 1, "SUCCESS", results) is True
+
+        stored = await backend.get_scan_result(job, 1)
+        assert stored["job_name"] == job
+        assert stored["build_number"] == 1
+        assert stored["status"] == "SUCCESS"
+        assert stored["results"] == results
+        assert stored["timestamp"] is not None
+
+    @pytest.mark.asyncio
+    async def test_missing_result_returns_none(self, backend):
+        assert await backend.get_scan_result(unique_job(), 1) is None
+
+    @pytest.mark.asyncio
+    async def test_latest_result_wins(self, backend):
+        job = unique_job()
+        await backend.store_scan_result(job, 7, "FAILURE", {"attempt": "1"})
+        await asyncio.sleep(0.01)
+        await backend.store_scan_result(job, 7, "SUCCESS", {"attempt": "2"})
+
+        stored = await backend.get_scan_result(job, 7)
+        assert stored["status"] == "SUCCESS"
+        assert stored["results"] == {"attempt": "2"}
+
+    @pytest.mark.asyncio
+    async def test_empty_results(self, backend):
+        job = unique_job()
+        await backend.store_scan_result(job, 3, "SUCCESS", {})
+        assert (await backend.get_scan_result(job, 3))["results"] == {}
+
+    @pytest.mark.asyncio
+    async def test_query_by_result_keys(self, backend):
+        job = unique_job()
+        await backend.store_scan_result(job, 1, "SUCCESS", {"critical_count": "0", "risk_score": "low"})
+        await backend.store_scan_result(job, 2, "FAILURE", {"critical_count": "3", "risk_score": "high"})
+        await backend.store_scan_result(job, 3, "FAILURE", {"critical_count": "12", "risk_score": "high"})
+        await backend.store_scan_result(job, 4, "SUCCESS", {"risk_score": "n/a"})
+        await backend.store_scan_result(job, 5, "SUCCESS", {"critical_count": "n/a"})
+        await backend.store_scan_result(job, 6, "SUCCESS", {"critical_count": "1.5.2"})
+        await backend.store_scan_result(job, 7, "SUCCESS", {"critical_count": "-1.5"})
+        # Only plain decimals are numbers, on every backend
+        await backend.store_scan_result(job, 8, "SUCCESS", {"critical_count": "1e5"})
+        await backend.store_scan_result(job, 9, "SUCCESS", {"critical_count": "1e-1"})
+
+        found = await backend.query_scan_results([ResultFilter("critical_count", "gt", "2")], job_name=job)
+        assert sorted(r["build_number"] for r in found) == [2, 3]
+
+        # Non-numeric values never match numeric comparisons
+        found = await backend.query_scan_results([ResultFilter("critical_count", "lt", "5")], job_name=job)
+        assert sorted(r["build_number"] for r in found) == [1, 2, 7]
+
+        found = await backend.query_scan_results([ResultFilter("risk_score", "eq", "high"),
+                                                  ResultFilter("critical_count", "lt", "10")], job_name=job)
+        assert [r["build_number"] for r in found] == [2]
+
+        found = await backend.query_scan_results(job_name=job, status="SUCCESS")
+        assert sorted(r["build_number"] for r in found) == [1, 4, 5, 6, 7, 8, 9]
+        assert all(isinstance(r["results"], dict) for r in found)
+
+    @pytest.mark.asyncio
+    async def test_query_newest_first_with_limit(self, backend):
+        job = unique_job()
+        for n in range(5):
+            await backend.store_scan_result(job, n, "SUCCESS", {"risk_score": "low"})
+            await asyncio.sleep(0.005)
+
+        found = await backend.query_scan_results([ResultFilter("risk_score", "eq", "low")], job_name=job, limit=2)
+        assert [r["build_number"] for r in found] == [4, 3]
+
+    @pytest.mark.asyncio
+    async def test_rollups_follow_stored_results(self, backend):
+        job = unique_job()
+        for n, status in enumerate(["SUCCESS", "SUCCESS", "FAILURE"]):
+            await backend.store_scan_result(job, n, status, {})
+
+        for granularity in ("hour", "day"):
+            rows = await backend.get_scan_stats(granularity, job_name=job)
+            counts = {row["status"]: row["count"] for row in rows}
+            assert counts == {"SUCCESS": 2, "FAILURE": 1}
+            assert len({row["bucket_start"] for row in rows}) == 1
+
+    @pytest.mark.asyncio
+    async def test_stats_time_window(self, backend):
+        job = unique_job()
+        await backend.store_scan_result(job, 1, "SUCCESS", {})
+        stored = await backend.get_scan_result(job, 1)
+
+        since = stored["timestamp"] - timedelta(days=2)
+        assert len(await backend.get_scan_stats("day", job_name=job, since=since)) == 1
+        assert await backend.get_scan_stats("day", job_name=job, until=since) == []
+
+    @pytest.mark.asyncio
+    async def test_rebuild_rollups_matches_incremental(self, backend):
+        job = unique_job()
+        for n, status in enumerate(["SUCCESS", "FAILURE", "FAILURE", "ABORTED"]):
+            await backend.store_scan_result(job, n, status, {})
+        before = await backend.get_scan_stats("hour", job_name=job)
+
+        assert await backend.rebuild_scan_rollups() is True
+        assert await backend.get_scan_stats("hour", job_name=job) == before
+
+    @pytest.mark.asyncio
+    async def test_store_and_get_log(self, backend):
+        job = unique_job()
+        log = "Build started\nStep 1 completed\n" + "x" * 100_000
+
+        assert await backend.store_scan_log(job, 2, log) is True
+        assert await backend.get_scan_log(job, 2) == log
+
+    @pytest.mark.asyncio
+    async def test_missing_log_returns_none(self, backend):
+        assert await backend.get_scan_log(unique_job(), 2) is None
+
+    @pytest.mark.asyncio
+    async def test_list_scan_logs_before_pages_in_order(self, backend):
+        job = unique_job()
+        for n in range(5):
+            await backend.store_scan_log(job, n, f"log {n}")
+
+        before = datetime.utcnow() + timedelta(days=2)
+        seen, after = [], None
+        while True:
+            rows = await backend.list_scan_logs_before(before, after=after, limit=2)
+            if not rows:
+                break
+            seen += rows
+            after = (rows[-1]["timestamp"], rows[-1]["id"])
+
+        keys = [(row["timestamp"], row["id"]) for row in seen]
+        assert keys == sorted(keys)
+        assert [row["log_content"] for row in seen if row["job_name"] == job] == [f"log {n}" for n in range(5)]
+
+    @pytest.mark.asyncio
+    async def test_drop_expired_keeps_recent_rows(self, backend):
+        job = unique_job()
+        await backend.store_scan_result(job, 1, "SUCCESS", {})
+        await backend.store_scan_log(job, 1, "log")
+        assert await backend.maintain_partitions(datetime.utcnow()) is True
+
+        cutoff = datetime(2001, 1, 1)
+        assert await backend.drop_expired("scan_results", cutoff) is True
+        assert await backend.drop_expired("scan_logs", cutoff) is True
+        assert await backend.drop_expired("scan_findings", cutoff) is True
+        assert await backend.get_scan_result(job, 1) is not None
+        assert await backend.get_scan_log(job, 1) == "log"
+
+    @pytest.mark.asyncio
+    async def test_findings_replace_and_query(self, backend):
+        job = unique_job()
+
+        def finding(rule_id, severity, component):
+            return {"artifact": "report.sarif", "tool": "scanner", "rule_id": rule_id, "severity": severity,
+                    "component": component, "location": f"{component}:1", "message": None}
+
+        assert await backend.store_scan_findings(job, 1, [finding("old", "low", "a.py")]) is True
+        assert await backend.store_scan_findings(job, 1, [
+            finding("R1", "low", "a.py"), finding("R2", "critical", "b.py"), finding("R3", "high", "a.py")
+        ]) is True
+        await backend.store_scan_findings(job, 2, [finding("R2", "medium", "b.py")])
+
+        findings = await backend.query_scan_findings(job_name=job, build_number=1)
+        assert [row["rule_id"] for row in findings] == ["R2", "R3", "R1"]
+        assert findings[0] == {"job_name": job, "build_number": 1, **finding("R2", "critical", "b.py")}
+
+        high = await backend.query_scan_findings(job_name=job, severities=["critical", "high"])
+        assert [row["rule_id"] for row in high] == ["R2", "R3"]
+        by_rule = await backend.query_scan_findings(job_name=job, rule_id="R2")
+        assert [row["build_number"] for row in by_rule] == [1, 2]
+        assert len(await backend.query_scan_findings(job_name=job, component="a.py", limit=1)) == 1
+
+        assert await backend.store_scan_findings(job, 1, []) is True
+        assert await backend.query_scan_findings(job_name=job, build_number=1) == []
+
+    @pytest.mark.asyncio
+    async def test_build_controller_mapping(self, backend):
+        job = unique_job()
+        assert await backend.get_build_controller(job, 4) is None
+
+        assert await backend.store_build_controller(job, 4, "ci-a") is True
+        assert await backend.store_build_controller(job, 4, "ci-b") is True
+        assert await backend.get_build_controller(job, 4) == "ci-b"
+
+
+class TestStorageThroughput:
+    """Concurrent write throughput, comparable across backends"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_result_writes(self, backend):
+        job = unique_job()
+        count = 500
+
+        start = time.perf_counter()
+        stored = await asyncio.gather(*(
+            backend.store_scan_result(job, n, "SUCCESS", {"critical_count": str(n % 5)})
+            for n in range(count)
+        ))
+        elapsed = time.perf_counter() - start
+
+        assert all(stored)
+        rate = count / elapsed
+        print(f"{backend.name}: {rate:.0f} result writes/s")
+        assert rate >= MIN_WRITES_PER_SEC
+
+        for n in (0, count // 2, count - 1):
+            assert (await backend.get_scan_result(job, n))["results"] == {"critical_count": str(n % 5)}
+
+    @pytest.mark.asyncio
+    async def test_concurrent_log_writes(self, backend):
+        job = unique_job()
+        count = 100
+        log = "line\n" * 2000
+
+        start = time.perf_counter()
+        stored = await asyncio.gather(*(backend.store_scan_log(job, n, log) for n in range(count)))
+        elapsed = time.perf_counter() - start
+
+        assert all(stored)
+        rate = count / elapsed
+        print(f"{backend.name}: {rate:.0f} log writes/s")
+        assert rate >= MIN_WRITES_PER_SEC / 5
+
+
+class TestResultFilter:
+    """Parsing and validation of result filters"""
+
+    def test_parse(self):
+        assert ResultFilter.parse("report_url:eq:http://x/y") == ResultFilter("report_url", "eq", "http://x/y")
+
+    @pytest.mark.parametrize("expression", [
+        "critical_count:gt",
+        "critical_count:like:1",
+        "critical_count:gt:many",
+        "bad key:eq:1",
+        "x') OR 1=1 --:eq:1",
+    ])
+    def test_rejects_invalid(self, expression):
+        with pytest.raises(ValueError):
+            ResultFilter.parse(expression)
+
+
+class TestSQLiteBatching:
+    """SQLite-specific write batching behaviour"""
+
+    @pytest.mark.asyncio
+    async def test_bad_row_does_not_fail_batch(self):
+        path = os.path.join(tempfile.mkdtemp(prefix="scan-storage-"), "scan.db")
+        storage = SQLiteStorageBackend(path=path, batch_interval_ms=50)
+        await storage.connect()
+        try:
+            job = unique_job()
+            stored = await asyncio.gather(
+                storage.store_scan_result(job, 1, "SUCCESS", {}),
+                storage.store_scan_result(job, 2, None, {}),  # violates NOT NULL
+                storage.store_scan_result(job, 3, "SUCCESS", {}),
+            )
+            assert stored == [True, False, True]
+            assert await storage.get_scan_result(job, 3) is not None
+        finally:
+            await storage.close()
+
+    @pytest.mark.asyncio
+    async def test_drop_expired_deletes_old_rows(self):
+        path = os.path.join(tempfile.mkdtemp(prefix="scan-storage-"), "scan.db")
+        storage = SQLiteStorageBackend(path=path)
+        await storage.connect()
+        try:
+            job = unique_job()
+            for n, timestamp in enumerate(["2023-01-15 10:00:00.000", "2023-02-01 00:00:00.000"]):
+                await storage._write(
+                    "INSERT INTO scan_logs (job_name, build_number, log_content, timestamp) VALUES (?, ?, ?, ?)",
+                    (job, n, "log", timestamp)
+                )
+
+            assert await storage.drop_expired("scan_logs", datetime(2023, 2, 1)) is True
+            assert await storage.get_scan_log(job, 0) is None
+            assert await storage.get_scan_log(job, 1) == "log"
+        finally:
+            await storage.close()
+
+    @pytest.mark.asyncio
+    async def test_rebuild_rollups_keeps_expired_buckets(self):
+        path = os.path.join(tempfile.mkdtemp(prefix="scan-storage-"), "scan.db")
+        storage = SQLiteStorageBackend(path=path)
+        await storage.connect()
+        try:
+            job = unique_job()
+            await storage._write(
+                "INSERT INTO scan_result_rollups VALUES (?, 'day', '2020-01-01 00:00:00', 'SUCCESS', 3)", (job,)
+            )
+            await storage.store_scan_result(job, 1, "SUCCESS", {})
+
+            assert await storage.rebuild_scan_rollups() is True
+            stats = await storage.get_scan_stats("day", job_name=job)
+            assert [row["count"] for row in stats] == [3, 1]
+        finally:
+            await storage.close()
+
+    @pytest.mark.asyncio
+    async def test_wal_mode_enabled(self):
+        path = os.path.join(tempfile.mkdtemp(prefix="scan-storage-"), "scan.db")
+        storage = SQLiteStorageBackend(path=path)
+        await storage.connect()
+        try:
+            row = await storage._read("PRAGMA journal_mode", ())
+            assert row[0] == "wal"
+        finally:
+            await storage.close()